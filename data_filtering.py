@@ -1,65 +1,114 @@
 import pandas as pd
 from typing import Tuple, List, Any, Optional
 
-from db_connection import get_mongodb_connection, close_mongodb_connection
-from loaders import LOADERS
+from db_connection import get_database
+from loaders import (
+    LOADERS,
+    BUNDLE_LOADERS,
+    PROTOCOL_AGNOSTIC_METRICS,
+    get_vital_counts,
+)
+
+# Vital shortcodes that are loaded via get_vitals
+VITAL_METRICS = ["af", "bd", "bz", "co2", "co", "hb", "hf", "puls", "spo2", "temp"]
+
+# Upper bound for protocol IDs sent in one $in filter (BSON documents max 16 MB)
+PROTOCOL_ID_CHUNK_SIZE = 20000
 
 
 def filter_data_by_year(year_start, year_end, limit=10000):
     """Filter data by year range from missionDate in nida_index"""
-    db, client = get_mongodb_connection()
-    try:
-        filters = {"year_range": (year_start, year_end)}
-        index_df = LOADERS["Index"](db, filters=filters, limit=limit)
+    db = get_database()
+    filters = {"year_range": (year_start, year_end)}
+    index_df = LOADERS["Index"](db, filters=filters, limit=limit)
+
+    if index_df.empty:
+        return index_df, []
+
+    protocol_ids = index_df["protocolId"].unique().tolist()
+    return index_df, protocol_ids
+
 
-        if index_df.empty:
-            return index_df, []
+def load_metric(db, metric, filters=None, limit=10000, med_name=None):
+    """Call the registered loader for a metric with the common filter spec"""
+    if metric not in LOADERS:
+        raise ValueError(f"Unknown metric: {metric}")
 
-        protocol_ids = index_df["protocolId"].unique().tolist()
-        return index_df, protocol_ids
-    finally:
-        close_mongodb_connection(client)
+    loader = LOADERS[metric]
+
+    # Handle different metric types
+    if metric in ["GCS", "Schmerzen"]:
+        return loader(db, metric=metric, limit=limit, filters=filters)
+    if metric in VITAL_METRICS:
+        # For vitals, pass the shortcode directly
+        return loader(db, vital=metric, limit=limit, filters=filters)
+    if metric == "Medikamente":
+        # For medications with optional name filter
+        return loader(db, med_name=med_name, limit=limit, filters=filters)
+    return loader(db, filters=filters, limit=limit)
 
 
 def get_data_for_protocols(metric, protocol_ids, limit=10000, med_name=None):
-    """Get data for specific protocols"""
-    db, client = get_mongodb_connection()
-    try:
-        if metric not in LOADERS:
-            raise ValueError(f"Unknown metric: {metric}")
-
-        # For Index and Details, use the protocol_ids filter
-        if metric in ["Index", "Details"]:
-            filters = {"protocol_ids": protocol_ids}
-            return LOADERS[metric](db, filters=filters, limit=limit)
-
-        # For other metrics, load the data and filter by protocol_ids afterward
-        if metric in ["GCS", "Schmerzen"]:
-            df = LOADERS[metric](db, metric=metric, limit=limit)
-        elif metric in [
-            "af",
-            "bd",
-            "bz",
-            "co2",
-            "co",
-            "hb",
-            "hf",
-            "puls",
-            "spo2",
-            "temp",
-        ]:
-            # For vitals, pass the shortcode directly
-            df = LOADERS[metric](db, vital=metric, limit=limit)
-        elif metric == "Medikamente" and med_name:
-            # For medications with specific name filter
-            df = LOADERS[metric](db, med_name=med_name, limit=limit)
-        else:
-            df = LOADERS[metric](db, limit=limit)
-
-        # Filter by protocol_ids
-        if not df.empty and "protocolId" in df.columns:
-            df = df[df["protocolId"].isin(protocol_ids)]
-
-        return df
-    finally:
-        close_mongodb_connection(client)
+    """Get data for specific protocols, filtered inside MongoDB"""
+    db = get_database()
+    if metric in PROTOCOL_AGNOSTIC_METRICS:
+        # Every chunk would return the same rows
+        return load_metric(db, metric, limit=limit, med_name=med_name)
+
+    protocol_ids = list(protocol_ids)
+
+    frames = []
+    for start in range(0, len(protocol_ids), PROTOCOL_ID_CHUNK_SIZE):
+        filters = {"protocol_ids": protocol_ids[start : start + PROTOCOL_ID_CHUNK_SIZE]}
+        df = load_metric(db, metric, filters=filters, limit=limit, med_name=med_name)
+        if df is not None and not df.empty:
+            frames.append(df.loc[:, ~df.columns.duplicated()])
+
+    if not frames:
+        return pd.DataFrame()
+    if len(frames) == 1:
+        return frames[0]
+    return pd.concat(frames, ignore_index=True).head(limit)
+
+
+def load_bundle(bundle, protocol_ids=None, limit=10000):
+    """Load all metrics of a bundle in one scan, optionally for specific protocols"""
+    if bundle not in BUNDLE_LOADERS:
+        raise ValueError(f"Unknown bundle: {bundle}")
+
+    db = get_database()
+    if not protocol_ids:
+        return BUNDLE_LOADERS[bundle](db, limit=limit)
+
+    protocol_ids = list(protocol_ids)
+    frames = {}
+    for start in range(0, len(protocol_ids), PROTOCOL_ID_CHUNK_SIZE):
+        filters = {"protocol_ids": protocol_ids[start : start + PROTOCOL_ID_CHUNK_SIZE]}
+        for metric, df in BUNDLE_LOADERS[bundle](
+            db, limit=limit, filters=filters
+        ).items():
+            frames.setdefault(metric, [])
+            if not df.empty:
+                frames[metric].append(df)
+
+    return {
+        metric: (
+            pd.concat(dfs, ignore_index=True).head(limit) if dfs else pd.DataFrame()
+        )
+        for metric, dfs in frames.items()
+    }
+
+
+def get_vital_counts_for_protocols(vitals, protocol_ids):
+    """Count vital measurements per protocol in MongoDB for the given protocols"""
+    db = get_database()
+    protocol_ids = list(protocol_ids)
+
+    frames = []
+    for start in range(0, len(protocol_ids), PROTOCOL_ID_CHUNK_SIZE):
+        filters = {"protocol_ids": protocol_ids[start : start + PROTOCOL_ID_CHUNK_SIZE]}
+        frames.append(get_vital_counts(db, vitals, filters=filters))
+
+    if not frames:
+        return get_vital_counts(db, [])
+    return pd.concat(frames, ignore_index=True)
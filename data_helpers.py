@@ -1,3 +1,6 @@
+import re
+
+import numpy as np
 import pandas as pd
 from bson import ObjectId
 import datetime
@@ -46,29 +49,118 @@ def combine_date_time(date_val, time_val):
     return None
 
 
+# Target column and the date/time source columns of each NIDA status
+STATUS_FIELDS = [
+    ("StatusAlarm", "content_dateStatusAlarm", "content_timeStatusAlarm"),
+    ("Status3", "content_dateStatus3", "content_timeStatus3"),
+    ("Status4", "content_dateStatus4", "content_timeStatus4"),
+    ("Status4b", "content_dateStatus4b", "content_timeStatus4b"),
+    ("Status7", "content_dateStatus7", "content_timeStatus7"),
+    ("Status8", "content_dateStatus8", "content_timeStatus8"),
+    ("Status8b", "content_dateStatus8b", "content_timeStatus8b"),
+    ("Status1", "content_dateStatus1", "content_timeStatus1"),
+    ("Status2", "content_dateStatus2", "content_timeStatus2"),
+    ("StatusEnd", "content_dateStatusEnd", "content_timeStatusEnd"),
+]
+
+# Explicit date formats tried in order before falling back to inference
+DATE_FORMATS = ["%d.%m.%Y", "%Y-%m-%d"]
+
+
+def _parse_unique(values, parse):
+    """Parse only the distinct values of a Series and broadcast the result back"""
+    codes, uniques = pd.factorize(values)
+    parsed = parse(pd.Series(uniques, dtype=object))
+    # Missing values have code -1 and are filled with NaT
+    result = pd.api.extensions.take(parsed.array, codes, allow_fill=True)
+    return pd.Series(result, index=values.index)
+
+
+def _parse_dates(values):
+    """Parse date strings with explicit formats, e.g. "01.02.2023" """
+    result = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+    remaining = values.notna()
+    for fmt in DATE_FORMATS:
+        if not remaining.any():
+            return result
+        parsed = pd.to_datetime(values[remaining], format=fmt, errors="coerce")
+        parsed = parsed[parsed.notna()]
+        result.loc[parsed.index] = parsed
+        remaining &= result.isna()
+    if remaining.any():
+        result.loc[remaining] = pd.to_datetime(
+            values[remaining], format="mixed", errors="coerce"
+        )
+    return result
+
+
+TIME_PATTERN = r"^(\d{1,2}):(\d{2})(?::(\d{2}))?$"
+
+
+def _parse_times(values):
+    """
+    Parse time strings like "10:05:00" or "10:05" into timedeltas
+
+    Anything else, including out-of-range times like "25:00" that
+    pd.to_timedelta would roll into the next day, becomes NaT.
+    """
+    parts = values.astype(object).str.extract(TIME_PATTERN).astype(float)
+    hours, minutes, seconds = parts[0], parts[1], parts[2].fillna(0)
+    valid = (hours < 24) & (minutes < 60) & (seconds < 60)
+    total = (hours * 3600 + minutes * 60 + seconds).where(valid)
+    return pd.to_timedelta(total, unit="s")
+
+
+def _clean_strings(values):
+    """Convert values to stripped strings, with None for missing or empty ones"""
+    cleaned = pd.Series(None, index=values.index, dtype=object)
+    present = values.notna()
+    cleaned[present] = values[present].astype(str).str.strip().to_numpy()
+    cleaned[cleaned == ""] = None
+    return cleaned
+
+
+def combine_date_time_columns(date_values, time_values):
+    """
+    Vectorized combination of a date and a time column into datetimes
+
+    Distinct dates and times are parsed once each (dates with explicit
+    formats), so large frames only pay for the unique values.
+    """
+    dates = _clean_strings(date_values)
+    times = _clean_strings(time_values)
+
+    parsed_dates = pd.to_datetime(_parse_unique(dates, _parse_dates))
+    parsed_times = pd.to_timedelta(_parse_unique(times, _parse_times))
+    return parsed_dates + parsed_times
+
+
 def combine_date_time_fields(df):
     """Combine date and time fields into datetime fields"""
     if df.empty:
         return df
 
-    status_fields = [
-        ("StatusAlarm", "content_dateStatusAlarm", "content_timeStatusAlarm"),
-        ("Status3", "content_dateStatus3", "content_timeStatus3"),
-        ("Status4", "content_dateStatus4", "content_timeStatus4"),
-        ("Status4b", "content_dateStatus4b", "content_timeStatus4b"),
-        ("Status7", "content_dateStatus7", "content_timeStatus7"),
-        ("Status8", "content_dateStatus8", "content_timeStatus8"),
-        ("Status8b", "content_dateStatus8b", "content_timeStatus8b"),
-        ("Status1", "content_dateStatus1", "content_timeStatus1"),
-        ("Status2", "content_dateStatus2", "content_timeStatus2"),
-        ("StatusEnd", "content_dateStatusEnd", "content_timeStatusEnd"),
+    fields = [
+        (target_field, date_field, time_field)
+        for target_field, date_field, time_field in STATUS_FIELDS
+        if date_field in df.columns and time_field in df.columns
     ]
+    if not fields:
+        return df
 
-    for target_field, date_field, time_field in status_fields:
-        if date_field in df.columns and time_field in df.columns:
-            df[target_field] = df.apply(
-                lambda row: combine_date_time(row[date_field], row[time_field]), axis=1
-            )
+    # Parse all status fields in one pass, so dates shared across fields are
+    # only parsed once
+    dates = pd.concat(
+        [df[date_field] for _, date_field, _ in fields], ignore_index=True
+    )
+    times = pd.concat(
+        [df[time_field] for _, _, time_field in fields], ignore_index=True
+    )
+    combined = combine_date_time_columns(dates, times).to_numpy()
+    combined = combined.reshape(len(fields), len(df))
+
+    for position, (target_field, _, _) in enumerate(fields):
+        df[target_field] = combined[position]
     return df
 
 
@@ -138,6 +230,148 @@ def check_requirements(anamnesis_text):
     }
 
 
+# Requirement dimensions of the anamnesis texts: dimension -> ordered list of
+# (category, lowercase phrases). The first category with a phrase found in the
+# text wins, so specific phrases are listed before general ones.
+REQUIREMENT_RULES = {
+    "medical_care": [
+        # First check for logistical/social/pedagogical care (most specific)
+        ("nicht_indiziert", ["keine medizinische betreuung notwendig geworden"]),
+        # Then check for medical care needed
+        (
+            "indiziert",
+            [
+                "medizinische betreuung notwendig",
+                "medizinische versorgung erforderlich",
+                "ärztliche betreuung notwendig",
+                "medizinische intervention",
+                "während des transport wurde eine medizinische betreuung notwendig",
+            ],
+        ),
+        (
+            "logistische_soziale_paedagogische",
+            [
+                "logistische betreuung",
+                "soziale betreuung",
+                "pädagogische betreuung",
+                "psychologische betreuung",
+                "begleitperson notwendig",
+                "keine medizinische betreuung notwendig geworden, sondern lediglich eine logistische",
+            ],
+        ),
+    ],
+    "ktw_equipment": [
+        # First check for no special equipment needed (most common case)
+        (
+            "nicht_indiziert",
+            [
+                "keine besondere ausstattung ktw",
+                "keine spezielle ausstattung ktw",
+                "während der fahrt war der patient zu keiner zeit auf die besondere ausstattung eines ktw angewiesen",
+            ],
+        ),
+        # Then check for Krankenfahrt sufficient
+        (
+            "krankenfahrt",
+            [
+                "krankenfahrt ausreichend",
+                "beförderung als krankenfahrt ausreichend",
+                "keine besondere ausstattung eines ktw erforderlich, sodass die beforderung als krankenfahrt ausreichend",
+                "lediglich liegend transportiert werden",
+                "lediglich im rollstuhl sitzend transportiert werden",
+                "der patient muss lediglich liegend / im rollstuhl sitzend transportiert werden",
+            ],
+        ),
+        # Finally check for special equipment needed
+        (
+            "indiziert",
+            [
+                "besondere ausstattung ktw",
+                "spezielle ausstattung ktw",
+                "rtw ausstattung notwendig",
+                "intensivtransport",
+                "beatmung notwendig",
+                "monitorüberwachung",
+                "defibrillator notwendig",
+                "während der fahrt war der patient auf die folgende besondere ausstattung eines ktw angewiesen",
+            ],
+        ),
+    ],
+    "infectious_disease": [
+        # First check for no infectious disease (most common case)
+        (
+            "nicht_indiziert",
+            [
+                "keine ansteckende infektionserkrankung",
+                "nicht infektiös",
+                "keine isolierung notwendig",
+                "bei dem patienten ist keine schwere ansteckende infektionserkrankung festgestellt worden oder als wahrscheinlich anzunehmen",
+            ],
+        ),
+        # Then check for local protection sufficient
+        (
+            "lokaler_schutz",
+            [
+                "lokale schutzmaßnahmen ausreichend",
+                "standard hygiene ausreichend",
+                "normale schutzmaßnahmen",
+                "bei dem patienten liegt eine infektionserkrankung vor, deren verbreitung jedoch durch lokal schutzmaßnahmen ausreichend vermieden werden kann",
+            ],
+        ),
+        # Finally check for severe infectious disease
+        (
+            "indiziert",
+            [
+                "schwere ansteckende infektionserkrankung",
+                "hochinfektiös",
+                "isolierung notwendig",
+                "quarantäne",
+                "infektionsschutz",
+                "bei dem patient liegt eine schwere ansteckende infektionserkrankung vor",
+            ],
+        ),
+    ],
+    "crew_assessment": [
+        # First check for Krankenfahrt sufficient
+        (
+            "krankenfahrt_ausreichend",
+            [
+                "laut vorliegendem patientenzustand ist eine beförderung des patienten indiziert, jedoch nicht als krankentransport sondern als krankenfahrt",
+            ],
+        ),
+        # Then check for RTW/medical crew needed
+        (
+            "indiziert",
+            [
+                "ärztliche begleitung notwendig",
+                "die vorliegenden begründungen der transportverordnung bzw. der übergabe entsprechen den einschätzungen des teamleiters",
+            ],
+        ),
+        # Finally check for no RTW needed
+        (
+            "nicht_indiziert",
+            [
+                "auch bei genauer anamnese ist keine indikationen für einen krankentransport oder eine krankenfahrt erkennbar"
+            ],
+        ),
+    ],
+}
+
+KRANKENFAHRT_PHRASES = ["krankenfahrt"]
+
+
+def _phrase_pattern(phrases):
+    """One regex alternation matching any of the literal phrases"""
+    return "|".join(re.escape(phrase) for phrase in phrases)
+
+
+# Patterns compiled once from the rules: dimension -> [(category, pattern)]
+REQUIREMENT_PATTERNS = {
+    dimension: [(category, _phrase_pattern(phrases)) for category, phrases in levels]
+    for dimension, levels in REQUIREMENT_RULES.items()
+}
+
+
 def check_requirements_enhanced(anamnesis_text):
     """
     Enhanced analysis of anamnesis text for comprehensive transport requirement assessment.
@@ -150,169 +384,70 @@ def check_requirements_enhanced(anamnesis_text):
     """
     if pd.isna(anamnesis_text):
         return {
-            "medical_care": None,
-            "ktw_equipment": None,
-            "infectious_disease": None,
-            "crew_assessment": None,
+            **{dimension: None for dimension in REQUIREMENT_RULES},
             "krankenfahrt_mentioned": False,
         }
 
     text = str(anamnesis_text).lower()
 
-    # Medical care checking (enhanced patterns) - prioritize specific over general
-    medical_care = None
-    # First check for logistical/social/pedagogical care (most specific)
-    if any(
-        phrase in text for phrase in ["keine medizinische betreuung notwendig geworden"]
-    ):
-        medical_care = "nicht_indiziert"
-    # Then check for medical care needed
-    elif any(
-        phrase in text
-        for phrase in [
-            "medizinische betreuung notwendig",
-            "medizinische versorgung erforderlich",
-            "ärztliche betreuung notwendig",
-            "medizinische intervention",
-            "während des transport wurde eine medizinische betreuung notwendig",
-        ]
-    ):
-        medical_care = "indiziert"
-    elif any(
-        phrase in text
-        for phrase in [
-            "logistische betreuung",
-            "soziale betreuung",
-            "pädagogische betreuung",
-            "psychologische betreuung",
-            "begleitperson notwendig",
-            "keine medizinische betreuung notwendig geworden, sondern lediglich eine logistische",
-        ]
-    ):
-        medical_care = "logistische_soziale_paedagogische"
+    result = {}
+    for dimension, levels in REQUIREMENT_RULES.items():
+        result[dimension] = next(
+            (
+                category
+                for category, phrases in levels
+                if any(phrase in text for phrase in phrases)
+            ),
+            None,
+        )
+    result["krankenfahrt_mentioned"] = any(
+        phrase in text for phrase in KRANKENFAHRT_PHRASES
+    )
+    return result
 
-    # KTW equipment checking (enhanced patterns) - prioritize specific over general
-    ktw_equipment = None
-    # First check for no special equipment needed (most common case)
-    if any(
-        phrase in text
-        for phrase in [
-            "keine besondere ausstattung ktw",
-            "keine spezielle ausstattung ktw",
-            "während der fahrt war der patient zu keiner zeit auf die besondere ausstattung eines ktw angewiesen",
-        ]
-    ):
-        ktw_equipment = "nicht_indiziert"
-    # Then check for Krankenfahrt sufficient
-    elif any(
-        phrase in text
-        for phrase in [
-            "krankenfahrt ausreichend",
-            "beförderung als krankenfahrt ausreichend",
-            "keine besondere ausstattung eines ktw erforderlich, sodass die beforderung als krankenfahrt ausreichend",
-            "lediglich liegend transportiert werden",
-            "lediglich im rollstuhl sitzend transportiert werden",
-            "der patient muss lediglich liegend / im rollstuhl sitzend transportiert werden",
-        ]
-    ):
-        ktw_equipment = "krankenfahrt"
-    # Finally check for special equipment needed
-    elif any(
-        phrase in text
-        for phrase in [
-            "besondere ausstattung ktw",
-            "spezielle ausstattung ktw",
-            "rtw ausstattung notwendig",
-            "intensivtransport",
-            "beatmung notwendig",
-            "monitorüberwachung",
-            "defibrillator notwendig",
-            "während der fahrt war der patient auf die folgende besondere ausstattung eines ktw angewiesen",
-        ]
-    ):
-        ktw_equipment = "indiziert"
 
-    # Infectious disease checking (enhanced patterns) - prioritize specific over general
-    infectious_disease = None
-    # First check for no infectious disease (most common case)
-    if any(
-        phrase in text
-        for phrase in [
-            "keine ansteckende infektionserkrankung",
-            "nicht infektiös",
-            "keine isolierung notwendig",
-            "bei dem patienten ist keine schwere ansteckende infektionserkrankung festgestellt worden oder als wahrscheinlich anzunehmen",
-        ]
-    ):
-        infectious_disease = "nicht_indiziert"
-    # Then check for local protection sufficient
-    elif any(
-        phrase in text
-        for phrase in [
-            "lokale schutzmaßnahmen ausreichend",
-            "standard hygiene ausreichend",
-            "normale schutzmaßnahmen",
-            "bei dem patienten liegt eine infektionserkrankung vor, deren verbreitung jedoch durch lokal schutzmaßnahmen ausreichend vermieden werden kann",
-        ]
-    ):
-        infectious_disease = "lokaler_schutz"
-    # Finally check for severe infectious disease
-    elif any(
-        phrase in text
-        for phrase in [
-            "schwere ansteckende infektionserkrankung",
-            "hochinfektiös",
-            "isolierung notwendig",
-            "quarantäne",
-            "infektionsschutz",
-            "bei dem patient liegt eine schwere ansteckende infektionserkrankung vor",
-        ]
-    ):
-        infectious_disease = "indiziert"
-
-    # Crew assessment (enhanced patterns) - prioritize specific over general
-    crew_assessment = None
-    # First check for Krankenfahrt sufficient
-    if any(
-        phrase in text
-        for phrase in [
-            "laut vorliegendem patientenzustand ist eine beförderung des patienten indiziert, jedoch nicht als krankentransport sondern als krankenfahrt",
-        ]
-    ):
-        crew_assessment = "krankenfahrt_ausreichend"
-    # Then check for RTW/medical crew needed
-    elif any(
-        phrase in text
-        for phrase in [
-            "ärztliche begleitung notwendig",
-            "die vorliegenden begründungen der transportverordnung bzw. der übergabe entsprechen den einschätzungen des teamleiters",
-        ]
-    ):
-        crew_assessment = "indiziert"
-    # Finally check for no RTW needed
-    elif any(
-        phrase in text
-        for phrase in [
-            "auch bei genauer anamnese ist keine indikationen für einen krankentransport oder eine krankenfahrt erkennbar"
-        ]
-    ):
-        crew_assessment = "nicht_indiziert"
+def _broadcast(unique_values, codes, missing):
+    """Map factorize codes back to per-row values, missing for code -1"""
+    # The appended sentinel is what code -1 indexes, which also covers inputs
+    # where every text is missing and there are no unique values at all
+    return np.append(unique_values, missing).astype(unique_values.dtype)[codes]
 
-    # Krankenfahrt mentioned
-    krankenfahrt_mentioned = any(
-        phrase in text
-        for phrase in [
-            "krankenfahrt",
-        ]
-    )
 
-    return {
-        "medical_care": medical_care,
-        "ktw_equipment": ktw_equipment,
-        "infectious_disease": infectious_disease,
-        "crew_assessment": crew_assessment,
-        "krankenfahrt_mentioned": krankenfahrt_mentioned,
-    }
+def classify_requirements(texts):
+    """
+    Vectorized check_requirements_enhanced over many texts
+
+    Args:
+        texts (pd.Series | list): Anamnesis texts
+
+    Returns:
+        pd.DataFrame: Indexed like texts, one categorical column per requirement
+        dimension (categories in rule order, NaN if no phrase matched) and the
+        boolean column krankenfahrt_mentioned
+    """
+    texts = pd.Series(texts)
+    # Every distinct text is classified once and the result broadcast
+    codes, uniques = pd.factorize(texts)
+    lowered = pd.Series(uniques, dtype="string").str.lower()
+
+    def contains(pattern):
+        return (
+            lowered.str.contains(pattern, regex=True).fillna(False).to_numpy(dtype=bool)
+        )
+
+    result = {}
+    for dimension, levels in REQUIREMENT_PATTERNS.items():
+        unique_codes = np.full(len(uniques), -1, dtype=np.int8)
+        for code, (_, pattern) in enumerate(levels):
+            unique_codes[(unique_codes < 0) & contains(pattern)] = code
+        result[dimension] = pd.Categorical.from_codes(
+            _broadcast(unique_codes, codes, -1),
+            categories=[category for category, _ in levels],
+        )
+
+    mentioned = contains(_phrase_pattern(KRANKENFAHRT_PHRASES))
+    result["krankenfahrt_mentioned"] = _broadcast(mentioned, codes, False)
+    return pd.DataFrame(result, index=texts.index)
 
 
 def analyze_freetext_requirements(df_freetext, protocol_ids=None):
@@ -347,3 +482,28 @@ def analyze_freetext_requirements(df_freetext, protocol_ids=None):
     analysis_results = df_freetext[text_column].apply(check_requirements_enhanced)
 
     return analysis_results
+
+
+def classify_freetext_requirements(df_freetext, protocol_ids=None):
+    """
+    Columnar variant of analyze_freetext_requirements.
+
+    Args:
+        df_freetext (pd.DataFrame): DataFrame containing freetext data
+        protocol_ids (list, optional): List of protocol IDs to filter by
+
+    Returns:
+        pd.DataFrame: classify_requirements result indexed like the (filtered)
+        freetext rows; empty if no text column is available
+    """
+    if df_freetext.empty:
+        return pd.DataFrame()
+
+    if protocol_ids is not None:
+        df_freetext = df_freetext[df_freetext["protocolId"].isin(protocol_ids)]
+
+    # Prioritize 'content' as shown in data structure
+    for text_column in ["content", "text"]:
+        if text_column in df_freetext.columns:
+            return classify_requirements(df_freetext[text_column])
+    return pd.DataFrame()
@@ -2,9 +2,15 @@ import streamlit as st
 import pandas as pd
 from typing import Optional, Tuple, List, Any
 
-from db_connection import get_mongodb_connection, close_mongodb_connection
-from loaders import LOADERS
-from data_filtering import filter_data_by_year, get_data_for_protocols
+from db_connection import get_database
+from loaders import LOADERS, BUNDLED_METRICS, PROTOCOL_AGNOSTIC_METRICS
+from data_filtering import (
+    filter_data_by_year,
+    get_data_for_protocols,
+    get_vital_counts_for_protocols,
+    load_bundle,
+    load_metric,
+)
 
 
 @st.cache_data(ttl=604800, show_spinner="Filtering data by year...")
@@ -19,44 +25,40 @@ def cached_db_query(
     limit: int = 10000,
     med_name: Optional[str] = None,
     protocol_ids: Optional[List[str]] = None,
+    year_range: Optional[Tuple[int, int]] = None,
 ):
     """Cached database query function that handles the actual data retrieval"""
-    db, client = get_mongodb_connection()
-    try:
-        if metric not in LOADERS:
-            raise ValueError(f"Unknown metric: {metric}")
-
-        # Handle different metric types
-        if metric in ["GCS", "Schmerzen"]:
-            df = LOADERS[metric](db, metric=metric, limit=limit)
-        elif metric in [
-            "af",
-            "bd",
-            "bz",
-            "co2",
-            "co",
-            "hb",
-            "hf",
-            "puls",
-            "spo2",
-            "temp",
-        ]:
-            # For vitals, pass the shortcode directly
-            df = LOADERS[metric](db, vital=metric, limit=limit)
-        elif metric == "Medikamente" and med_name:
-            # For medications with specific name filter
-            df = LOADERS[metric](db, med_name=med_name, limit=limit)
-        elif protocol_ids:
-            # When we have specific protocol IDs to filter by
-            df = get_data_for_protocols(metric, protocol_ids, limit, med_name)
-        else:
-            df = LOADERS[metric](db, limit=limit)
-
-        # Remove duplicate columns
-        df = df.loc[:, ~df.columns.duplicated()]
-        return df
-    finally:
-        close_mongodb_connection(client)
+    if metric not in LOADERS:
+        raise ValueError(f"Unknown metric: {metric}")
+
+    if year_range:
+        filters = {"year_range": tuple(year_range)}
+        df = load_metric(get_database(), metric, filters, limit, med_name)
+    elif protocol_ids:
+        # Protocol IDs are pushed down into each loader's MongoDB query
+        df = get_data_for_protocols(metric, protocol_ids, limit, med_name)
+    else:
+        df = load_metric(get_database(), metric, limit=limit, med_name=med_name)
+
+    # Remove duplicate columns
+    df = df.loc[:, ~df.columns.duplicated()]
+    return df
+
+
+@st.cache_data(ttl=604800, show_spinner="Loading data...")
+def cached_bundle_query(
+    bundle: str,
+    limit: int = 10000,
+    protocol_ids: Optional[List[str]] = None,
+):
+    """Cached single-scan query returning all metrics of a bundle"""
+    return load_bundle(bundle, protocol_ids, limit)
+
+
+@st.cache_data(ttl=604800, show_spinner="Counting vitals...")
+def cached_vital_counts_query(vitals: Tuple[str, ...], protocol_ids: List[str]):
+    """Cached per-protocol measurement counts computed in MongoDB"""
+    return get_vital_counts_for_protocols(list(vitals), protocol_ids)
 
 
 def data_loading(
@@ -74,6 +76,11 @@ def data_loading(
     - med_name: Optional name of medication to filter by (only used with 'Medikamente' metric)
     - year_filter: Optional tuple (start_year, end_year) to filter by mission date
     """
+    # Sources without protocolId take the year range itself
+    if year_filter and metric in PROTOCOL_AGNOSTIC_METRICS:
+        year_range = tuple(year_filter)
+        return cached_db_query(metric, 500000, med_name, year_range=year_range)
+
     # If year filter is provided, get the protocol IDs for that year range
     if year_filter:
         start_year, end_year = year_filter
@@ -84,7 +91,24 @@ def data_loading(
             return pd.DataFrame()
 
         # Get data for the filtered protocol IDs
+        if metric in BUNDLED_METRICS and not med_name:
+            bundle = cached_bundle_query(BUNDLED_METRICS[metric], 500000, protocol_ids)
+            return bundle[metric]
         return cached_db_query(metric, 500000, med_name, protocol_ids)
 
+    # Metrics sharing a collection scan are loaded and cached together
+    if metric in BUNDLED_METRICS and not med_name:
+        return cached_bundle_query(BUNDLED_METRICS[metric], 500000)[metric]
+
     # If no year filter, proceed with normal data loading
     return cached_db_query(metric, 500000, med_name)
+
+
+def vital_counts_loading(vitals: List[str], protocol_ids: List[str]):
+    """
+    Load per-protocol measurement counts for several vitals
+
+    Only the counts for the candidate protocols are transferred, not the
+    vitals history. Use loaders.build_count_table for one row per protocol.
+    """
+    return cached_vital_counts_query(tuple(vitals), list(protocol_ids))
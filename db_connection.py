@@ -1,18 +1,87 @@
 import os
+import atexit
+import threading
 from pymongo import MongoClient
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Process-wide client shared by all loaders. MongoClient is thread-safe and
+# keeps its own connection pool, so one instance serves every page and rerun.
+_client = None
+_client_lock = threading.Lock()
+
+
+def _int_env(name, default):
+    """Read an integer setting from the environment with a fallback"""
+    value = os.getenv(name)
+    try:
+        return int(value) if value not in (None, "") else default
+    except ValueError:
+        return default
+
+
+def get_client_options():
+    """Build the MongoClient pool/compression/timeout options from the environment"""
+    return {
+        "maxPoolSize": _int_env("MONGO_MAX_POOL_SIZE", 20),
+        "minPoolSize": _int_env("MONGO_MIN_POOL_SIZE", 2),
+        "maxIdleTimeMS": _int_env("MONGO_MAX_IDLE_TIME_MS", 300000),
+        # Unavailable compressors are ignored by pymongo, zlib is always present
+        "compressors": os.getenv("MONGO_COMPRESSORS", "zstd,snappy,zlib"),
+        "connectTimeoutMS": _int_env("MONGO_CONNECT_TIMEOUT_MS", 10000),
+        "serverSelectionTimeoutMS": _int_env(
+            "MONGO_SERVER_SELECTION_TIMEOUT_MS", 10000
+        ),
+        "socketTimeoutMS": _int_env("MONGO_SOCKET_TIMEOUT_MS", 300000),
+        # Health check: the client's monitor pings every server at this interval
+        # and replaces the pool of a failed one
+        "heartbeatFrequencyMS": _int_env("MONGO_HEARTBEAT_FREQUENCY_MS", 10000),
+        "retryReads": True,
+        "appname": "streamlit_app",
+    }
+
+
+def get_mongodb_client():
+    """Return the shared MongoClient, creating it on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = MongoClient(os.getenv("MONGO_URL"), **get_client_options())
+    return _client
+
+
+def get_database():
+    """Return the configured database from the shared client"""
+    return get_mongodb_client()[os.getenv("DATABASE_NAME")]
+
+
+def reset_mongodb_client():
+    """
+    Close the shared client at process exit
+
+    Not meant for recovering from errors: other loader threads may still use
+    the client, and pymongo's monitor (heartbeatFrequencyMS) already detects
+    failed servers and rebuilds their pools on its own.
+    """
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
 
 def get_mongodb_connection():
-    """Establish connection to MongoDB and return the database object"""
-    client = MongoClient(os.getenv("MONGO_URL"))
-    db = client[os.getenv("DATABASE_NAME")]
-    return db, client
+    """Borrow the database object and client from the shared pool"""
+    client = get_mongodb_client()
+    return client[os.getenv("DATABASE_NAME")], client
 
 
 def close_mongodb_connection(client):
-    """Close the MongoDB connection"""
-    if client:
+    """Release a borrowed connection; the shared pool stays open for reuse"""
+    if client is not None and client is not _client:
         client.close()
+
+
+atexit.register(reset_mongodb_client)
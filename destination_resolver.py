@@ -0,0 +1,239 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+# Resolved destination strings are kept here across runs and pages
+MAPPING_FILE = os.getenv("DESTINATION_MAPPING_FILE", "data/destination_mapping.json")
+
+# Minimum Dice similarity of the trigram sets for a fuzzy match
+MIN_SIMILARITY = 0.5
+
+# Minimum Dice similarity of every query word to some word of the alias
+MIN_TOKEN_SIMILARITY = 0.5
+
+# Words shared by many hospital names; they say nothing about which hospital
+# is meant and are ignored by the fuzzy search
+GENERIC_TOKENS = frozenset(
+    {
+        "klinik",
+        "kliniken",
+        "klinikum",
+        "krankenhaus",
+        "kh",
+        "kkh",
+        "zna",
+        "notaufnahme",
+        "hospital",
+    }
+)
+
+# Part of the mapping file's fingerprint; bump when the matching rules change
+# so mappings stored by older rules are discarded
+MATCHER_VERSION = 2
+
+
+def normalize_destination(text):
+    """Lowercase and collapse punctuation/whitespace of a destination string"""
+    return " ".join(re.sub(r"[^\w]+", " ", str(text).lower()).split())
+
+
+def distinctive_tokens(text):
+    """Words of a destination string without the GENERIC_TOKENS"""
+    return [t for t in normalize_destination(text).split() if t not in GENERIC_TOKENS]
+
+
+def trigrams(text):
+    """Set of character trigrams of a normalized string, padded at word edges"""
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def _dice(a, b):
+    return 2 * len(a & b) / (len(a) + len(b)) if a or b else 0.0
+
+
+class TrigramIndex:
+    """
+    Inverted trigram index over the distinctive words of the hospital aliases
+
+    A query only scores the aliases sharing at least one trigram with it, and
+    aliases whose size makes the threshold unreachable are skipped. A match
+    also needs every distinctive query word to resemble a word of the alias,
+    and only one hospital may qualify, so a shared town or generic name alone
+    never decides the hospital.
+    """
+
+    def __init__(self, aliases):
+        # aliases: list of (alias, hospital row)
+        self.hospitals = []
+        self.sizes = []
+        self.token_grams = []
+        self.postings = {}
+        for alias, hospital in aliases:
+            tokens = distinctive_tokens(alias)
+            if not tokens:
+                continue
+            grams = trigrams(" ".join(tokens))
+            alias_id = len(self.hospitals)
+            self.hospitals.append(hospital)
+            self.sizes.append(len(grams))
+            self.token_grams.append([trigrams(t) for t in tokens])
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(alias_id)
+
+    def _covers(self, query_tokens, alias_id, min_token_similarity):
+        """Whether every query word resembles some word of the alias"""
+        return all(
+            max(_dice(query, word) for word in self.token_grams[alias_id])
+            >= min_token_similarity
+            for query in query_tokens
+        )
+
+    def search(
+        self,
+        text,
+        min_similarity=MIN_SIMILARITY,
+        min_token_similarity=MIN_TOKEN_SIMILARITY,
+    ):
+        """Return (hospital row, similarity) of the best alias, or (-1, 0.0)"""
+        tokens = distinctive_tokens(text)
+        if not tokens:
+            return -1, 0.0
+        grams = trigrams(" ".join(tokens))
+        size = len(grams)
+        query_tokens = [trigrams(t) for t in tokens]
+
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.postings.get(gram, ()))
+
+        candidates = []
+        for alias_id, count in shared.items():
+            alias_size = self.sizes[alias_id]
+            # Dice can reach at most 2 * min / (sum) for these set sizes
+            if 2 * min(size, alias_size) / (size + alias_size) < min_similarity:
+                continue
+            score = 2 * count / (size + alias_size)
+            if score >= min_similarity:
+                candidates.append((score, alias_id))
+
+        # Best score first; a query covered by aliases of several hospitals
+        # (e.g. only a town with two hospitals) stays unresolved
+        matches = [
+            (score, alias_id)
+            for score, alias_id in sorted(candidates, key=lambda c: (-c[0], c[1]))
+            if self._covers(query_tokens, alias_id, min_token_similarity)
+        ]
+        if len({self.hospitals[alias_id] for _, alias_id in matches}) != 1:
+            return -1, 0.0
+        score, alias_id = matches[0]
+        return self.hospitals[alias_id], score
+
+
+class DestinationResolver:
+    """
+    Resolve free-text targetDestination values to hospitals of a registry
+
+    Every distinct string is resolved once: first by the registry's exact alias
+    rules, then by a trigram similarity search to catch typos. Resolved strings
+    are kept as hospital rows in a dict and persisted as JSON, so later runs
+    look destinations up in O(1); unresolved ones are only remembered for the
+    process, so a low-confidence miss is never stored. The stored mapping is
+    discarded when the hospital file or the matching rules change.
+    """
+
+    def __init__(self, registry, path=MAPPING_FILE, min_similarity=MIN_SIMILARITY):
+        self.registry = registry
+        self.path = path
+        self.min_similarity = min_similarity
+        self.index = TrigramIndex(
+            [
+                (alias, hospital)
+                for hospital, aliases in enumerate(registry.aliases)
+                for alias in aliases
+            ]
+        )
+        self._fingerprint = hashlib.sha1(
+            "\n".join(
+                [f"v{MATCHER_VERSION} {min_similarity}"]
+                + list(map(str, registry.table["Name"]))
+            ).encode("utf-8")
+        ).hexdigest()
+        self._lock = threading.Lock()
+        self.mapping = self._load()
+        self.unresolved = set()
+
+    def _load(self):
+        """Read the persisted mapping if it belongs to the current hospital file"""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if stored.get("fingerprint") != self._fingerprint:
+            return {}
+        n_hospitals = len(self.registry.names)
+        return {
+            destination: hospital
+            for destination, hospital in stored.get("destinations", {}).items()
+            if isinstance(hospital, int) and 0 <= hospital < n_hospitals
+        }
+
+    def save(self):
+        """Write the mapping atomically (temporary file, then rename)"""
+        payload = {"fingerprint": self._fingerprint, "destinations": self.mapping}
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Could not persist destination mapping: {e}")
+
+    def _resolve_new(self, destinations):
+        """Hospital row per destination not yet looked up (-1 = unknown)"""
+        exact = self.registry.match_aliases(destinations)
+        resolved = {}
+        for destination, hospital in zip(destinations, exact):
+            if not distinctive_tokens(destination):
+                # Only generic words like "Klinik" or "ZNA": no hospital is named
+                hospital = -1
+            elif hospital < 0:
+                hospital, _ = self.index.search(destination, self.min_similarity)
+            resolved[destination] = int(hospital)
+        return resolved
+
+    def hospital_index(self, destinations):
+        """Hospital row per destination string (-1 = unknown)"""
+        destinations = [str(d) for d in destinations]
+        with self._lock:
+            new = [
+                d
+                for d in dict.fromkeys(destinations)
+                if d not in self.mapping and d not in self.unresolved
+            ]
+            if new:
+                resolved = self._resolve_new(new)
+                found = {d: h for d, h in resolved.items() if h >= 0}
+                self.unresolved.update(d for d, h in resolved.items() if h < 0)
+                if found:
+                    self.mapping.update(found)
+                    self.save()
+            rows = [self.mapping.get(d, -1) for d in destinations]
+        return np.array(rows, dtype=np.int64)
+
+    def resolve(self, targets):
+        """Map free-text destinations to the hospital display name (NaN if unknown)"""
+        targets = pd.Series(targets)
+        codes, uniques = pd.factorize(targets)
+        index = self.hospital_index(uniques)
+        names = np.array(self.registry.names + [None], dtype=object)
+        return pd.Series(
+            names[np.where(codes < 0, -1, index[codes])], index=targets.index
+        )
@@ -0,0 +1,75 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Coordinates of the ETÜ export are UTM zone 32N (EPSG:32632)
+SOURCE_CRS = "EPSG:32632"
+TARGET_CRS = "EPSG:4326"
+
+# Longitude/latitude box of Germany; points inside are taken as WGS84 already
+WGS84_LON_RANGE = (5, 16)
+WGS84_LAT_RANGE = (47, 55)
+
+
+@lru_cache(maxsize=None)
+def get_transformer(source_crs=SOURCE_CRS, target_crs=TARGET_CRS):
+    """Process-wide pyproj transformer (x/y order) between two CRS"""
+    import pyproj
+
+    return pyproj.Transformer.from_crs(source_crs, target_crs, always_xy=True)
+
+
+def to_wgs84(x, y, source_crs=SOURCE_CRS):
+    """
+    Project coordinates to WGS84
+
+    Parameters:
+    - x, y: Easting/northing in source_crs; points that already lie in the
+      WGS84 box of Germany are kept as longitude/latitude
+    - source_crs: CRS of the input coordinates
+
+    Returns (latitude, longitude) float arrays, NaN where x or y is missing or
+    not numeric, and for projected points if pyproj is not installed.
+    """
+    x = pd.to_numeric(pd.Series(x), errors="coerce").to_numpy(dtype=float)
+    y = pd.to_numeric(pd.Series(y), errors="coerce").to_numpy(dtype=float)
+    latitude = np.full(len(x), np.nan)
+    longitude = np.full(len(x), np.nan)
+
+    valid = ~(np.isnan(x) | np.isnan(y))
+    geographic = (
+        valid
+        & (x >= WGS84_LON_RANGE[0])
+        & (x <= WGS84_LON_RANGE[1])
+        & (y >= WGS84_LAT_RANGE[0])
+        & (y <= WGS84_LAT_RANGE[1])
+    )
+    longitude[geographic], latitude[geographic] = x[geographic], y[geographic]
+
+    projected = valid & ~geographic
+    if projected.any():
+        try:
+            transformer = get_transformer(source_crs)
+        except ImportError:
+            print("WARNING: pyproj not available - coordinates are not projected")
+            return latitude, longitude
+        lon, lat = transformer.transform(x[projected], y[projected])
+        longitude[projected], latitude[projected] = lon, lat
+    return latitude, longitude
+
+
+def add_wgs84_coordinates(df, x_col="EO_X_KOORD", y_col="EO_Y_KOORD"):
+    """
+    Add latitude and longitude columns projected from the x/y columns
+
+    Frames without the coordinate columns are returned unchanged.
+    """
+    if df.empty or x_col not in df.columns or y_col not in df.columns:
+        return df
+
+    latitude, longitude = to_wgs84(df[x_col], df[y_col])
+    df = df.copy()
+    df["latitude"] = latitude
+    df["longitude"] = longitude
+    return df
@@ -0,0 +1,131 @@
+import datetime
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Public holidays in Schleswig-Holstein with a fixed date: (month, day, name,
+# first year it applies)
+FIXED_HOLIDAYS = [
+    (1, 1, "Neujahrstag", None),
+    (5, 1, "Tag der Arbeit", None),
+    (10, 3, "Tag der Deutschen Einheit", 1990),
+    # Statutory in SH since 2018, nationwide once in 2017
+    (10, 31, "Reformationstag", 2017),
+    (12, 25, "1. Weihnachtstag", None),
+    (12, 26, "2. Weihnachtstag", None),
+]
+
+# Movable holidays as day offsets from Easter Sunday
+EASTER_HOLIDAYS = [
+    (-2, "Karfreitag"),
+    (1, "Ostermontag"),
+    (39, "Christi Himmelfahrt"),
+    (50, "Pfingstmontag"),
+]
+
+# Time zone used to assign timezone-aware timestamps to a calendar day
+HOLIDAY_TIMEZONE = "Europe/Berlin"
+
+
+def easter_sunday(year):
+    """Date of Easter Sunday in the Gregorian calendar (anonymous algorithm)"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7  # noqa: E741
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return datetime.date(year, month, day + 1)
+
+
+@lru_cache(maxsize=32)
+def _holiday_days(start_year, end_year):
+    """Sorted datetime64[D] days and names of all holidays in the year range"""
+    records = []
+    for year in range(start_year, end_year + 1):
+        for month, day, name, since in FIXED_HOLIDAYS:
+            if since is None or year >= since:
+                records.append((datetime.date(year, month, day), name))
+        easter = easter_sunday(year)
+        for offset, name in EASTER_HOLIDAYS:
+            records.append((easter + datetime.timedelta(days=offset), name))
+    records.sort()
+    days = np.array([day for day, _ in records], dtype="datetime64[D]")
+    names = np.array([name for _, name in records], dtype=object)
+    # Shared between callers, so keep them read-only
+    days.flags.writeable = False
+    names.flags.writeable = False
+    return days, names
+
+
+def holiday_calendar(start_year, end_year=None):
+    """
+    Holidays of Schleswig-Holstein computed for a range of years
+
+    Returns a DataFrame with the columns date (YYYY-MM-DD) and name, in the
+    format of the former holiday API.
+    """
+    days, names = _holiday_days(int(start_year), int(end_year or start_year))
+    return pd.DataFrame({"date": days.astype(str), "name": names})
+
+
+def _calendar_days(dates):
+    """Calendar days of dates as a datetime64[D] array (NaT for missing)"""
+    dates = pd.DatetimeIndex(pd.to_datetime(dates))
+    if dates.tz is not None:
+        dates = dates.tz_convert(HOLIDAY_TIMEZONE).tz_localize(None)
+    return dates.to_numpy().astype("datetime64[D]")
+
+
+def _match_holidays(dates):
+    """
+    Positions of the days of dates that are holidays
+
+    Returns (rows, names): the positions in dates falling on a holiday and the
+    names of those holidays.
+    """
+    days = _calendar_days(dates)
+    rows = np.flatnonzero(~np.isnat(days))
+    if not len(rows):
+        return rows, np.empty(0, dtype=object)
+    years = days[rows].astype("datetime64[Y]").astype(int) + 1970
+    holidays, names = _holiday_days(int(years.min()), int(years.max()))
+    position = np.searchsorted(holidays, days[rows]).clip(max=len(holidays) - 1)
+    found = holidays[position] == days[rows]
+    return rows[found], names[position[found]]
+
+
+def _like_input(dates, values):
+    if isinstance(dates, pd.Series):
+        return pd.Series(values, index=dates.index, name=dates.name)
+    return values
+
+
+def is_holiday(dates):
+    """
+    Whether each date falls on a holiday in Schleswig-Holstein
+
+    Parameters:
+    - dates: Dates or timestamps (Series, Index, array or list); the time of
+      day is ignored and missing values are no holiday
+
+    Returns a boolean Series for Series input (same index), otherwise a
+    boolean NumPy array.
+    """
+    rows, _ = _match_holidays(dates)
+    result = np.zeros(len(dates), dtype=bool)
+    result[rows] = True
+    return _like_input(dates, result)
+
+
+def holiday_names(dates):
+    """Name of the holiday on each date, missing on regular days"""
+    rows, names = _match_holidays(dates)
+    result = np.full(len(dates), None, dtype=object)
+    result[rows] = names
+    return _like_input(dates, result)
@@ -0,0 +1,200 @@
+import ast
+import re
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from destination_resolver import MAPPING_FILE, DestinationResolver
+
+HOSPITAL_FILE = "data/krankenhausDigagnosen.csv"
+
+# Capability columns of the hospital file (= tracer diagnosis categories)
+CAPABILITIES = [
+    "TIA / Schlaganfall",
+    "ACS / STEMI /NSTEMI",
+    "Reanimation",
+    "Polytrauma",
+]
+
+# Diagnosis keyword -> capability category. Order is the match priority: the
+# first keyword found in leadingDiagnosis decides the category.
+DIAGNOSIS_KEYWORDS = {
+    "schlaganfall": "TIA / Schlaganfall",
+    "tia": "TIA / Schlaganfall",
+    "stemi": "ACS / STEMI /NSTEMI",
+    "nstemi": "ACS / STEMI /NSTEMI",
+    "acs": "ACS / STEMI /NSTEMI",
+    "herzinfarkt": "ACS / STEMI /NSTEMI",
+    "reanimation": "Reanimation",
+    "herz-kreislauf-stillstand": "Reanimation",
+    "polytrauma": "Polytrauma",
+    "schwerverletzt": "Polytrauma",
+}
+
+
+def _keyword_runs(keywords):
+    """
+    Compile the keyword map into one regex per run of consecutive keywords with
+    the same category. Searching the runs in order gives the same result as
+    checking every keyword in order, with far fewer passes.
+    """
+    runs = []
+    for keyword, category in keywords.items():
+        if runs and runs[-1][1] == category:
+            runs[-1][0].append(keyword)
+        else:
+            runs.append(([keyword], category))
+    return [
+        (re.compile("|".join(re.escape(k.lower()) for k in words)), category)
+        for words, category in runs
+    ]
+
+
+class HospitalRegistry:
+    """
+    Hospital aliases and capabilities with precompiled matchers
+
+    Build it through get_hospital_registry() so the file is parsed and the
+    patterns are compiled once per process instead of on every rerun.
+    """
+
+    def __init__(self, table, diagnosis_keywords=None):
+        self.table = table
+        # Display name = first alias with its original casing
+        self.names = [ast.literal_eval(name)[0] for name in table["Name"]]
+        self.aliases = []
+        self.capabilities = np.zeros((len(table), len(CAPABILITIES)), dtype=bool)
+
+        # target in alias: every substring of an alias -> first hospital
+        self._alias_substrings = {}
+        alias_patterns = []
+        for i, (_, row) in enumerate(table.iterrows()):
+            aliases = [a.strip().lower() for a in ast.literal_eval(row["Name"])]
+            self.aliases.append(aliases)
+            self.capabilities[i] = [bool(row[c]) for c in CAPABILITIES]
+            for alias in aliases:
+                for start in range(len(alias)):
+                    for end in range(start + 1, len(alias) + 1):
+                        self._alias_substrings.setdefault(alias[start:end], i)
+            # alias in target: one alternation per hospital
+            alias_patterns.append(re.compile("|".join(map(re.escape, aliases))))
+        self._alias_patterns = alias_patterns
+
+        self._diagnosis_runs = _keyword_runs(diagnosis_keywords or DIAGNOSIS_KEYWORDS)
+        self._categories = {c: j for j, c in enumerate(CAPABILITIES)}
+
+    def match_aliases(self, targets):
+        """
+        Hospital row per distinct target (-1 = unknown) by the exact alias rules:
+        the first hospital with an alias contained in the target, or containing it
+        """
+        targets = pd.Series(targets, dtype="object").str.strip().str.lower()
+        result = np.full(len(targets), -1, dtype=np.int64)
+        for i, pattern in enumerate(self._alias_patterns):
+            open_ = result < 0
+            if not open_.any():
+                break
+            hit = targets[open_].str.contains(pattern, na=False).to_numpy()
+            result[np.flatnonzero(open_)[hit]] = i
+
+        substring_hit = (
+            targets.map(self._alias_substrings).fillna(-1).astype(np.int64).to_numpy()
+        )
+        both = (result >= 0) & (substring_hit >= 0)
+        result[both] = np.minimum(result[both], substring_hit[both])
+        result[result < 0] = substring_hit[result < 0]
+        # An empty destination is no destination
+        result[(targets == "").to_numpy()] = -1
+        return result
+
+    def _category_index(self, diagnoses):
+        """Capability column per distinct diagnosis (-1 = no tracer diagnosis)"""
+        diagnoses = pd.Series(diagnoses, dtype="object").str.lower()
+        result = np.full(len(diagnoses), -1, dtype=np.int64)
+        for pattern, category in self._diagnosis_runs:
+            open_ = result < 0
+            if not open_.any():
+                break
+            hit = diagnoses[open_].str.contains(pattern, na=False).to_numpy()
+            result[np.flatnonzero(open_)[hit]] = self._categories[category]
+        return result
+
+    def eligibility(self, targets, diagnoses, resolver=None):
+        """
+        Whether each transport went to a hospital capable of its diagnosis
+
+        Distinct destinations and diagnoses are resolved once and broadcast to
+        all rows. Missing or unknown values give False. With a
+        DestinationResolver, destinations are looked up in its persisted
+        mapping (including fuzzy matches) instead of the exact alias rules.
+        """
+        target_codes, target_uniques = pd.factorize(pd.Series(targets))
+        diagnosis_codes, diagnosis_uniques = pd.factorize(pd.Series(diagnoses))
+
+        if resolver is not None:
+            hospital = resolver.hospital_index(target_uniques)
+        else:
+            hospital = self.match_aliases(target_uniques)
+        category = self._category_index(diagnosis_uniques)
+
+        row_hospital = np.where(target_codes < 0, -1, hospital[target_codes])
+        row_category = np.where(diagnosis_codes < 0, -1, category[diagnosis_codes])
+
+        eligible = np.zeros(len(row_hospital), dtype=bool)
+        known = (row_hospital >= 0) & (row_category >= 0)
+        eligible[known] = self.capabilities[row_hospital[known], row_category[known]]
+        return eligible
+
+
+@st.cache_data(ttl=604800, show_spinner=False)
+def load_hospital_table(path=HOSPITAL_FILE):
+    """Read the hospital alias/capability file"""
+    return pd.read_csv(path, sep=";")
+
+
+@st.cache_resource(show_spinner=False)
+def get_hospital_registry(path=HOSPITAL_FILE, extra_keywords=()):
+    """
+    Shared HospitalRegistry of the 5.x pages
+
+    Parameters:
+    - path: Hospital alias/capability file
+    - extra_keywords: Tuple of (keyword, category) pairs, e.g. page-specific
+      synonyms; each is checked right after the shared keywords of its
+      category, so the category priority of DIAGNOSIS_KEYWORDS is kept
+    """
+    keywords = list(DIAGNOSIS_KEYWORDS.items())
+    for keyword, category in extra_keywords:
+        keyword = keyword.lower()
+        if any(known == keyword for known, _ in keywords):
+            continue
+        positions = [i for i, (_, known) in enumerate(keywords) if known == category]
+        keywords.insert(
+            positions[-1] + 1 if positions else len(keywords), (keyword, category)
+        )
+    keywords = dict(keywords)
+    return HospitalRegistry(load_hospital_table(path), keywords)
+
+
+@st.cache_resource(show_spinner=False)
+def get_destination_resolver(path=HOSPITAL_FILE, mapping_path=MAPPING_FILE):
+    """Shared DestinationResolver backed by the persisted destination mapping"""
+    return DestinationResolver(get_hospital_registry(path), mapping_path)
+
+
+def check_hospital_eligibility(df_index, extra_keywords=()):
+    """Add the hospital_eligible column to the index frame"""
+    registry = get_hospital_registry(extra_keywords=tuple(extra_keywords))
+    resolver = get_destination_resolver()
+    df_index = df_index.copy()
+    if df_index.empty:
+        df_index["hospital_eligible"] = pd.Series(dtype=bool)
+        return df_index
+
+    df_index["hospital_eligible"] = registry.eligibility(
+        df_index.get("targetDestination", pd.Series(None, index=df_index.index)),
+        df_index.get("leadingDiagnosis", pd.Series(None, index=df_index.index)),
+        resolver=resolver,
+    )
+    return df_index
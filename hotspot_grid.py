@@ -0,0 +1,312 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from occupancy_engine import LOCAL_TIMEZONE
+
+GRID_SHAPES = ("square", "hex")
+
+# Grid coordinates are meters of an equirectangular projection around the
+# centre of Schleswig-Holstein; cells keep their position across filters
+GRID_ORIGIN = (54.5, 9.5)
+METERS_PER_DEGREE = 111320.0
+
+# Packs the two integer cell indices into one sortable key
+_KEY_STRIDE = np.int64(1 << 32)
+
+UNKNOWN_TYPE = "Unbekannt"
+
+
+def _to_meters(latitude, longitude):
+    lat0, lon0 = GRID_ORIGIN
+    x = (longitude - lon0) * METERS_PER_DEGREE * np.cos(np.radians(lat0))
+    y = (latitude - lat0) * METERS_PER_DEGREE
+    return x, y
+
+
+def _to_degrees(x, y):
+    lat0, lon0 = GRID_ORIGIN
+    latitude = lat0 + y / METERS_PER_DEGREE
+    longitude = lon0 + x / (METERS_PER_DEGREE * np.cos(np.radians(lat0)))
+    return latitude, longitude
+
+
+def square_cells(x, y, cell_size):
+    """Column and row of the square cell containing each point"""
+    return (
+        np.floor(x / cell_size).astype("int64"),
+        np.floor(y / cell_size).astype("int64"),
+    )
+
+
+def square_centers(i, j, cell_size):
+    return (i + 0.5) * cell_size, (j + 0.5) * cell_size
+
+
+def hex_cells(x, y, cell_size):
+    """
+    Axial coordinates (q, r) of the pointy-top hexagon containing each point
+
+    cell_size is the distance between opposite sides of a hexagon.
+    """
+    radius = cell_size / np.sqrt(3)
+    q = (np.sqrt(3) / 3 * x - y / 3) / radius
+    r = (2 / 3 * y) / radius
+    s = -q - r
+
+    # Round in cube coordinates and fix the component with the largest error
+    rq, rr, rs = np.rint(q), np.rint(r), np.rint(s)
+    dq, dr, ds = np.abs(rq - q), np.abs(rr - r), np.abs(rs - s)
+    fix_q = (dq > dr) & (dq > ds)
+    fix_r = ~fix_q & (dr > ds)
+    rq = np.where(fix_q, -rr - rs, rq)
+    rr = np.where(fix_r, -rq - rs, rr)
+    return rq.astype("int64"), rr.astype("int64")
+
+
+def hex_centers(q, r, cell_size):
+    radius = cell_size / np.sqrt(3)
+    return radius * np.sqrt(3) * (q + r / 2), radius * 1.5 * r
+
+
+_CELLS = {"square": square_cells, "hex": hex_cells}
+_CENTERS = {"square": square_centers, "hex": hex_centers}
+
+
+def _window_starts(times, freq):
+    """Start timestamp of the time window (pandas period freq) of each time"""
+    times = pd.DatetimeIndex(pd.to_datetime(times, errors="coerce"))
+    if times.tz is not None:
+        times = times.tz_convert(LOCAL_TIMEZONE).tz_localize(None)
+    starts = np.full(len(times), np.datetime64("NaT"), dtype="datetime64[ns]")
+    valid = ~times.isna()
+    starts[valid] = times[valid].to_period(freq).start_time.as_unit("ns")
+    return starts
+
+
+class HotspotGrid:
+    """
+    Mission locations binned into a square or hexagonal grid
+
+    Attributes:
+    - cell_size, shape: Grid parameters (cell size in meters)
+    - cell_i, cell_j: (cells,) integer grid indices of the non-empty cells
+      (column/row for squares, axial q/r for hexagons)
+    - latitude, longitude: (cells,) cell centres
+    - windows: Start timestamps of the time windows, None without freq
+    - type_names: Mission types, None without types
+    - row_cell: Cell position of each input row, -1 without coordinates (or
+      without time when windows are used)
+    """
+
+    def __init__(
+        self,
+        latitude,
+        longitude,
+        cell_size=1000,
+        shape="square",
+        times=None,
+        freq=None,
+        types=None,
+    ):
+        """
+        Parameters:
+        - latitude, longitude: WGS84 coordinates per mission
+        - cell_size: Edge length of squares, distance between opposite sides
+          of hexagons, in meters
+        - shape: "square" or "hex"
+        - times, freq: Mission times and a pandas period frequency ("W", "M",
+          ...) to count per time window
+        - types: Mission type per mission (e.g. SZENARIO_BEGINN) for the mix
+        """
+        if shape not in GRID_SHAPES:
+            raise ValueError(f"Unknown grid shape: {shape}")
+        self.cell_size = float(cell_size)
+        self.shape = shape
+
+        latitude = pd.to_numeric(pd.Series(latitude), errors="coerce").to_numpy(
+            dtype=float
+        )
+        longitude = pd.to_numeric(pd.Series(longitude), errors="coerce").to_numpy(
+            dtype=float
+        )
+        valid = ~(np.isnan(latitude) | np.isnan(longitude))
+
+        if freq is not None:
+            starts = _window_starts(times, freq)
+            valid &= ~np.isnat(starts)
+            windows, window_codes = np.unique(starts[valid], return_inverse=True)
+            self.windows = pd.DatetimeIndex(windows)
+        else:
+            window_codes = np.zeros(int(valid.sum()), dtype="int64")
+            self.windows = None
+        self._n_windows = len(self.windows) if self.windows is not None else 1
+
+        if types is not None:
+            types = pd.Series(types, dtype="object").fillna(UNKNOWN_TYPE)
+            type_codes, type_names = pd.factorize(types.to_numpy()[valid], sort=True)
+            self.type_names = list(type_names)
+        else:
+            type_codes = np.zeros(int(valid.sum()), dtype="int64")
+            self.type_names = None
+        self._n_types = len(self.type_names) if self.type_names is not None else 1
+
+        x, y = _to_meters(latitude[valid], longitude[valid])
+        i, j = _CELLS[shape](x, y, self.cell_size)
+        _, first, cell_codes = np.unique(
+            i * _KEY_STRIDE + j, return_index=True, return_inverse=True
+        )
+        self.cell_i, self.cell_j = i[first], j[first]
+        self.latitude, self.longitude = _to_degrees(
+            *_CENTERS[shape](self.cell_i, self.cell_j, self.cell_size)
+        )
+        self.row_cell = np.full(len(latitude), -1, dtype="int64")
+        self.row_cell[valid] = cell_codes
+
+        # Sparse tally: one entry per non-empty (cell, window, type)
+        combined = (
+            cell_codes * self._n_windows + window_codes
+        ) * self._n_types + type_codes
+        combined, counts = np.unique(combined, return_counts=True)
+        self._cell, rest = np.divmod(combined, self._n_windows * self._n_types)
+        self._window, self._type = np.divmod(rest, self._n_types)
+        self._count = counts
+
+    def _selected(self, window):
+        if window is None:
+            return np.ones(len(self._count), dtype=bool)
+        if self.windows is None:
+            raise ValueError("Grid has no time windows")
+        position = self.windows.get_indexer([pd.Timestamp(window)])[0]
+        return self._window == position
+
+    def cells(self, window=None, by_window=False):
+        """
+        Sparse table of the non-empty cells
+
+        Parameters:
+        - window: Start timestamp of one time window, None for all missions
+        - by_window: One row per cell and time window instead of per cell
+
+        Columns: cell, cell_i, cell_j, latitude, longitude, (window), count,
+        share of all counted missions (in the window) and, with types, the
+        dominant_type with its dominant_share. Sorted by count, descending.
+        """
+        selected = self._selected(window)
+        by_window = by_window and self.windows is not None
+        n_groups = self._n_windows if by_window else 1
+        group = self._window[selected] if by_window else 0
+        pair = self._cell[selected] * n_groups + group
+        counts = self._count[selected]
+
+        pairs, pair_codes = np.unique(pair, return_inverse=True)
+        totals = np.bincount(pair_codes, weights=counts).astype("int64")
+        cells, groups = np.divmod(pairs, n_groups)
+        group_totals = np.bincount(groups, weights=totals, minlength=n_groups)
+
+        table = pd.DataFrame(
+            {
+                "cell": cells,
+                "cell_i": self.cell_i[cells],
+                "cell_j": self.cell_j[cells],
+                "latitude": self.latitude[cells],
+                "longitude": self.longitude[cells],
+            }
+        )
+        if by_window:
+            table["window"] = self.windows[groups]
+        table["count"] = totals
+        table["share"] = totals / group_totals[groups]
+
+        if self.type_names is not None:
+            # Counts per row and type (summed over the windows a row spans),
+            # then the largest first within each row
+            row_types, codes = np.unique(
+                pair_codes * self._n_types + self._type[selected],
+                return_inverse=True,
+            )
+            type_counts = np.bincount(codes, weights=counts)
+            rows, type_positions = np.divmod(row_types, self._n_types)
+            order = np.lexsort((-type_counts, rows))
+            _, first = np.unique(rows[order], return_index=True)
+            dominant = order[first]
+            types = np.asarray(self.type_names, dtype=object)
+            table["dominant_type"] = types[type_positions[dominant]]
+            table["dominant_share"] = type_counts[dominant] / totals
+
+        sort_by = ["window", "count"] if by_window else ["count"]
+        return table.sort_values(
+            sort_by, ascending=[True] * (len(sort_by) - 1) + [False], kind="stable"
+        ).reset_index(drop=True)
+
+    def top(self, n=10, window=None):
+        """The n cells with the most missions (in the window)"""
+        return self.cells(window).head(n)
+
+    def mix(self, window=None, by_window=False):
+        """
+        Mission-type mix of the non-empty cells as a sparse long table
+
+        Columns: cell, (window), type, count and share of the cell's missions.
+        """
+        if self.type_names is None:
+            raise ValueError("Grid has no mission types")
+        selected = self._selected(window)
+        by_window = by_window and self.windows is not None
+        table = pd.DataFrame({"cell": self._cell[selected]})
+        if by_window:
+            table["window"] = self.windows[self._window[selected]]
+        table["type"] = np.asarray(self.type_names, dtype=object)[self._type[selected]]
+        table["count"] = self._count[selected]
+
+        # The tally holds each (cell, window, type) once; only the totals over
+        # all windows need summing
+        if by_window:
+            keys = ["cell", "window"]
+        else:
+            table = table.groupby(["cell", "type"], as_index=False)["count"].sum()
+            keys = ["cell"]
+        table["share"] = table["count"] / table.groupby(keys)["count"].transform("sum")
+        return table.sort_values(
+            keys + ["count"], ascending=[True] * len(keys) + [False], kind="stable"
+        ).reset_index(drop=True)
+
+    def corners(self):
+        """(cells, corners, 2) latitude/longitude of the cell outlines"""
+        x, y = _CENTERS[self.shape](self.cell_i, self.cell_j, self.cell_size)
+        if self.shape == "square":
+            half = self.cell_size / 2
+            dx = np.array([-half, half, half, -half])
+            dy = np.array([-half, -half, half, half])
+        else:
+            radius = self.cell_size / np.sqrt(3)
+            angles = np.radians(np.arange(6) * 60 - 30)
+            dx, dy = radius * np.cos(angles), radius * np.sin(angles)
+        latitude, longitude = _to_degrees(x[:, None] + dx, y[:, None] + dy)
+        return np.stack([latitude, longitude], axis=-1)
+
+
+@st.cache_data(ttl=604800, show_spinner=False)
+def cached_hotspot_grid(
+    points_df,
+    cell_size=1000,
+    shape="square",
+    time_col=None,
+    freq=None,
+    type_col=None,
+):
+    """
+    Cached HotspotGrid of a mission frame with latitude/longitude columns
+
+    Pass only the coordinate, time and type columns of the filtered frame:
+    they are what the filter selection determines and keep the cache key small.
+    """
+    return HotspotGrid(
+        points_df["latitude"],
+        points_df["longitude"],
+        cell_size=cell_size,
+        shape=shape,
+        times=points_df[time_col] if time_col else None,
+        freq=freq,
+        types=points_df[type_col] if type_col else None,
+    )
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+# Process time intervals of the tracer diagnosis pages (1.1.x):
+# interval column -> (start status, end status)
+TRACER_INTERVALS = {
+    "ReaktionsIntervall": ("StatusAlarm", "Status4"),
+    "VersorgungsIntervall": ("Status4", "Status7"),
+    "TransportIntervall": ("Status7", "Status8"),
+    "PraehospitalIntervall": ("StatusAlarm", "Status8"),
+}
+
+
+def _as_datetime(df, column):
+    """Return a status column as datetime64, NaT where missing or unparsable"""
+    if column not in df.columns:
+        return pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns]")
+    values = df[column]
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    return pd.to_datetime(values, errors="coerce")
+
+
+def compute_intervals(df, intervals=None, max_minutes=None):
+    """
+    Compute status intervals in minutes with vectorized timedelta arithmetic
+
+    Parameters:
+    - df: DataFrame with the status datetime columns (e.g. from get_details)
+    - intervals: Dict interval name -> (start column, end column),
+      defaults to TRACER_INTERVALS
+    - max_minutes: Optional upper bound; longer intervals are masked as outliers
+
+    Returns a float64 frame with one column per interval (same index as df).
+    Missing status times give NaN.
+    """
+    intervals = intervals or TRACER_INTERVALS
+
+    # Each status column is converted once, even if used by several intervals
+    columns = {col for start_end in intervals.values() for col in start_end}
+    statuses = {col: _as_datetime(df, col) for col in columns}
+
+    result = pd.DataFrame(index=df.index)
+    for name, (start_col, end_col) in intervals.items():
+        minutes = (statuses[end_col] - statuses[start_col]).dt.total_seconds() / 60
+        minutes = minutes.astype("float64")
+        if max_minutes is not None:
+            minutes = minutes.mask(minutes > max_minutes)
+        result[name] = minutes
+    return result
+
+
+def add_intervals(df, intervals=None, negative="drop", max_minutes=None):
+    """
+    Add interval columns to a frame and handle negative intervals
+
+    Parameters:
+    - df: DataFrame with the status datetime columns
+    - intervals: Dict interval name -> (start column, end column),
+      defaults to TRACER_INTERVALS
+    - negative: "drop" removes rows with any negative interval,
+      "mask" sets only the negative values to NaN
+    - max_minutes: Optional upper bound; longer intervals are masked as outliers
+    """
+    interval_df = compute_intervals(df, intervals, max_minutes=max_minutes)
+    is_negative = interval_df < 0
+
+    if negative == "mask":
+        interval_df = interval_df.mask(is_negative)
+        keep = np.ones(len(df), dtype=bool)
+    elif negative == "drop":
+        keep = ~is_negative.any(axis=1).to_numpy()
+    else:
+        raise ValueError(f"Unknown negative handling: {negative}")
+
+    df = df.copy()
+    df[interval_df.columns] = interval_df
+    return df[keep]
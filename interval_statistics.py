@@ -0,0 +1,66 @@
+import pandas as pd
+import streamlit as st
+
+# Percentile set of the interval indicators: display label -> quantile
+PERCENTILES = {
+    "10%": 0.10,
+    "25%": 0.25,
+    "50% (Median)": 0.50,
+    "75%": 0.75,
+    "90%": 0.90,
+}
+
+# Display names of the tracer diagnosis intervals (see interval_engine)
+INTERVAL_LABELS = {
+    "PraehospitalIntervall": "Prähospitalintervall",
+    "ReaktionsIntervall": "Reaktionsintervall",
+    "VersorgungsIntervall": "Versorgungsintervall",
+    "TransportIntervall": "Transportintervall",
+}
+
+
+def interval_statistics(df, columns, by=None, percentiles=None):
+    """
+    Compute the percentile set of many interval columns in one quantile pass
+
+    Parameters:
+    - df: DataFrame with the interval columns (minutes)
+    - columns: Interval columns to summarize
+    - by: Optional grouping key(s), e.g. "Month", "Jahr", "missionType"
+    - percentiles: Dict label -> quantile, defaults to PERCENTILES
+
+    Without grouping, returns one row per percentile label and one column per
+    interval. With grouping, the index is (group keys..., percentile label).
+    Percentiles use linear interpolation like np.percentile; NaN is ignored.
+    """
+    percentiles = percentiles or PERCENTILES
+    labels = list(percentiles.keys())
+    quantiles = list(percentiles.values())
+    columns = list(columns)
+
+    values = df[columns].apply(pd.to_numeric, errors="coerce").astype("float64")
+
+    if by is None:
+        stats = values.quantile(quantiles)
+        stats.index = labels
+        return stats
+
+    keys = [by] if isinstance(by, str) else list(by)
+    grouped = pd.concat([df[keys], values], axis=1).groupby(keys, observed=True)
+    stats = grouped[columns].quantile(quantiles)
+    # The last index level holds the quantiles; replace them with their labels
+    stats.index = stats.index.set_levels(
+        [labels[quantiles.index(q)] for q in stats.index.levels[-1]], level=-1
+    )
+    return stats
+
+
+@st.cache_data(ttl=604800, show_spinner=False)
+def cached_interval_statistics(interval_df, columns, by=None):
+    """
+    Cached interval_statistics for reruns with an unchanged filter selection
+
+    Pass only the interval (and grouping) columns of the filtered frame: they
+    are what the filter selection determines and keep the cache key small.
+    """
+    return interval_statistics(interval_df, columns, by=by)
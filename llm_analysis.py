@@ -0,0 +1,485 @@
+import hashlib
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+load_dotenv()
+
+# OpenAI-compatible chat completions endpoint of the local LLM
+LLM_BASE_URL = os.getenv("LLM_BASE_URL")
+LLM_MODEL = os.getenv("LLM_MODEL")
+
+
+def _number_env(name, default, cast=int):
+    """Read a numeric setting from the environment with a fallback"""
+    value = os.getenv(name)
+    try:
+        return cast(value) if value not in (None, "") else default
+    except ValueError:
+        return default
+
+
+# Worker pool settings
+LLM_CONCURRENCY = _number_env("LLM_CONCURRENCY", 4)
+LLM_TIMEOUT = _number_env("LLM_TIMEOUT", 120, float)
+LLM_MAX_RETRIES = _number_env("LLM_MAX_RETRIES", 3)
+LLM_BACKOFF_SECONDS = _number_env("LLM_BACKOFF_SECONDS", 2.0, float)
+# Maximum requests per second over all workers, 0 = unlimited
+LLM_RATE_LIMIT = _number_env("LLM_RATE_LIMIT", 0.0, float)
+# Texts per request in batch mode, 1 = one request per text
+LLM_BATCH_SIZE = _number_env("LLM_BATCH_SIZE", 1)
+# Answer budget per text of a batch request
+LLM_BATCH_TOKENS_PER_TEXT = _number_env("LLM_BATCH_TOKENS_PER_TEXT", 500)
+
+# HTTP status codes worth retrying (rate limited, server busy/restarting)
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# Fields of the structured analysis, in prompt order
+ANALYSIS_FIELDS = {
+    "UEBERGRIF_VORHANDEN": "übergriff_vorhanden",
+    "UEBERGRIF_ART": "übergriff_art",
+    "UEBERGRIF_TEXTBELEG": "übergriff_textbeleg",
+    "VERWEIGERUNG_VORHANDEN": "verweigerung_vorhanden",
+    "VERWEIGERUNG_MASSNAHME": "verweigerung_massnahme",
+    "VERWEIGERUNG_BEGRUENDUNG": "verweigerung_begruendung",
+    "HILFEBEDARF_TYP": "hilfebedarf_typ",
+    "HILFEBEDARF_BESCHREIBUNG": "hilfebedarf_beschreibung",
+    "MEDIZINISCHES_PROBLEM_BESCHREIBUNG": "medizinisches_problem_beschreibung",
+    "MEDIZINISCHES_PROBLEM_KATEGORIE": "medizinisches_problem_kategorie",
+    "AUFFAELLIGKEITEN_VORHANDEN": "auffaelligkeiten_vorhanden",
+    "AUFFAELLIGKEITEN_BESCHREIBUNG": "auffaelligkeiten_beschreibung",
+}
+
+ANALYSIS_INSTRUCTIONS = """
+        Gib deine Antwort als einfache Textzeilen mit diesem Format:
+
+        Erklärung: Wurde in dem Anamnesetext ein Übergriff auf Einsatzkräfte beschrieben?
+        UEBERGRIF_VORHANDEN: [ja/nein]
+        UEBERGRIF_ART: [verbal/koerperlich/sexuell/keine]
+        UEBERGRIF_TEXTBELEG: [konkreter Text aus dem Anamnesetext oder "kein"]
+
+        Erklärung: Wurden Maßnahmen, Untersuchungen oder Transport verweigert?
+        VERWEIGERUNG_VORHANDEN: [ja/nein]
+        VERWEIGERUNG_MASSNAHME: [konkrete abgelehnte Maßnahme oder "keine"]
+        VERWEIGERUNG_BEGRUENDUNG: [konkreter Grund oder "kein"]
+
+        Erklärung: Welche maßnahmen wurden durchgeführt?
+        HILFEBEDARF_TYP: [medizinisch/pflegerisch/aufstehhilfe/unbekannt]
+        HILFEBEDARF_BESCHREIBUNG: [kurze Beschreibung oder "keine"]
+
+        Erklärung: Liegt ein akutes Rettungsdienstliches Problem vor? (keine chronischen Krankheiten)
+        MEDIZINISCHES_PROBLEM_BESCHREIBUNG: [konkrete Beschreibung oder "kein Problem"]
+        MEDIZINISCHES_PROBLEM_KATEGORIE: [kardiovaskulär/respiratorisch/neurologisch/traumatologisch/intoxikation/psychisch/sonstiges/keine]
+
+        Erklärung: Wurden sonstige Einsatzbesonderheiten beschrieben?
+        AUFFAELLIGKEITEN_VORHANDEN: [ja/nein]
+        AUFFAELLIGKEITEN_BESCHREIBUNG: [konkrete Beschreibung oder "keine"]
+
+        WICHTIG: Verwende nur die erlaubten Werte in Klammern. Gib keine zusätzlichen Erklärungen.
+        """  # noqa: E501
+
+
+def build_prompt(text_content):
+    """Prompt for the structured analysis of one anamnesis text"""
+    return f"""
+        Analysiere diesen Anamnesetext und gib eine strukturierte Analyse zurück.
+
+        TEXT: {text_content}
+{ANALYSIS_INSTRUCTIONS}"""
+
+
+def build_batch_prompt(texts):
+    """
+    Prompt for several anamnesis texts at once, instructions are sent only once
+
+    Parameters:
+    - texts: Dict text ID -> text; IDs must not contain whitespace
+    """
+    blocks = "\n".join(
+        f"        [[{text_id}]] {' '.join(str(text).split())}"
+        for text_id, text in texts.items()
+    )
+    return f"""
+        Analysiere jeden der folgenden Anamnesetexte einzeln und gib für jeden Text eine strukturierte Analyse zurück.
+        Jeder Text beginnt mit seiner ID in doppelten eckigen Klammern.
+
+        TEXTE:
+{blocks}
+
+        Beginne die Analyse jedes Textes mit einer eigenen Zeile "ID: <ID des Textes>" und gib danach die Zeilen für diesen Text aus.
+{ANALYSIS_INSTRUCTIONS}"""  # noqa: E501
+
+
+# Version of the prompt/model pair, part of every result cache key: a changed
+# prompt or model never reuses answers given to a different one
+PROMPT_VERSION = hashlib.sha1(build_prompt("").encode("utf-8")).hexdigest()[:12]
+ANALYSIS_VERSION = f"{PROMPT_VERSION}:{LLM_MODEL or 'default'}"
+
+
+def is_error(llm_text):
+    """Whether an answer is an error message instead of an analysis"""
+    return llm_text.startswith("Fehler")
+
+
+def create_session(pool_size=None):
+    """HTTP session with keep-alive connections for pool_size parallel workers"""
+    pool_size = pool_size or LLM_CONCURRENCY
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class RateLimiter:
+    """Space request starts evenly so all workers together stay below a rate"""
+
+    def __init__(self, rate=None):
+        rate = LLM_RATE_LIMIT if rate is None else rate
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def chat_completion(
+    prompt,
+    session=None,
+    base_url=None,
+    max_tokens=800,
+    timeout=None,
+    max_retries=None,
+    backoff=None,
+    rate_limiter=None,
+):
+    """
+    Send one chat prompt to the LLM and return the answer text
+
+    Connection errors, timeouts and RETRY_STATUS responses are retried with
+    exponential backoff and jitter. Errors are returned as "Fehler..." text
+    like before, so one failed protocol does not stop an analysis run.
+    """
+    session = session or requests
+    base_url = base_url or LLM_BASE_URL
+    timeout = LLM_TIMEOUT if timeout is None else timeout
+    max_retries = LLM_MAX_RETRIES if max_retries is None else max_retries
+    backoff = LLM_BACKOFF_SECONDS if backoff is None else backoff
+
+    payload = {
+        "messages": [{"role": "user", "content": prompt}],
+        "max_tokens": max_tokens,
+        "temperature": 0.1,
+    }
+    if LLM_MODEL:
+        payload["model"] = LLM_MODEL
+
+    error = None
+    for attempt in range(max_retries + 1):
+        if attempt:
+            time.sleep(backoff * 2 ** (attempt - 1) * (1 + random.random()))
+        if rate_limiter is not None:
+            rate_limiter.wait()
+        try:
+            response = session.post(
+                base_url,
+                headers={"Content-Type": "application/json"},
+                json=payload,
+                timeout=timeout,
+            )
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = f"Fehler beim LLM-Aufruf: {str(e)}"
+            continue
+        except Exception as e:
+            return f"Fehler beim LLM-Aufruf: {str(e)}"
+
+        if response.status_code == 200:
+            try:
+                return response.json()["choices"][0]["message"]["content"]
+            except (ValueError, KeyError, IndexError, TypeError) as e:
+                return f"Fehler beim LLM-Aufruf: {str(e)}"
+        error = f"Fehler: HTTP {response.status_code} - {response.text}"
+        if response.status_code not in RETRY_STATUS:
+            break
+    return error
+
+
+def analyze_medical_text(text_content, protocol_id=None, cache=None, **request_options):
+    """
+    Send medical text to local LLM for structured analysis
+
+    With a result cache (see llm_cache), a text already answered for the current
+    ANALYSIS_VERSION is returned from it without inference; new answers are
+    stored unless the call failed.
+    """
+    if cache is not None:
+        cached = cache.get(text_content, ANALYSIS_VERSION)
+        if cached is not None:
+            return cached[0]
+
+    llm_text = chat_completion(build_prompt(text_content), **request_options)
+    if cache is not None and not is_error(llm_text):
+        cache.put(
+            text_content, ANALYSIS_VERSION, llm_text, parse_llm_response(llm_text)
+        )
+    return llm_text
+
+
+def _field_keys(lines):
+    """Analysis field keys of answer lines, as parse_llm_response reads them"""
+    keys = []
+    for line in lines:
+        key, colon, _ = line.strip().partition(":")
+        if colon and key.strip().upper() in ANALYSIS_FIELDS:
+            keys.append(key.strip().upper())
+    return keys
+
+
+def parse_batch_response(llm_text, text_ids):
+    """
+    Split a batch answer into the per-text blocks and parse each of them
+
+    Returns {text ID: (answer block, parsed fields)} for the IDs whose block was
+    found and holds all three yes/no decisions; other IDs are left out so the
+    caller can fall back to single-text requests for them.
+
+    A block is rejected when it repeats a field (the answer of a text whose
+    ID line is missing ran into it) or its ID appears twice. Lines after an
+    unknown ID belong to no block.
+    """
+    text_ids = set(text_ids)
+    blocks = {}
+    rejected = set()
+    current = None
+    for line in llm_text.split("\n"):
+        match = re.match(r"^[\W_]*ID[\W_]*:?[\s\[]*([\w-]+)", line.strip())
+        if match and match.group(1) in text_ids:
+            current = match.group(1)
+            if current in blocks:
+                rejected.add(current)
+            blocks[current] = []
+        elif match and re.match(r"^[\W_]*ID\b", line.strip()):
+            # An ID line for no text of this batch
+            current = None
+        elif current is not None:
+            blocks[current].append(line)
+
+    required = [
+        "übergriff_vorhanden",
+        "verweigerung_vorhanden",
+        "auffaelligkeiten_vorhanden",
+    ]
+    parsed_blocks = {}
+    for text_id, lines in blocks.items():
+        keys = _field_keys(lines)
+        if text_id in rejected or len(keys) != len(set(keys)):
+            continue
+        answer = "\n".join(lines).strip()
+        parsed = parse_llm_response(answer)
+        if all(parsed[field] for field in required):
+            parsed_blocks[text_id] = (answer, parsed)
+    return parsed_blocks
+
+
+def analyze_medical_texts(texts, cache=None, **request_options):
+    """
+    Analyze several texts with one batch request
+
+    Texts missing from or unparsable in the batch answer are retried one by one
+    with analyze_medical_text. Returns {text: (answer, parsed fields)}; answers
+    of both modes are stored in the result cache under ANALYSIS_VERSION.
+    """
+    texts = list(dict.fromkeys(texts))
+    by_id = {f"T{i}": text for i, text in enumerate(texts, start=1)}
+
+    results = {}
+    if len(texts) > 1:
+        llm_text = chat_completion(
+            build_batch_prompt(by_id),
+            max_tokens=LLM_BATCH_TOKENS_PER_TEXT * len(texts),
+            **request_options,
+        )
+        if not is_error(llm_text):
+            for text_id, (answer, parsed) in parse_batch_response(
+                llm_text, by_id
+            ).items():
+                text = by_id[text_id]
+                results[text] = (answer, parsed)
+                if cache is not None:
+                    cache.put(text, ANALYSIS_VERSION, answer, parsed)
+
+    # Fallback to single-text mode
+    for text in texts:
+        if text not in results:
+            answer = analyze_medical_text(text, cache=cache, **request_options)
+            results[text] = (answer, parse_llm_response(answer))
+    return results
+
+
+def parse_llm_response(llm_text):
+    """Parse the structured LLM response into individual fields"""
+    result = {field: "" for field in ANALYSIS_FIELDS.values()}
+
+    try:
+        # Clean the text first
+        cleaned_text = llm_text.strip()
+
+        # Remove markdown code blocks if present
+        if cleaned_text.startswith("```"):
+            content_lines = []
+            for line in cleaned_text.split("\n"):
+                if not line.strip().startswith("```"):
+                    content_lines.append(line)
+                elif content_lines:  # If we already have content, stop at next ```
+                    break
+            cleaned_text = "\n".join(content_lines)
+
+        # Parse line by line
+        for line in cleaned_text.split("\n"):
+            line = line.strip()
+            if not line or ":" not in line:
+                continue
+
+            # Split on first colon only
+            key, value = line.split(":", 1)
+            key = key.strip().upper()
+            value = value.strip()
+
+            # Remove brackets if present
+            if value.startswith("[") and value.endswith("]"):
+                value = value[1:-1]
+
+            if key in ANALYSIS_FIELDS:
+                result[ANALYSIS_FIELDS[key]] = value
+
+    except Exception as e:
+        # If parsing fails, return the raw text in one field
+        result["auffaelligkeiten_beschreibung"] = (
+            f"Parse error: {str(e)} - Raw text: {llm_text[:200]}"
+        )
+
+    # Clean up results - remove any leading/trailing whitespace and empty entries
+    for key in result:
+        value = result[key].strip() if isinstance(result[key], str) else result[key]
+        if not value or value.startswith("- ") or value.startswith("**"):
+            value = ""
+        result[key] = value
+
+    return result
+
+
+class LLMWorkerPool:
+    """
+    Thread pool that analyzes many texts concurrently against the LLM
+
+    All workers share one keep-alive session and one rate limiter. Use it as a
+    context manager; results are yielded as they complete, so the caller can
+    show progress while the remaining requests are still running. With a result
+    cache, texts answered in earlier runs are yielded first without inference.
+    With batch_size > 1, each request carries that many texts (batch mode).
+    """
+
+    def __init__(
+        self,
+        base_url=None,
+        concurrency=None,
+        rate_limit=None,
+        max_retries=None,
+        backoff=None,
+        timeout=None,
+        cache=None,
+        batch_size=None,
+    ):
+        self.concurrency = concurrency or LLM_CONCURRENCY
+        self.batch_size = batch_size or LLM_BATCH_SIZE
+        self.cache = cache
+        self.cache_hits = 0
+        self.session = create_session(self.concurrency)
+        self.request_options = {
+            "session": self.session,
+            "base_url": base_url,
+            "max_retries": max_retries,
+            "backoff": backoff,
+            "timeout": timeout,
+            "rate_limiter": RateLimiter(rate_limit),
+        }
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        # Pending requests are dropped, e.g. when a Streamlit rerun aborts
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+
+    def submit(self, text_content):
+        """Schedule one text; returns a future of the raw LLM answer"""
+        return self._executor.submit(
+            analyze_medical_text,
+            text_content,
+            cache=self.cache,
+            **self.request_options,
+        )
+
+    def submit_batch(self, texts):
+        """Schedule several texts as one request; returns a future of their results"""
+        return self._executor.submit(
+            analyze_medical_texts, texts, cache=self.cache, **self.request_options
+        )
+
+    def analyze(self, texts):
+        """
+        Analyze texts concurrently
+
+        Parameters:
+        - texts: Dict key -> text (e.g. protocolId or text hash -> anamnesis)
+
+        Yields (key, raw LLM answer, parsed fields) in completion order.
+        """
+        if self.cache is not None:
+            # One bulk lookup instead of a query per text
+            cached = self.cache.get_many(texts.values(), ANALYSIS_VERSION)
+            pending = {}
+            for key, text in texts.items():
+                if text in cached:
+                    self.cache_hits += 1
+                    yield key, *cached[text]
+                else:
+                    pending[key] = text
+            texts = pending
+
+        if self.batch_size > 1:
+            items = list(texts.items())
+            futures = {}
+            for start in range(0, len(items), self.batch_size):
+                batch = items[start : start + self.batch_size]
+                futures[self.submit_batch([text for _, text in batch])] = batch
+            for future in as_completed(futures):
+                results = future.result()
+                for key, text in futures[future]:
+                    yield key, *results[text]
+            return
+
+        futures = {self.submit(text): key for key, text in texts.items()}
+        for future in as_completed(futures):
+            llm_text = future.result()
+            yield futures[future], llm_text, parse_llm_response(llm_text)
@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# SQLite file of the persistent LLM result store
+LLM_CACHE_FILE = os.getenv("LLM_CACHE_FILE", "data/llm_cache.sqlite")
+
+# SQLite limits the number of bound parameters per statement
+_LOOKUP_CHUNK = 900
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def normalize_text(text):
+    """Collapse whitespace so reformatted copies of a text share one entry"""
+    return " ".join(str(text).split())
+
+
+def cache_key(text, version):
+    """Content address of a text for one prompt/model version"""
+    payload = f"{version}\n{normalize_text(text)}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+class LLMResultCache:
+    """
+    Persistent content-addressed store of LLM answers
+
+    Entries are keyed by a hash of the normalized text and the prompt/model
+    version, so changing the prompt or model starts a fresh set of entries
+    while old ones stay valid for their version. Safe to share across threads.
+    """
+
+    def __init__(self, path=LLM_CACHE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_results (
+                    key TEXT PRIMARY KEY,
+                    version TEXT NOT NULL,
+                    answer TEXT NOT NULL,
+                    parsed TEXT NOT NULL,
+                    created REAL NOT NULL
+                )
+                """)
+
+    def get_many(self, texts, version):
+        """Return {text: (answer, parsed fields)} for all cached texts"""
+        keys = {}
+        for text in texts:
+            keys.setdefault(cache_key(text, version), []).append(text)
+
+        found = {}
+        key_list = list(keys)
+        with self._lock:
+            for start in range(0, len(key_list), _LOOKUP_CHUNK):
+                chunk = key_list[start : start + _LOOKUP_CHUNK]
+                rows = self._conn.execute(
+                    "SELECT key, answer, parsed FROM llm_results WHERE key IN "
+                    f"({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                for key, answer, parsed in rows:
+                    for text in keys[key]:
+                        found[text] = (answer, json.loads(parsed))
+        return found
+
+    def get(self, text, version):
+        """Return (answer, parsed fields) of a cached text or None"""
+        return self.get_many([text], version).get(text)
+
+    def put(self, text, version, answer, parsed):
+        """Store the answer and parsed fields of a text"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_results VALUES (?, ?, ?, ?, ?)",
+                (
+                    cache_key(text, version),
+                    version,
+                    answer,
+                    json.dumps(parsed, ensure_ascii=False),
+                    time.time(),
+                ),
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def get_result_cache():
+    """Return the shared result store, opening it on first use"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMResultCache()
+    return _cache
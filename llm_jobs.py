@@ -0,0 +1,423 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+from llm_analysis import ANALYSIS_FIELDS, ANALYSIS_VERSION, LLMWorkerPool, is_error
+from llm_cache import get_result_cache
+from llm_prefilter import PREFILTER_SOURCE, prefilter_texts
+
+# SQLite file with the job queue and the checkpointed results
+LLM_JOBS_FILE = os.getenv("LLM_JOBS_FILE", "data/llm_jobs.sqlite")
+
+# Columns of job_protocols describing the near-duplicate a result came from
+ORIGIN_COLUMNS = [
+    ("own_text", "TEXT"),
+    ("representative_id", "TEXT"),
+    ("similarity", "REAL"),
+]
+
+# Columns of jobs added after the first release
+JOB_COLUMNS = [("prefilter_stats", "TEXT")]
+
+# Job states; queued and running jobs are resumed after a restart
+ACTIVE_STATES = ("queued", "running")
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def _text_key(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _preview(text):
+    return text[:100] + "..." if len(text) > 100 else text
+
+
+def job_id_for(entries, batch_size=1, use_prefilter=True):
+    """Deterministic job ID: the same selection and settings give the same job"""
+    digest = hashlib.sha1(
+        json.dumps(
+            [ANALYSIS_VERSION, batch_size, use_prefilter, sorted(entries)],
+            ensure_ascii=False,
+        ).encode("utf-8")
+    )
+    return digest.hexdigest()[:16]
+
+
+class LLMJobStore:
+    """SQLite persistence of jobs, their texts and the results checkpointed so far"""
+
+    def __init__(self, path=LLM_JOBS_FILE):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    batch_size INTEGER NOT NULL,
+                    created REAL NOT NULL,
+                    updated REAL NOT NULL,
+                    error TEXT
+                );
+                CREATE TABLE IF NOT EXISTS job_items (
+                    job_id TEXT NOT NULL,
+                    item_key TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    done INTEGER NOT NULL DEFAULT 0,
+                    answer TEXT,
+                    parsed TEXT,
+                    source TEXT,
+                    PRIMARY KEY (job_id, item_key)
+                );
+                CREATE TABLE IF NOT EXISTS job_protocols (
+                    job_id TEXT NOT NULL,
+                    protocol_id TEXT NOT NULL,
+                    item_key TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS job_protocols_job
+                    ON job_protocols (job_id);
+                """)
+            # Prefilter stats of a job and near-duplicate origin of a protocol,
+            # added to older job files too
+            self._add_missing_columns("jobs", JOB_COLUMNS)
+            self._add_missing_columns("job_protocols", ORIGIN_COLUMNS)
+
+    def _add_missing_columns(self, table, columns):
+        existing = {row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+        for column, sql_type in columns:
+            if column not in existing:
+                self._conn.execute(
+                    f"ALTER TABLE {table} ADD COLUMN {column} {sql_type}"
+                )
+
+    def exists(self, job_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return row is not None
+
+    def create(
+        self,
+        job_id,
+        entries,
+        batch_size,
+        prechecked,
+        origins=None,
+        prefilter_stats=None,
+    ):
+        """
+        Enqueue a job unless it exists already
+
+        Returns whether the job was created; when two sessions submit the same
+        selection at once, the second one finds the first one's job.
+
+        Parameters:
+        - entries: List of (protocolId, text)
+        - prechecked: Dict text -> (answer, parsed fields, source) of texts that
+          are already classified, e.g. by the prefilter
+        - origins: Optional list aligned with entries; for a protocol analyzed
+          with the text of a near-duplicate, (own text, protocolId of that
+          representative, similarity), otherwise None
+        - prefilter_stats: Optional stats of the rule-based pre-check, kept
+          with the job so every later run can show them
+        """
+        now = time.time()
+        texts = dict.fromkeys(text for _, text in entries)
+        items = []
+        for text in texts:
+            answer, parsed, source = prechecked.get(text, (None, None, None))
+            items.append(
+                (
+                    job_id,
+                    _text_key(text),
+                    text,
+                    int(text in prechecked),
+                    answer,
+                    json.dumps(parsed, ensure_ascii=False) if parsed else None,
+                    source,
+                )
+            )
+        with self._lock, self._conn:
+            inserted = self._conn.execute(
+                """
+                INSERT OR IGNORE INTO jobs (job_id, status, batch_size, created,
+                    updated, prefilter_stats)
+                VALUES (?, 'queued', ?, ?, ?, ?)
+                """,
+                (
+                    job_id,
+                    batch_size,
+                    now,
+                    now,
+                    json.dumps(prefilter_stats) if prefilter_stats else None,
+                ),
+            ).rowcount
+            if not inserted:
+                return False
+            self._conn.executemany(
+                "INSERT INTO job_items VALUES (?, ?, ?, ?, ?, ?, ?)", items
+            )
+            self._conn.executemany(
+                """
+                INSERT INTO job_protocols (job_id, protocol_id, item_key,
+                    own_text, representative_id, similarity)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (job_id, str(pid), _text_key(text), *(origin or (None,) * 3))
+                    for (pid, text), origin in zip(
+                        entries, origins or [None] * len(entries)
+                    )
+                ],
+            )
+        return True
+
+    def set_status(self, job_id, status, error=None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated = ? WHERE job_id = ?",
+                (status, error, time.time(), job_id),
+            )
+
+    def save_result(self, job_id, text, answer, parsed, source):
+        """Checkpoint one result; it survives reruns and restarts"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                UPDATE job_items SET done = 1, answer = ?, parsed = ?, source = ?
+                WHERE job_id = ? AND item_key = ?
+                """,
+                (
+                    answer,
+                    json.dumps(parsed, ensure_ascii=False),
+                    source,
+                    job_id,
+                    _text_key(text),
+                ),
+            )
+            self._conn.execute(
+                "UPDATE jobs SET updated = ? WHERE job_id = ?", (time.time(), job_id)
+            )
+
+    def pending_texts(self, job_id):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT text FROM job_items WHERE job_id = ? AND done = 0", (job_id,)
+            ).fetchall()
+        return [text for (text,) in rows]
+
+    def job(self, job_id):
+        """Status, settings, prefilter stats and progress counts of a job, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT j.status, j.batch_size, j.error, j.created, j.updated,
+                       j.prefilter_stats, COUNT(i.item_key),
+                       COALESCE(SUM(i.done), 0)
+                FROM jobs j LEFT JOIN job_items i ON i.job_id = j.job_id
+                WHERE j.job_id = ?
+                GROUP BY j.job_id
+                """,
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ["status", "batch_size", "error", "created", "updated"]
+        keys += ["prefilter_stats", "total", "done"]
+        job = dict(zip(keys, row))
+        if job["prefilter_stats"]:
+            job["prefilter_stats"] = json.loads(job["prefilter_stats"])
+        return job
+
+    def active_jobs(self):
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT job_id FROM jobs WHERE status IN "
+                f"({','.join('?' * len(ACTIVE_STATES))})",
+                ACTIVE_STATES,
+            ).fetchall()
+        return [job_id for (job_id,) in rows]
+
+    def results(self, job_id):
+        """
+        Finished results expanded to every protocol of the job
+
+        anamnesis_text is always the protocol's own text. For protocols whose
+        result was taken from a near-duplicate, repraesentant_id, _text and
+        aehnlichkeit_repraesentant name the protocol that was analyzed.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT p.protocol_id, i.text, i.parsed, i.source, p.own_text,
+                       p.representative_id, p.similarity
+                FROM job_protocols p
+                JOIN job_items i ON i.job_id = p.job_id AND i.item_key = p.item_key
+                WHERE p.job_id = ? AND i.done = 1
+                """,
+                (job_id,),
+            ).fetchall()
+
+        columns = ["einsatz_id", *ANALYSIS_FIELDS.values()]
+        columns += [
+            "anamnesis_text",
+            "analyse_quelle",
+            "repraesentant_id",
+            "repraesentant_text",
+            "aehnlichkeit_repraesentant",
+        ]
+        records = []
+        for row in rows:
+            protocol_id, text, parsed, source, own_text, rep_id, similarity = row
+            copied = rep_id is not None
+            records.append(
+                {
+                    "einsatz_id": protocol_id,
+                    **json.loads(parsed),
+                    "anamnesis_text": _preview(own_text if copied else text),
+                    "analyse_quelle": source,
+                    "repraesentant_id": rep_id,
+                    "repraesentant_text": _preview(text) if copied else None,
+                    "aehnlichkeit_repraesentant": similarity,
+                }
+            )
+        return pd.DataFrame(records, columns=columns)
+
+
+class LLMJobRunner:
+    """
+    Runs LLM analysis jobs in background threads, outside the Streamlit script
+
+    Every result is checkpointed in the job store as it arrives, so pages can
+    poll progress and show partial results, and a job interrupted by a stop or
+    a process restart continues with its remaining texts when started again.
+    """
+
+    def __init__(self, store=None, cache=None):
+        self.store = store or LLMJobStore()
+        self.cache = cache if cache is not None else get_result_cache()
+        self._threads = {}
+        self._stop = {}
+        self._lock = threading.Lock()
+
+    def submit(self, entries, batch_size=1, use_prefilter=True, origins=None):
+        """
+        Enqueue the texts of a selection and start processing them
+
+        Parameters:
+        - entries: List of (protocolId, anamnesis text to analyze)
+        - origins: See LLMJobStore.create
+
+        Returns (job_id, prefilter stats or None). Submitting the same selection
+        again returns the existing job and resumes it if it was interrupted.
+        """
+        entries = [(str(pid), text) for pid, text in entries]
+        job_id = job_id_for(entries, batch_size, use_prefilter)
+        stats = None
+        if not self.store.exists(job_id):
+            texts = {text: text for _, text in entries}
+            prechecked = {}
+            if use_prefilter:
+                _, skipped, stats = prefilter_texts(texts)
+                prechecked = {
+                    text: (answer, parsed, PREFILTER_SOURCE)
+                    for text, (answer, parsed) in skipped.items()
+                }
+            created = self.store.create(
+                job_id, entries, batch_size, prechecked, origins, stats
+            )
+            if not created:
+                stats = None
+        self.start(job_id)
+        return job_id, stats
+
+    def start(self, job_id):
+        """Start or resume a job unless it is finished or already running"""
+        job = self.store.job(job_id)
+        if job is None or job["status"] == "done":
+            return
+        with self._lock:
+            thread = self._threads.get(job_id)
+            if thread is not None and thread.is_alive():
+                return
+            self._stop[job_id] = threading.Event()
+            self.store.set_status(job_id, "queued")
+            thread = threading.Thread(
+                target=self._run,
+                args=(job_id, job["batch_size"]),
+                name=f"llm-job-{job_id}",
+                daemon=True,
+            )
+            self._threads[job_id] = thread
+            thread.start()
+
+    def stop(self, job_id):
+        """Stop a running job after the requests in flight; it can be resumed"""
+        event = self._stop.get(job_id)
+        if event is not None:
+            event.set()
+
+    def is_running(self, job_id):
+        thread = self._threads.get(job_id)
+        return thread is not None and thread.is_alive()
+
+    def resume_active(self):
+        """Restart the jobs that were queued or running when the process ended"""
+        for job_id in self.store.active_jobs():
+            self.start(job_id)
+
+    def _run(self, job_id, batch_size):
+        stop = self._stop[job_id]
+        try:
+            self.store.set_status(job_id, "running")
+            pending = self.store.pending_texts(job_id)
+            failed = 0
+            with LLMWorkerPool(cache=self.cache, batch_size=batch_size) as pool:
+                for text, answer, parsed in pool.analyze({t: t for t in pending}):
+                    # Failed calls stay pending and are retried on the next start
+                    if is_error(answer):
+                        failed += 1
+                    else:
+                        self.store.save_result(job_id, text, answer, parsed, "LLM")
+                    if stop.is_set():
+                        self.store.set_status(job_id, "stopped")
+                        return
+            if failed:
+                self.store.set_status(
+                    job_id, "failed", error=f"{failed} Texte ohne gültige Antwort"
+                )
+            else:
+                self.store.set_status(job_id, "done")
+        except Exception as e:
+            self.store.set_status(job_id, "failed", error=str(e))
+
+    def progress(self, job_id):
+        """Status and counts of a job, with whether its thread is alive"""
+        job = self.store.job(job_id)
+        if job is not None:
+            job["running"] = self.is_running(job_id)
+        return job
+
+    def results(self, job_id):
+        return self.store.results(job_id)
+
+
+def get_job_runner():
+    """Return the process-wide job runner, resuming interrupted jobs on first use"""
+    global _runner
+    if _runner is None:
+        with _runner_lock:
+            if _runner is None:
+                runner = LLMJobRunner()
+                runner.resume_active()
+                _runner = runner
+    return _runner
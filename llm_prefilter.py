@@ -0,0 +1,149 @@
+import re
+import time
+
+import pandas as pd
+
+from llm_analysis import ANALYSIS_FIELDS
+
+# Screening patterns per finding of the LLM analysis (lowercase regex). A hit
+# does not mean the finding is present ("kein Übergriff" also hits), only that
+# the text needs the model; texts without any hit are clearly negative.
+SCREENING_PATTERNS = {
+    "übergriff": [
+        r"übergriff",
+        r"angriff",
+        r"angegriffen",
+        r"attack",
+        r"bedroh",
+        r"beleidig",
+        r"beschimpf",
+        r"bespuck",
+        r"gespuckt",
+        r"geschlagen",
+        r"schlägt",
+        r"getreten",
+        r"handgreiflich",
+        r"aggressi",
+        r"gewalt",
+        r"randal",
+        r"messer",
+        r"waffe",
+        r"belästig",
+    ],
+    "verweigerung": [
+        r"verweiger",
+        r"abgelehnt",
+        r"lehnt\w*\b.{0,80}\bab\b",
+        r"nicht einverstanden",
+        r"(?:will|möchte|wollte|wünscht)\w*\s+(?:nicht|kein)",
+        r"eigene[nr]? verantwortung",
+        r"gegen (?:ärztlichen|medizinischen) rat",
+        r"unterschri",
+        r"revers",
+    ],
+    "auffaelligkeiten": [
+        r"polizei",
+        r"feuerwehr",
+        r"alkohol",
+        r"intox",
+        r"drogen",
+        r"suizid",
+        r"verstorben",
+        r"reanimation",
+        r"türöffnung",
+        r"zwang",
+        r"fixier",
+        r"gefahr",
+        r"unklare lage",
+        r"nachforderung",
+        r"verzögert",
+    ],
+}
+
+# Classification of texts without any screening hit, in the schema of
+# llm_analysis.parse_llm_response. Hilfebedarf and the medical problem are
+# not assessed and stay empty; rows with PREFILTER_SOURCE must be left out of
+# their distributions.
+NEGATIVE_DEFAULTS = {
+    **{field: "" for field in ANALYSIS_FIELDS.values()},
+    "übergriff_vorhanden": "nein",
+    "übergriff_art": "keine",
+    "übergriff_textbeleg": "kein",
+    "verweigerung_vorhanden": "nein",
+    "verweigerung_massnahme": "keine",
+    "verweigerung_begruendung": "kein",
+    "auffaelligkeiten_vorhanden": "nein",
+    "auffaelligkeiten_beschreibung": "keine",
+}
+
+# Source recorded for texts classified by the screening stage
+PREFILTER_SOURCE = "Vorprüfung"
+
+# Answer text recorded for texts classified by the screening stage
+PREFILTER_ANSWER = "Regelbasierte Vorprüfung: keine Hinweise auf Auffälligkeiten"
+
+_COMPILED = {
+    finding: re.compile("|".join(f"(?:{p})" for p in patterns))
+    for finding, patterns in SCREENING_PATTERNS.items()
+}
+
+
+def screen_texts(texts):
+    """
+    Score texts against the screening patterns
+
+    Returns a DataFrame indexed like texts with the number of pattern hits per
+    finding, the total score and whether the text is an LLM candidate.
+    Each distinct text is only scanned once.
+    """
+    texts = pd.Series(texts, dtype="object")
+    codes, uniques = pd.factorize(texts)
+    lowered = pd.Series(uniques, dtype="object").str.lower()
+
+    scores = pd.DataFrame(
+        {
+            finding: lowered.str.count(pattern).fillna(0).astype(int)
+            for finding, pattern in _COMPILED.items()
+        }
+    )
+    scores["score"] = scores.sum(axis=1)
+    scores["candidate"] = scores["score"] > 0
+
+    result = scores.reindex(codes).reset_index(drop=True)
+    result.index = texts.index
+    # Missing texts cannot be screened: leave them to the model
+    result.loc[codes < 0, "candidate"] = True
+    return result
+
+
+def prefilter_texts(texts):
+    """
+    Split texts into LLM candidates and clearly negative texts
+
+    Parameters:
+    - texts: Dict key -> text, as passed to LLMWorkerPool.analyze
+
+    Returns (candidates, skipped, stats): candidates is the dict of texts that
+    still need the model, skipped maps the other keys to (answer, parsed fields)
+    with NEGATIVE_DEFAULTS, stats holds the counts and the stage duration.
+    """
+    started = time.perf_counter()
+    keys = list(texts)
+    screened = screen_texts([texts[key] for key in keys])
+    is_candidate = screened["candidate"].to_numpy()
+
+    candidates = {}
+    skipped = {}
+    for key, candidate in zip(keys, is_candidate):
+        if candidate:
+            candidates[key] = texts[key]
+        else:
+            skipped[key] = (PREFILTER_ANSWER, dict(NEGATIVE_DEFAULTS))
+
+    stats = {
+        "total": len(keys),
+        "candidates": len(candidates),
+        "skipped": len(skipped),
+        "seconds": time.perf_counter() - started,
+    }
+    return candidates, skipped, stats
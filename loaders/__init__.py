@@ -4,14 +4,25 @@ from .findings_loaders import (
     get_neurological_signs,
     get_pupil_status,
 )
-from .measures_loaders import get_medikamente, get_intubation, get_12lead_ecg, get_evm
+from .measures_loaders import (
+    get_medikamente,
+    get_intubation,
+    get_12lead_ecg,
+    get_evm,
+    get_measures_bundle,
+)
 from .results_loaders import (
     get_metric_from_results,
     get_reanimation,
     get_reanimation_with_targetDestination,
     get_symptom_onset,
+    get_results_bundle,
+)
+from .vitals_loaders import (
+    get_vitals,
+    get_vital_counts,
+    build_count_table,
 )
-from .vitals_loaders import get_vitals
 from .holiday_loaders import get_holidays
 
 # Registry
@@ -44,3 +55,24 @@ LOADERS = {
     "EVM": get_evm,
     "Feiertage": get_holidays,
 }
+
+# Metrics whose source has no protocolId: protocol_ids filters do not apply
+# and a year filter is passed on as year_range (ETÜ ignores it, as before)
+PROTOCOL_AGNOSTIC_METRICS = {"ETÜ", "Feiertage"}
+
+# Single-scan loaders returning several metrics of one collection at once
+BUNDLE_LOADERS = {
+    "protocols_results": get_results_bundle,
+    "protocols_measures": get_measures_bundle,
+}
+
+# Metrics that are served from a bundle instead of their own collection scan
+BUNDLED_METRICS = {
+    "NACA": "protocols_results",
+    "Reanimation": "protocols_results",
+    "Symptombeginn": "protocols_results",
+    "Medikamente": "protocols_measures",
+    "Intubation": "protocols_measures",
+    "12-Kanal-EKG": "protocols_measures",
+    "EVM": "protocols_measures",
+}
@@ -1,19 +1,22 @@
 import pandas as pd
 from typing import Dict, List, Any, Optional
 
+from .pipelines import aggregate_elements
+from .query_filters import merge_match
 
-def get_metric_from_findings(db, metric, limit=10000):
+
+def get_metric_from_findings(db, metric, limit=10000, filters=None):
     """Load structured metrics like GCS, Schmerzen from protocols_findings"""
-    query = {"data": {"$elemMatch": {"description": metric}}}
-    docs = list(db.protocols_findings.find(query, limit=limit))
-    if not docs:
+    df = aggregate_elements(
+        db.protocols_findings,
+        {"description": metric},
+        ["valueInteger", "type", "timeStamp", "source"],
+        filters=filters,
+        limit=limit,
+    )
+    if df.empty:
         return pd.DataFrame()
 
-    df = pd.DataFrame(docs).explode("data").reset_index(drop=True)
-    flat = pd.json_normalize(df["data"])
-    df = pd.concat([df.drop(columns=["data"]), flat], axis=1)
-    df = df[df["description"] == metric]
-
     df["metric"] = metric
     df["value_num"] = pd.to_numeric(df.get("valueInteger"), errors="coerce")
     df["type"] = df.get("type")
@@ -33,16 +36,22 @@ def get_metric_from_findings(db, metric, limit=10000):
     return df[keep]
 
 
-def get_neurological_signs(db, limit=10000):
+def get_neurological_signs(db, limit=10000, filters=None):
     """Load neurological signs (Seitenzeichen/Sprachstörung) from protocol_findings"""
-    query = {"data": {"$elemMatch": {"description": "Auffäligkeiten"}}}
+    query = merge_match(
+        {"data": {"$elemMatch": {"description": "Auffäligkeiten"}}}, filters
+    )
     docs = list(db.protocols_findings.find(query, limit=limit))
 
 
-def get_pupil_status(db, limit=10000):
+def get_pupil_status(db, limit=10000, filters=None):
     """Load pupil status data from protocol_findings"""
-    left_query = {"data": {"$elemMatch": {"description": "Lichtreaktion links"}}}
-    right_query = {"data": {"$elemMatch": {"description": "Lichtreaktion rechts"}}}
+    left_query = merge_match(
+        {"data": {"$elemMatch": {"description": "Lichtreaktion links"}}}, filters
+    )
+    right_query = merge_match(
+        {"data": {"$elemMatch": {"description": "Lichtreaktion rechts"}}}, filters
+    )
 
     left_docs = list(db.protocols_findings.find(left_query, limit=limit))
     right_docs = list(db.protocols_findings.find(right_query, limit=limit))
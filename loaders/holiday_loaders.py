@@ -1,30 +1,16 @@
-import requests
-import pandas as pd
- 
+import datetime
 
-def get_holidays(db=None, limit=10000):
-    """Fetch holiday data from a public API and return as a DataFrame""" 
-    try:
-        # Fetch holiday data from the public API
-        response = requests.get("https://get.api-feiertage.de/?states=sh")
-        response.raise_for_status()  # Raise an error for bad responses
-        holidays = response.json()
-        # the holidays are nested in a "feiertage" array
-        # inside the feiertage array there are all holidays with date/name
-        holidays = holidays.get("feiertage", [])
-        
-        # Process the data into a DataFrame
-        records = []
-        for holiday in holidays:
-            records.append({
-                "date": holiday.get("date"),
-                "name": holiday.get("fname"),
-            })
+from holiday_calendar import holiday_calendar
 
-        df = pd.DataFrame(records)
 
-        return df
+def get_holidays(db=None, limit=10000, filters=None):
+    """
+    Return the holidays of Schleswig-Holstein as a DataFrame
 
-    except Exception as e:
-        print(f"Error loading holiday data: {e}")
-        return pd.DataFrame()
+    The calendar is computed locally (see holiday_calendar), so no network
+    access is needed. The year_range of the filter spec selects the years;
+    without it the current year is returned.
+    """
+    year = datetime.date.today().year
+    start_year, end_year = (filters or {}).get("year_range") or (year, year)
+    return holiday_calendar(start_year, end_year)
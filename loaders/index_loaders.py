@@ -1,30 +1,19 @@
 import pandas as pd
-import datetime
 from typing import Dict, List, Any, Optional
 
-from db_connection import get_mongodb_connection, close_mongodb_connection
 from data_helpers import (
     convert_objectid_to_str,
     combine_date_time_fields,
     process_boolean_fields,
 )
+from geo_coordinates import add_wgs84_coordinates
+from .query_filters import build_match, merge_match
 
 
 def get_index(db, filters=None, limit=10000):
     """Query data from MongoDB nida_index collection"""
-    query = {}
-
-    # Apply year filter if provided
-    if filters and "year_range" in filters:
-        year_start, year_end = filters["year_range"]
-        start_date = datetime.datetime(year_start, 1, 1)
-        end_date = datetime.datetime(year_end, 12, 31, 23, 59, 59)
-
-        query["missionDate"] = {"$gte": start_date, "$lte": end_date}
-
-    # Apply protocol IDs filter if provided
-    if filters and "protocol_ids" in filters:
-        query["protocolId"] = {"$in": filters["protocol_ids"]}
+    # Apply year/date range and protocol IDs filters if provided
+    query = build_match(filters, date_field="missionDate")
 
     # Query the database
     docs = list(db.nida_index.find(query).sort("missionDate", -1).limit(limit))
@@ -51,7 +40,7 @@ def get_details(db, filters=None, limit=10000):
     """Query data from MongoDB protocols_details collection"""
     # Get details data
     nida_details_cursor = (
-        db.protocols_details.find(filters)
+        db.protocols_details.find(build_match(filters))
         .sort("content.dateStatusAlarm", -1)
         .limit(limit)
     )
@@ -80,7 +69,7 @@ def get_freetext(db, filters=None, limit=10000):
     """Query data from MongoDB free_text collection"""
 
     # Query the database
-    docs = list(db.protocols_freetexts.find(filters, limit=limit))
+    docs = list(db.protocols_freetexts.find(build_match(filters), limit=limit))
 
     # Convert ObjectId to string
     docs = convert_objectid_to_str(docs)
@@ -95,12 +84,16 @@ def get_freetext(db, filters=None, limit=10000):
 
 
 def get_etu(db, filters=None, limit=10000):
-    query = {}
-    if filters:
-        query.update(filters)
+    """
+    Query ETÜ missions of Schleswig-Flensburg from the etu_leitstelle collection
 
+    Adds WGS84 latitude/longitude columns projected from EO_X_KOORD/EO_Y_KOORD.
+    """
     # Add filter for Schleswig-Flensburg district
-    query["EO_LANDKREIS"] = "Schleswig-Flensburg"
+    # etu_leitstelle has no protocolId, so protocol_ids filters do not apply
+    query = merge_match(
+        {"EO_LANDKREIS": "Schleswig-Flensburg"}, filters, protocol_field=None
+    )
 
     # Debug: Check if collection exists and get count
     try:
@@ -119,7 +112,9 @@ def get_etu(db, filters=None, limit=10000):
             return pd.DataFrame()
 
         df = pd.DataFrame(docs)
-        return df
+
+        # Project once here so the cached frame carries map coordinates
+        return add_wgs84_coordinates(df)
 
     except Exception as e:
         print(f"ERROR in get_etu: {str(e)}")
@@ -1,7 +1,75 @@
+import re
 import pandas as pd
 
+from .pipelines import aggregate_elements
+
+# Element conditions of the measures metrics within the "data" array
+MEDIKAMENTE_MATCH = {"value_1": "Medikamente"}
+INTUBATION_MATCH = {
+    "value_1": "Atemweg",
+    "value_2": "Intubation",
+    "value_3": {"$ne": None},
+}
+ECG_MATCH = {"value_1": "Monitoring", "value_2": "12-Kanal-EKG"}
+EVM_MATCH = {"value_11": "EVM"}
+
+# Element fields needed by any of the measures metrics
+MEASURES_FIELDS = [
+    "value_1",
+    "value_2",
+    "value_3",
+    "value_4",
+    "value_5",
+    "value_6",
+    "value_8",
+    "value_10",
+    "value_11",
+    "timeStamp",
+    "source",
+]
+
+
+def extract_measures(db, limit=10000, filters=None):
+    """Read all Medikamente/Intubation/12-Kanal-EKG/EVM elements in one scan"""
+    return aggregate_elements(
+        db.protocols_measures,
+        {"$or": [MEDIKAMENTE_MATCH, INTUBATION_MATCH, ECG_MATCH, EVM_MATCH]},
+        MEASURES_FIELDS,
+        filters=filters,
+        limit=limit,
+    )
+
+
+def get_measures_bundle(db, limit=10000, filters=None):
+    """Load Medikamente, Intubation, 12-Kanal-EKG and EVM from a single scan"""
+    rows = extract_measures(db, limit=limit, filters=filters)
+    if rows.empty:
+        return {
+            "Medikamente": pd.DataFrame(),
+            "Intubation": pd.DataFrame(),
+            "12-Kanal-EKG": pd.DataFrame(),
+            "EVM": pd.DataFrame(),
+        }
+
+    # Split the elements client-side with the same conditions as the queries
+    is_medikament = rows["value_1"] == "Medikamente"
+    is_intubation = (
+        (rows["value_1"] == "Atemweg")
+        & (rows["value_2"] == "Intubation")
+        & rows["value_3"].notna()
+    )
+    is_ecg = (rows["value_1"] == "Monitoring") & (rows["value_2"] == "12-Kanal-EKG")
+    is_evm = rows["value_11"] == "EVM"
+
+    return {
+        "Medikamente": _medikamente_from_rows(rows[is_medikament]),
+        "Intubation": _intubation_from_rows(rows[is_intubation]),
+        "12-Kanal-EKG": _12lead_ecg_from_rows(rows[is_ecg]),
+        "EVM": _evm_from_rows(rows[is_evm]),
+    }
 
-def get_medikamente(db, med_name=None, limit=10000):
+
+def get_medikamente(db, med_name=None, limit=10000, filters=None):
     """
     Load medications from protocols_measures
 
@@ -9,45 +77,37 @@ def get_medikamente(db, med_name=None, limit=10000):
     - db: MongoDB database connection
     - med_name: Optional name of medication to filter by (can be in value_2 or value_6)
     - limit: Maximum number of records to return
+    - filters: Optional common filter spec (protocol_ids, year_range, date_range)
     """
-    query = {"data": {"$elemMatch": {"value_1": "Medikamente"}}}
+    element_match = dict(MEDIKAMENTE_MATCH)
 
-    # If a specific medication is requested, add to query
+    # If a specific medication is requested, add to the element condition
     if med_name:
-        query = {
-            "data": {
-                "$elemMatch": {
-                    "value_1": "Medikamente",
-                    "$or": [
-                        {
-                            "value_2": {"$regex": med_name, "$options": "i"}
-                        },  # Case-insensitive search in value_2
-                        {
-                            "value_6": {"$regex": med_name, "$options": "i"}
-                        },  # Case-insensitive search in value_6
-                    ],
-                }
-            }
-        }
-
-    docs = list(db.protocols_measures.find(query, limit=limit))
-    if not docs:
+        element_match["$or"] = [
+            {
+                "value_2": {"$regex": re.escape(med_name), "$options": "i"}
+            },  # Case-insensitive search in value_2
+            {
+                "value_6": {"$regex": re.escape(med_name), "$options": "i"}
+            },  # Case-insensitive search in value_6
+        ]
+
+    df = aggregate_elements(
+        db.protocols_measures,
+        element_match,
+        MEASURES_FIELDS,
+        filters=filters,
+        limit=limit,
+    )
+    return _medikamente_from_rows(df)
+
+
+def _medikamente_from_rows(df):
+    """Build the Medikamente frame from extracted medication elements"""
+    if df.empty:
         return pd.DataFrame()
 
-    df = pd.DataFrame(docs).explode("data").reset_index(drop=True)
-    flat = pd.json_normalize(df["data"])
-    df = pd.concat([df.drop(columns=["data"]), flat], axis=1)
-
-    df = df[df["value_1"] == "Medikamente"]
-
-    # If a medication name was specified, filter the results
-    if med_name:
-        med_name_lower = med_name.lower()
-        mask = df["value_2"].str.lower().str.contains(med_name_lower, na=False) | df[
-            "value_6"
-        ].str.lower().str.contains(med_name_lower, na=False)
-        df = df[mask]
-
+    df = df.reset_index(drop=True)
     df["metric"] = "Medikamente"
     df["med_name"] = df.get("value_2")
     df["route"] = df.get("value_3")
@@ -73,20 +133,24 @@ def get_medikamente(db, med_name=None, limit=10000):
     return df[keep]
 
 
-def get_intubation(db, limit=10000):
+def get_intubation(db, limit=10000, filters=None):
     """Load intubation data from protocols_measures"""
-    query = {"data": {"$elemMatch": {"value_1": "Atemweg"}}}
-    docs = list(db.protocols_measures.find(query, limit=limit))
-    if not docs:
+    df = aggregate_elements(
+        db.protocols_measures,
+        INTUBATION_MATCH,
+        MEASURES_FIELDS,
+        filters=filters,
+        limit=limit,
+    )
+    return _intubation_from_rows(df)
+
+
+def _intubation_from_rows(df):
+    """Build the Intubation frame from extracted airway elements"""
+    if df.empty:
         return pd.DataFrame()
 
-    df = pd.DataFrame(docs).explode("data").reset_index(drop=True)
-    flat = pd.json_normalize(df["data"])
-    df = pd.concat([df.drop(columns=["data"]), flat], axis=1)
-
-    # Fixed the boolean operation with proper parentheses
-    df = df[(df["value_2"] == "Intubation") & (df["value_3"].notna())]
-
+    df = df.reset_index(drop=True)
     df["metric"] = "Intubation"
     df["type"] = df.get("value_3")
     df["size"] = df.get("value_4")
@@ -108,22 +172,24 @@ def get_intubation(db, limit=10000):
     return df[keep]
 
 
-def get_12lead_ecg(db, limit=10000):
+def get_12lead_ecg(db, limit=10000, filters=None):
     """Load 12-lead ECG data from protocols_measures"""
-    query = {
-        "data": {"$elemMatch": {"value_1": "Monitoring", "value_2": "12-Kanal-EKG"}}
-    }
-    docs = list(db.protocols_measures.find(query, limit=limit))
-
-    if not docs:
+    df = aggregate_elements(
+        db.protocols_measures,
+        ECG_MATCH,
+        MEASURES_FIELDS,
+        filters=filters,
+        limit=limit,
+    )
+    return _12lead_ecg_from_rows(df)
+
+
+def _12lead_ecg_from_rows(df):
+    """Build the 12-Kanal-EKG frame from extracted monitoring elements"""
+    if df.empty:
         return pd.DataFrame()
 
-    df = pd.DataFrame(docs).explode("data").reset_index(drop=True)
-    flat = pd.json_normalize(df["data"])
-    df = pd.concat([df.drop(columns=["data"]), flat], axis=1)
-
-    df = df[(df["value_1"] == "Monitoring") & (df["value_2"] == "12-Kanal-EKG")]
-
+    df = df.reset_index(drop=True)
     df["metric"] = "12-Kanal-EKG"
     df["performed"] = True  # If it's in the database, it was performed
     df["result"] = df.get("value_3")  # May contain diagnostic info
@@ -143,19 +209,24 @@ def get_12lead_ecg(db, limit=10000):
     return df[keep]
 
 
-def get_evm(db, limit=10000):
+def get_evm(db, limit=10000, filters=None):
     """Load EVM (erweiterte Versorgungsmaßnahmen) data from protocols_measures"""
-    query = {"data": {"$elemMatch": {"value_11": "EVM"}}}
-    docs = list(db.protocols_measures.find(query, limit=limit))
-    if not docs:
+    df = aggregate_elements(
+        db.protocols_measures,
+        EVM_MATCH,
+        MEASURES_FIELDS,
+        filters=filters,
+        limit=limit,
+    )
+    return _evm_from_rows(df)
+
+
+def _evm_from_rows(df):
+    """Build the EVM frame from extracted EVM elements"""
+    if df.empty:
         return pd.DataFrame()
 
-    df = pd.DataFrame(docs).explode("data").reset_index(drop=True)
-    flat = pd.json_normalize(df["data"])
-    df = pd.concat([df.drop(columns=["data"]), flat], axis=1)
-
-    df = df[df["value_11"] == "EVM"]
-
+    df = df.reset_index(drop=True)
     df["metric"] = "EVM"
     df["type"] = df.get("value_1")
     df["description"] = df.get("value_2")
@@ -0,0 +1,84 @@
+import pandas as pd
+
+from .query_filters import merge_match
+
+
+def prefix_condition(condition, prefix="data"):
+    """Prefix the field names of an element condition, e.g. value_1 -> data.value_1"""
+    prefixed = {}
+    for key, value in condition.items():
+        if key in ("$or", "$and", "$nor"):
+            prefixed[key] = [prefix_condition(item, prefix) for item in value]
+        elif key.startswith("$"):
+            prefixed[key] = value
+        else:
+            prefixed[f"{prefix}.{key}"] = value
+    return prefixed
+
+
+def build_element_pipeline(element_match, fields, filters=None, limit=None):
+    """
+    Build an aggregation pipeline that returns one flat row per matching data element
+
+    Parameters:
+    - element_match: Condition on a single element of the "data" array
+    - fields: Element fields to keep, projected to top-level columns
+    - filters: Optional common filter spec (protocol_ids, year_range, date_range)
+    - limit: Maximum number of documents to read (same meaning as find(limit=))
+    """
+    pipeline = [
+        {"$match": merge_match({"data": {"$elemMatch": element_match}}, filters)}
+    ]
+    if limit:
+        pipeline.append({"$limit": limit})
+
+    projection = {"_id": 0, "protocolId": 1}
+    for field in fields:
+        if field == "source":
+            # The source may be set on the element or only on the document
+            projection["source"] = {"$ifNull": ["$data.source", "$source"]}
+        else:
+            projection[field] = f"$data.{field}"
+
+    pipeline += [
+        {"$unwind": "$data"},
+        {"$match": prefix_condition(element_match)},
+        {"$project": projection},
+    ]
+    return pipeline
+
+
+def aggregate_elements(collection, element_match, fields, filters=None, limit=None):
+    """Run an element pipeline and return the flat rows as a DataFrame"""
+    pipeline = build_element_pipeline(element_match, fields, filters, limit)
+    rows = list(collection.aggregate(pipeline, allowDiskUse=True))
+    if not rows:
+        return pd.DataFrame()
+
+    df = pd.DataFrame(rows)
+    # Fields missing in every element are not returned by MongoDB
+    for field in ["protocolId"] + list(fields):
+        if field not in df.columns:
+            df[field] = None
+    return df
+
+
+def aggregate_elements_by_key(
+    collection, key_field, keys, fields, filters=None, limit=None
+):
+    """
+    Read several element kinds in one collection scan and split them by key
+
+    Returns a dict mapping each requested key (value of key_field) to its rows.
+    """
+    keys = list(keys)
+    if key_field not in fields:
+        fields = [key_field] + list(fields)
+
+    df = aggregate_elements(
+        collection, {key_field: {"$in": keys}}, fields, filters=filters, limit=limit
+    )
+    if df.empty:
+        df = pd.DataFrame(columns=["protocolId"] + list(fields))
+
+    return {key: df[df[key_field] == key].reset_index(drop=True) for key in keys}
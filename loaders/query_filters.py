@@ -0,0 +1,63 @@
+import datetime
+
+# Keys of the common filter spec understood by every loader. Any other key in a
+# filters dict is treated as a raw MongoDB condition and passed through as-is.
+FILTER_SPEC_KEYS = ("protocol_ids", "year_range", "date_range")
+
+
+def build_match(filters=None, date_field=None, protocol_field="protocolId"):
+    """
+    Translate the common loader filter spec into a MongoDB query / $match stage
+
+    Parameters:
+    - filters: Optional dict with any of
+        - protocol_ids: iterable of protocolIds to restrict to
+        - year_range: tuple (start_year, end_year), inclusive
+        - date_range: tuple (start, end) of datetimes, inclusive
+      Additional keys are kept as raw MongoDB conditions.
+    - date_field: Name of the collection's date field. Date filters are only
+      applied when the collection has one; otherwise they have to be resolved
+      to protocol_ids beforehand (see data_filtering.filter_data_by_year).
+    - protocol_field: Name of the collection's protocol id field. None for
+      collections without one; protocol_ids filters are then ignored.
+    """
+    if not filters:
+        return {}
+
+    match = {
+        key: value for key, value in filters.items() if key not in FILTER_SPEC_KEYS
+    }
+
+    if protocol_field and filters.get("protocol_ids") is not None:
+        match[protocol_field] = {"$in": list(filters["protocol_ids"])}
+
+    if date_field:
+        date_condition = {}
+        if filters.get("year_range"):
+            year_start, year_end = filters["year_range"]
+            date_condition["$gte"] = datetime.datetime(year_start, 1, 1)
+            date_condition["$lte"] = datetime.datetime(year_end, 12, 31, 23, 59, 59)
+        if filters.get("date_range"):
+            start_date, end_date = filters["date_range"]
+            if start_date is not None:
+                date_condition["$gte"] = max(
+                    start_date, date_condition.get("$gte", start_date)
+                )
+            if end_date is not None:
+                date_condition["$lte"] = min(
+                    end_date, date_condition.get("$lte", end_date)
+                )
+        if date_condition:
+            match[date_field] = date_condition
+
+    return match
+
+
+def merge_match(query, filters=None, date_field=None, protocol_field="protocolId"):
+    """Combine a loader's own query with the server-side filter spec"""
+    match = build_match(filters, date_field=date_field, protocol_field=protocol_field)
+    if not match:
+        return query
+    if not query:
+        return match
+    return {"$and": [query, match]}
@@ -1,21 +1,62 @@
 import pandas as pd
-from data_helpers import ja_nein_to_bool
 import data_loading
 
+from .pipelines import aggregate_elements_by_key
 
-def get_metric_from_results(db, limit=10000):
+# value_1 keys of protocols_results used by the registered results metrics
+RESULTS_KEYS = [
+    "NACA",
+    "Rea durchgeführt",
+    "Symptombeginn",
+    "Spezifikation Symptombeginn",
+]
+RESULTS_FIELDS = ["value_1", "value_2", "timeStamp", "source"]
+
+
+def extract_results(db, keys=None, limit=10000, filters=None):
+    """
+    Read protocols_results once and return the flat elements per value_1 key
+
+    Parameters:
+    - db: MongoDB database connection
+    - keys: value_1 keys to extract (defaults to RESULTS_KEYS)
+    - limit: Maximum number of documents to read
+    - filters: Optional common filter spec (protocol_ids, year_range, date_range)
+    """
+    return aggregate_elements_by_key(
+        db.protocols_results,
+        "value_1",
+        keys or RESULTS_KEYS,
+        RESULTS_FIELDS,
+        filters=filters,
+        limit=limit,
+    )
+
+
+def get_results_bundle(db, limit=10000, filters=None):
+    """Load NACA, Reanimation and Symptombeginn from a single results scan"""
+    rows = extract_results(db, limit=limit, filters=filters)
+    return {
+        "NACA": _naca_from_rows(rows["NACA"]),
+        "Reanimation": _reanimation_from_rows(rows["NACA"], rows["Rea durchgeführt"]),
+        "Symptombeginn": _symptom_onset_from_rows(
+            rows["Symptombeginn"], rows["Spezifikation Symptombeginn"]
+        ),
+    }
+
+
+def get_metric_from_results(db, limit=10000, filters=None):
     """Load NACA score from protocols_results"""
-    query = {"data": {"$elemMatch": {"value_1": "NACA"}}}
-    docs = list(db.protocols_results.find(query, limit=limit))
-    if not docs:
-        return pd.DataFrame()
+    rows = extract_results(db, keys=["NACA"], limit=limit, filters=filters)
+    return _naca_from_rows(rows["NACA"])
 
-    df = pd.DataFrame(docs).explode("data").reset_index(drop=True)
-    flat = pd.json_normalize(df["data"])
-    df = pd.concat([df.drop(columns=["data"]), flat], axis=1)
 
-    df = df[df["value_1"] == "NACA"]
+def _naca_from_rows(df):
+    """Build the NACA frame from extracted NACA elements"""
+    if df.empty:
+        return pd.DataFrame()
 
+    df = df.copy()
     df["metric"] = "NACA"
     df["NACA-Score"] = df.get("value_2")
     df["timestamp"] = df.get("timeStamp")
@@ -26,7 +67,7 @@ def get_metric_from_results(db, limit=10000):
     return df[keep]
 
 
-def get_symptom_onset(db, limit=10000):
+def get_symptom_onset(db, limit=10000, filters=None):
     """
     Load symptom onset time data from protocol_results
 
@@ -38,72 +79,71 @@ def get_symptom_onset(db, limit=10000):
     Note: The timeStamp field in the database is often null for these entries.
 
     """
-    onset_query = {"data": {"$elemMatch": {"value_1": "Symptombeginn"}}}
-    spec_query = {"data": {"$elemMatch": {"value_1": "Spezifikation Symptombeginn"}}}
+    rows = extract_results(
+        db,
+        keys=["Symptombeginn", "Spezifikation Symptombeginn"],
+        limit=limit,
+        filters=filters,
+    )
+    return _symptom_onset_from_rows(
+        rows["Symptombeginn"], rows["Spezifikation Symptombeginn"]
+    )
 
-    onset_docs = list(db.protocols_results.find(onset_query, limit=limit))
-    spec_docs = list(db.protocols_results.find(spec_query, limit=limit))
 
-    if not onset_docs and not spec_docs:
+def _symptom_onset_from_rows(onset_rows, spec_rows):
+    """Combine extracted Symptombeginn/Spezifikation elements per protocol"""
+    if onset_rows.empty and spec_rows.empty:
         return pd.DataFrame()
 
     # Extract and group onset data by protocolId
     onset_data_by_protocol = {}
-    if onset_docs:
-        for doc in onset_docs:
-            protocol_id = doc.get("protocolId")
-
-            if protocol_id not in onset_data_by_protocol:
-                onset_data_by_protocol[protocol_id] = {
-                    "date": None,
-                    "time": None,
-                    "timeStamp": None,  # Initialize timeStamp
-                    "source": doc.get("source"),
-                }
-
-            for data_item in doc.get("data", []):
-                if data_item.get("value_1") == "Symptombeginn":
-                    value = data_item.get("value_2")
-                    source = data_item.get("source", doc.get("source"))
-                    # Get the timeStamp, which may be null
-                    time_stamp = data_item.get("timeStamp")
-
-                    if value:
-                        # Check if this is a date or time format
-                        if (
-                            "." in value and len(value) >= 8
-                        ):  # Likely a date like DD.MM.YYYY
-                            onset_data_by_protocol[protocol_id]["date"] = value
-                        elif ":" in value:  # Likely a time like HH:MM:SS
-                            onset_data_by_protocol[protocol_id]["time"] = value
-
-                    # Update source if available
-                    if source:
-                        onset_data_by_protocol[protocol_id]["source"] = source
-
-                    # Update timeStamp if available
-                    if time_stamp:
-                        onset_data_by_protocol[protocol_id]["timeStamp"] = time_stamp
+    for item in (
+        onset_rows.astype(object).where(onset_rows.notna(), None).to_dict("records")
+    ):
+        protocol_id = item.get("protocolId")
+
+        if protocol_id not in onset_data_by_protocol:
+            onset_data_by_protocol[protocol_id] = {
+                "date": None,
+                "time": None,
+                "timeStamp": None,  # Initialize timeStamp
+                "source": item.get("source"),
+            }
+
+        value = item.get("value_2")
+        source = item.get("source")
+        # Get the timeStamp, which may be null
+        time_stamp = item.get("timeStamp")
+
+        if value:
+            # Check if this is a date or time format
+            if "." in value and len(value) >= 8:  # Likely a date like DD.MM.YYYY
+                onset_data_by_protocol[protocol_id]["date"] = value
+            elif ":" in value:  # Likely a time like HH:MM:SS
+                onset_data_by_protocol[protocol_id]["time"] = value
+
+        # Update source if available
+        if source:
+            onset_data_by_protocol[protocol_id]["source"] = source
+
+        # Update timeStamp if available
+        if time_stamp:
+            onset_data_by_protocol[protocol_id]["timeStamp"] = time_stamp
 
     # Extract specification data by protocolId
     spec_data_by_protocol = {}
-    if spec_docs:
-        for doc in spec_docs:
-            protocol_id = doc.get("protocolId")
-
-            for data_item in doc.get("data", []):
-                if data_item.get("value_1") == "Spezifikation Symptombeginn":
-                    value = data_item.get("value_2")
-                    source = data_item.get("source", doc.get("source"))
-                    # Get the timeStamp, which may be null
-                    time_stamp = data_item.get("timeStamp")
-
-                    if value:
-                        spec_data_by_protocol[protocol_id] = {
-                            "specification": value,
-                            "source": source or doc.get("source"),
-                            "timeStamp": time_stamp,
-                        }
+    for item in (
+        spec_rows.astype(object).where(spec_rows.notna(), None).to_dict("records")
+    ):
+        value = item.get("value_2")
+
+        if value:
+            spec_data_by_protocol[item.get("protocolId")] = {
+                "specification": value,
+                "source": item.get("source"),
+                # Get the timeStamp, which may be null
+                "timeStamp": item.get("timeStamp"),
+            }
 
     # Combine all unique protocol IDs
     all_protocol_ids = set(
@@ -206,38 +246,23 @@ def get_symptom_onset(db, limit=10000):
         )
 
 
-def get_reanimation(db, limit=10000):
+def get_reanimation(db, limit=10000, filters=None):
     """Load reanimation data - NACA 6 or explicit reanimation field"""
-    # First get all NACA 6 cases
-    naca_query = {"data": {"$elemMatch": {"value_1": "NACA", "value_2": "6"}}}
-    naca_docs = list(db.protocols_results.find(naca_query, limit=limit))
+    rows = extract_results(
+        db, keys=["NACA", "Rea durchgeführt"], limit=limit, filters=filters
+    )
+    return _reanimation_from_rows(rows["NACA"], rows["Rea durchgeführt"])
 
-    # Get explicit reanimation field
-    rea_query = {"data": {"$elemMatch": {"value_1": "Rea durchgeführt"}}}
-    rea_docs = list(db.protocols_results.find(rea_query, limit=limit))
 
-    # Combine and process
-    if not naca_docs and not rea_docs:
-        return pd.DataFrame()
+def _reanimation_from_rows(naca_rows, rea_rows):
+    """Build the reanimation frame from NACA 6 and "Rea durchgeführt" elements"""
+    # NACA 6 cases
+    naca_df = naca_rows[naca_rows["value_2"] == "6"].copy()
+    naca_df["source_metric"] = "NACA 6"
 
-    # Process NACA 6 data
-    naca_df = pd.DataFrame()
-    if naca_docs:
-        naca_df = pd.DataFrame(naca_docs).explode("data").reset_index(drop=True)
-        naca_flat = pd.json_normalize(naca_df["data"])
-        naca_df = pd.concat([naca_df.drop(columns=["data"]), naca_flat], axis=1)
-        naca_df = naca_df[naca_df["value_1"] == "NACA"]
-        naca_df = naca_df[naca_df["value_2"] == "6"]
-        naca_df["source_metric"] = "NACA 6"
-
-    # Process reanimation data
-    rea_df = pd.DataFrame()
-    if rea_docs:
-        rea_df = pd.DataFrame(rea_docs).explode("data").reset_index(drop=True)
-        rea_flat = pd.json_normalize(rea_df["data"])
-        rea_df = pd.concat([rea_df.drop(columns=["data"]), rea_flat], axis=1)
-        rea_df = rea_df[rea_df["value_1"] == "Rea durchgeführt"]
-        rea_df["source_metric"] = "Reanimation field"
+    # Explicit reanimation field
+    rea_df = rea_rows.copy()
+    rea_df["source_metric"] = "Reanimation field"
 
     # Combine both sources
     combined_dfs = []
@@ -252,21 +277,9 @@ def get_reanimation(db, limit=10000):
     df = pd.concat(combined_dfs, ignore_index=True)
 
     df["metric"] = "Reanimation"
-    df["rea_status"] = df.apply(
-        lambda row: (
-            "Ja"
-            if row["source_metric"] == "NACA 6"
-            or (
-                row["source_metric"] == "Reanimation field"
-                and row.get("value_2") == "ja"
-            )
-            else "Nein"
-        ),
-        axis=1,
+    df["rea_status"] = (df["source_metric"] == "NACA 6") | (
+        (df["source_metric"] == "Reanimation field") & (df["value_2"] == "ja")
     )
-    df["rea_status"] = df["rea_status"].apply(
-        ja_nein_to_bool
-    )  # Explicitly convert "Ja"/"Nein" to boolean
     df["timestamp"] = df.get("timeStamp")
     df["source"] = df.get("source")
     df["collection"] = "protocols_results"
@@ -283,14 +296,14 @@ def get_reanimation(db, limit=10000):
     return df[keep]
 
 
-def get_reanimation_with_targetDestination(db, limit=10000):
+def get_reanimation_with_targetDestination(db, limit=10000, filters=None):
     """
     Load reanimation data and merge with index data to get target destination
     Only returns cases where reanimation was performed (rea_status = True)
     Handles duplicate protocol IDs by keeping only the most recent entry
     """
     # Get reanimation data
-    df_rea = get_reanimation(db, limit=limit)
+    df_rea = get_reanimation(db, limit=limit, filters=filters)
 
     if df_rea.empty:
         # Return empty DataFrame with expected columns if no reanimation data
@@ -1,6 +1,10 @@
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Any, Optional
 
+from .pipelines import build_element_pipeline
+from .query_filters import build_match
+
 # Flipped vitals dictionary - collection names to API shortcodes
 VITALS = {
     "af": "af",
@@ -16,7 +20,7 @@ VITALS = {
 }
 
 
-def get_vitals(db, vital, limit=10000):
+def get_vitals(db, vital, limit=10000, filters=None):
     """Load vital signs from vitals collection"""
     # Find the collection name for the given vital shortcode
     collection_name = None
@@ -29,7 +33,7 @@ def get_vitals(db, vital, limit=10000):
         return pd.DataFrame()
 
     # Query the appropriate vitals collection
-    query = {}  # No specific query filter needed
+    query = build_match(filters)
     try:
         collection = db[f"vitals_{collection_name}"]
         docs = list(collection.find(query, limit=limit))
@@ -94,3 +98,126 @@ def get_vitals(db, vital, limit=10000):
             f"Error loading vital {vital} from collection vitals_{collection_name}: {e}"
         )
         return pd.DataFrame()
+
+
+# Findings metrics that can be counted alongside the vitals collections
+FINDINGS_VITALS = ["GCS"]
+
+VITAL_COUNT_COLUMNS = ["protocolId", "metric", "count"]
+
+
+def _count_pipeline(vital, filters, limit):
+    """Build a pipeline counting the measurements of one vital per protocol"""
+    if vital in FINDINGS_VITALS:
+        # One row per matching findings element
+        pipeline = build_element_pipeline(
+            {"description": vital}, [], filters=filters, limit=limit
+        )
+        count = 1
+    else:
+        pipeline = [{"$match": build_match(filters)}]
+        if limit:
+            pipeline.append({"$limit": limit})
+        # Documents either hold a "data" array of measurements or one measurement
+        count = {"$cond": [{"$isArray": "$data"}, {"$size": "$data"}, 1]}
+
+    pipeline.append({"$group": {"_id": "$protocolId", "count": {"$sum": count}}})
+    return pipeline
+
+
+def _count_vital(db, vital, limit, filters):
+    """Count the measurements of one vital per protocol inside MongoDB"""
+    if vital in FINDINGS_VITALS:
+        collection = db.protocols_findings
+    else:
+        collection_name = next(
+            (coll for coll, code in VITALS.items() if code == vital), None
+        )
+        if not collection_name:
+            return pd.DataFrame(columns=VITAL_COUNT_COLUMNS)
+        collection = db[f"vitals_{collection_name}"]
+
+    try:
+        rows = list(
+            collection.aggregate(
+                _count_pipeline(vital, filters, limit), allowDiskUse=True
+            )
+        )
+    except Exception as e:
+        print(f"Error counting vital {vital}: {e}")
+        return pd.DataFrame(columns=VITAL_COUNT_COLUMNS)
+
+    if not rows:
+        return pd.DataFrame(columns=VITAL_COUNT_COLUMNS)
+
+    df = pd.DataFrame(rows).rename(columns={"_id": "protocolId"})
+    df["metric"] = vital
+    return df[VITAL_COUNT_COLUMNS]
+
+
+def get_vital_counts(db, vitals, limit=None, filters=None, max_workers=None):
+    """
+    Count measurements per protocol for several vitals, computed in MongoDB
+
+    Parameters:
+    - db: MongoDB database connection (shared, thread-safe client)
+    - vitals: Vital shortcodes (see VITALS) and/or findings metrics like "GCS"
+    - limit: Optional maximum number of documents per collection
+    - filters: Optional common filter spec, usually the candidate protocol_ids
+    - max_workers: Size of the thread pool (defaults to one thread per vital)
+
+    Returns a long frame with protocolId, metric (categorical) and count.
+    """
+    vitals = list(dict.fromkeys(vitals))
+    if not vitals:
+        return pd.DataFrame(columns=VITAL_COUNT_COLUMNS)
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(vitals)) as executor:
+        frames = list(
+            executor.map(lambda vital: _count_vital(db, vital, limit, filters), vitals)
+        )
+
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        df = pd.DataFrame(columns=VITAL_COUNT_COLUMNS)
+    else:
+        df = pd.concat(frames, ignore_index=True)
+
+    df["metric"] = pd.Categorical(df["metric"], categories=vitals)
+    df["count"] = df["count"].astype(int)
+    return df
+
+
+def build_count_table(counts, protocol_ids, vitals=None):
+    """
+    Pivot long measurement counts into one row per protocol
+
+    Parameters:
+    - counts: Frame from get_vital_counts (protocolId, metric, count)
+    - protocol_ids: Protocols that make up the rows; missing counts become 0
+    - vitals: Optional column order, defaults to the metric categories
+
+    Returns protocolId plus one "<vital>_count" column per vital.
+    """
+    if vitals is None:
+        vitals = list(counts["metric"].cat.categories)
+
+    wide = counts.pivot_table(
+        index="protocolId",
+        columns="metric",
+        values="count",
+        aggfunc="sum",
+        observed=False,
+    ).reindex(columns=vitals)
+
+    # Object dtype keeps the merge key compatible with the pivot index even
+    # when no protocols are selected
+    table = pd.DataFrame({"protocolId": pd.Series(list(protocol_ids), dtype=object)})
+    if table.empty:
+        for vital in vitals:
+            table[vital] = pd.Series(dtype=int)
+    else:
+        wide.index = wide.index.astype(object)
+        table = table.merge(wide, left_on="protocolId", right_index=True, how="left")
+        table[vitals] = table[vitals].fillna(0).astype(int)
+    return table.rename(columns={vital: f"{vital.lower()}_count" for vital in vitals})
@@ -0,0 +1,129 @@
+import html
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Marker shape per STATUS_BEI_ALARMIERUNG; other statuses get a small circle
+STATUS_SHAPES = {
+    "1 Einsatzbereit Funk": "triangle",
+    "2 Einsatzbereit Wache": "circle",
+}
+
+# Popup lines of a mission marker: label -> column
+POPUP_FIELDS = {
+    "AUFTRAGS_NR:": "AUFTRAGS_NR",
+    "Datum": "EINSATZDATUM",
+    "Stichwort": "SZENARIO_BEGINN",
+    "CDUS_CODE:": "CEDUS_CODE",
+}
+
+# Leaflet callback of folium.plugins.FastMarkerCluster. Each data row is
+# [lat, lon, color, shape, popup html, tooltip]; the marker styles are the
+# ones of the former per-mission folium markers.
+MISSION_MARKER_CALLBACK = """
+function (row) {
+    var latlng = new L.LatLng(row[0], row[1]);
+    var color = row[2];
+    var marker;
+    if (row[3] === "triangle") {
+        marker = L.marker(latlng, {icon: L.divIcon({
+            className: "",
+            html: '<div style="width: 0; height: 0; ' +
+                'border-left: 8px solid transparent; ' +
+                'border-right: 8px solid transparent; ' +
+                'border-bottom: 16px solid ' + color + ';"></div>'
+        })});
+    } else {
+        marker = L.circleMarker(latlng, {
+            radius: row[3] === "circle" ? 6 : 4,
+            color: color,
+            fill: true,
+            fillColor: color,
+            fillOpacity: 0.9
+        });
+    }
+    marker.bindPopup(row[4]);
+    marker.bindTooltip(row[5]);
+    return marker;
+}
+"""
+
+# Clusters dissolve into the styled single markers when zoomed in
+MISSION_CLUSTER_OPTIONS = {
+    "disableClusteringAtZoom": 14,
+    "chunkedLoading": True,
+    "spiderfyOnMaxZoom": False,
+}
+
+
+def _escaped(values, missing="N/A"):
+    """Column values as HTML-escaped strings, missing ones replaced"""
+    return (
+        values.astype("object")
+        .where(values.notna(), missing)
+        .map(lambda value: html.escape(str(value)))
+    )
+
+
+def mission_marker_data(points_df, color_map, default_color="red"):
+    """
+    Marker rows of mission locations for MISSION_MARKER_CALLBACK
+
+    Parameters:
+    - points_df: Missions with latitude, longitude, EINSATZMITTEL and the
+      optional STATUS_BEI_ALARMIERUNG and POPUP_FIELDS columns
+    - color_map: Dict vehicle -> marker color
+
+    Returns a list of [lat, lon, color, shape, popup html, tooltip], built
+    column-wise; rows without coordinates are skipped.
+    """
+    points_df = points_df.dropna(subset=["latitude", "longitude"])
+    if points_df.empty:
+        return []
+
+    index = points_df.index
+    statuses = (
+        points_df["STATUS_BEI_ALARMIERUNG"]
+        if "STATUS_BEI_ALARMIERUNG" in points_df.columns
+        else pd.Series(None, index=index, dtype=object)
+    )
+    colors = points_df["EINSATZMITTEL"].map(color_map).fillna(default_color)
+    shapes = statuses.map(STATUS_SHAPES).fillna("small")
+
+    vehicle_text = _escaped(points_df["EINSATZMITTEL"])
+    popups = "<b>Fahrzeug:</b> " + vehicle_text + "<br>"
+    for label, column in POPUP_FIELDS.items():
+        values = (
+            _escaped(points_df[column])
+            if column in points_df.columns
+            else pd.Series("N/A", index=index)
+        )
+        popups += f"<b>{label}</b> " + values + "<br>"
+    popups += (
+        "<b>Lat:</b> "
+        + points_df["latitude"].map("{:.4f}".format)
+        + "<br><b>Lon:</b> "
+        + points_df["longitude"].map("{:.4f}".format)
+    )
+    tooltips = vehicle_text + " - " + _escaped(statuses, "Unknown")
+
+    rows = np.empty((len(points_df), 6), dtype=object)
+    rows[:, 0] = points_df["latitude"].to_numpy(dtype=float)
+    rows[:, 1] = points_df["longitude"].to_numpy(dtype=float)
+    rows[:, 2] = colors.to_numpy()
+    rows[:, 3] = shapes.to_numpy()
+    rows[:, 4] = popups.to_numpy()
+    rows[:, 5] = tooltips.to_numpy()
+    return rows.tolist()
+
+
+@st.cache_data(ttl=604800, show_spinner=False)
+def cached_mission_marker_data(points_df, color_items):
+    """
+    Cached mission_marker_data for reruns with an unchanged filter selection
+
+    Pass only the columns the markers use and the color map as a tuple of
+    (vehicle, color) pairs.
+    """
+    return mission_marker_data(points_df, dict(color_items))
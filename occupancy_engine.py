@@ -0,0 +1,371 @@
+import numpy as np
+import pandas as pd
+
+# Weekday groups of the S-KTW utilization analysis: weekday number -> group
+WEEKDAY_GROUPS = {
+    0: "Mon-Thu",
+    1: "Mon-Thu",
+    2: "Mon-Thu",
+    3: "Mon-Thu",
+    4: "Fri",
+    5: "Sat",
+    6: "Sun",
+}
+WEEKDAY_GROUP_ORDER = ["Mon-Thu", "Fri", "Sat", "Sun"]
+
+# Timezone-aware timestamps are binned in local wall-clock time
+LOCAL_TIMEZONE = "Europe/Berlin"
+
+
+def _local_times(values):
+    """Timestamps as naive local datetime64[ns], NaT where missing or unparsable"""
+    times = pd.DatetimeIndex(pd.to_datetime(values, errors="coerce"))
+    if times.tz is not None:
+        times = times.tz_convert(LOCAL_TIMEZONE).tz_localize(None)
+    return times.as_unit("ns").to_numpy()
+
+
+def _hours_after(origin, hours):
+    """datetime64[s] timestamps a number of hours after origin"""
+    seconds = np.round(np.asarray(hours) * 3600).astype("int64")
+    return origin + seconds.astype("timedelta64[s]")
+
+
+def _percentage(part, total):
+    """part / total in percent, 0 where total is not positive"""
+    return (part / total * 100).where(total > 0, 0.0)
+
+
+def _difference(total, part):
+    """total - part of sums over the same hours, without float noise"""
+    # Adding 0.0 turns the -0.0 of clipped values into 0.0
+    return (total - part).round(6).clip(0) + 0.0
+
+
+def _stride(*arrays):
+    """Offset per key that moves every key's values past those of the previous key"""
+    values = [a for a in arrays if len(a)]
+    if not values:
+        return 1.0
+    low = min(a.min() for a in values)
+    high = max(a.max() for a in values)
+    return float(high - low) + 1.0
+
+
+def merge_intervals(keys, starts, ends):
+    """
+    Union of the intervals of each key with one sort and a running maximum
+
+    Parameters:
+    - keys: Integer key (e.g. vehicle code) per interval
+    - starts, ends: Interval bounds as numbers (e.g. seconds), ends > starts
+
+    Returns (keys, starts, ends) of the disjoint busy blocks, sorted by key and
+    start. Overlapping or touching intervals of a key become one block.
+    """
+    keys = np.asarray(keys)
+    starts = np.asarray(starts, dtype="float64")
+    ends = np.asarray(ends, dtype="float64")
+    if not len(keys):
+        return keys, starts, ends
+
+    order = np.lexsort((starts, keys))
+    keys, starts, ends = keys[order], starts[order], ends[order]
+
+    # Shifting each key by the stride lets one global running maximum restart
+    # at every key
+    shift = keys * _stride(starts, ends)
+    running_end = np.maximum.accumulate(ends + shift) - shift
+
+    new_block = np.ones(len(keys), dtype=bool)
+    new_block[1:] = (keys[1:] != keys[:-1]) | (starts[1:] > running_end[:-1])
+    first = np.flatnonzero(new_block)
+    last = np.append(first[1:] - 1, len(keys) - 1)
+    return keys[first], starts[first], running_end[last]
+
+
+def binned_coverage(keys, starts, ends, n_keys, edges):
+    """
+    Covered length of each bin per key
+
+    Parameters:
+    - keys, starts, ends: Disjoint intervals sorted by key and start, as
+      returned by merge_intervals
+    - n_keys: Number of keys (codes 0..n_keys-1)
+    - edges: Increasing bin edges
+
+    Returns an (n_keys, len(edges) - 1) array. The covered length up to every
+    edge is looked up in the cumulative interval lengths with one searchsorted.
+    """
+    edges = np.asarray(edges, dtype="float64")
+    if not len(keys):
+        return np.zeros((n_keys, max(len(edges) - 1, 0)))
+
+    stride = _stride(starts, ends, edges)
+    shifted_starts = starts + keys * stride
+    shifted_ends = ends + keys * stride
+    covered_before = np.concatenate(([0.0], np.cumsum(ends - starts)))
+
+    points = edges[None, :] + (np.arange(n_keys) * stride)[:, None]
+    i = np.searchsorted(shifted_starts, points, side="right") - 1
+    safe = np.maximum(i, 0)
+    covered = np.where(
+        i >= 0,
+        covered_before[safe]
+        + np.minimum(points, shifted_ends[safe])
+        - shifted_starts[safe],
+        0.0,
+    )
+    # Earlier keys add the same constant to all points of a key; it cancels here
+    return np.diff(covered, axis=1)
+
+
+def concurrent_counts(keys, starts, ends):
+    """
+    Number of intervals of the same key running at each interval's start,
+    the interval itself included (sweep over the sorted start and end times)
+    """
+    keys = np.asarray(keys)
+    starts = np.asarray(starts, dtype="float64")
+    ends = np.asarray(ends, dtype="float64")
+    if not len(keys):
+        return np.zeros(0, dtype=int)
+
+    shift = keys * _stride(starts, ends)
+    at = starts + shift
+    started = np.searchsorted(np.sort(at), at, side="right")
+    ended = np.searchsorted(np.sort(ends + shift), at, side="right")
+    return started - ended
+
+
+def intersect_intervals(keys_a, starts_a, ends_a, keys_b, starts_b, ends_b):
+    """
+    Intersection of two sets of intervals of each key
+
+    Both sets must be disjoint per key (e.g. from merge_intervals). One sweep
+    over all bounds: where both sets cover a point the running level is 2.
+
+    Returns (keys, starts, ends) of the intersection, sorted by key and start.
+    """
+    keys = np.concatenate([keys_a, keys_a, keys_b, keys_b]).astype(int)
+    points = np.concatenate([starts_a, ends_a, starts_b, ends_b]).astype("float64")
+    if not len(keys):
+        return keys, points, points
+
+    steps = np.concatenate(
+        [
+            np.ones(len(starts_a), dtype=int),
+            -np.ones(len(ends_a), dtype=int),
+            np.ones(len(starts_b), dtype=int),
+            -np.ones(len(ends_b), dtype=int),
+        ]
+    )
+    shift = keys * _stride(points)
+    # Ends sort before starts at the same point, so touching intervals of the
+    # two sets do not produce empty overlaps
+    order = np.lexsort((steps, points + shift))
+    level = np.cumsum(steps[order])
+
+    inside = np.flatnonzero(level[:-1] == 2)
+    keys, points = keys[order], points[order]
+    overlap_keys = keys[inside]
+    overlap_starts = points[inside]
+    overlap_ends = points[inside + 1]
+    keep = overlap_ends > overlap_starts
+    return overlap_keys[keep], overlap_starts[keep], overlap_ends[keep]
+
+
+class Occupancy:
+    """
+    Busy time of vehicles over a date range, computed from mission intervals
+
+    All vehicles are processed at once with sort-based sweeps. Overlapping
+    missions of one vehicle count once towards its busy time.
+
+    Attributes:
+    - vehicles: Vehicle names, the first axis of all arrays
+    - days: DatetimeIndex of the calendar days of the range
+    - busy: (vehicles, days, 24) busy hours in every hour of every day
+    - missions: (vehicles, days) missions started per day; missions that began
+      before the range count on its first day
+    - mission_hours: (vehicles,) summed mission durations, overlaps included
+    - max_concurrent: (vehicles,) most missions of a vehicle at the same time
+    - concurrent: Missions of the vehicle running at each mission's start,
+      aligned to the input rows (0 for rows without a valid interval)
+    - gap_vehicle, gap_start, gap_end: Idle gaps between consecutive busy
+      blocks, as vehicle positions and datetime64 bounds
+    - available: (vehicles, days, 24) hours on duty, only with shifts
+    - busy_on_shift: (vehicles, days, 24) busy hours within the shifts; equals
+      busy without shifts
+    """
+
+    def __init__(
+        self, vehicles, starts, ends, start_date, end_date, names=None, shifts=None
+    ):
+        """
+        Parameters:
+        - vehicles, starts, ends: Vehicle and start/end timestamps per mission
+        - start_date, end_date: Inclusive date range; missions are clipped to it
+        - names: Optional vehicles to report, in this order; others are ignored
+        - shifts: Optional shift_calendar.ShiftCalendar of the same vehicles
+          and date range
+        """
+        vehicles = pd.Series(vehicles, dtype="object").to_numpy()
+        starts = _local_times(starts)
+        ends = _local_times(ends)
+
+        self.vehicles = (
+            list(names)
+            if names is not None
+            else sorted({v for v in vehicles if pd.notna(v)})
+        )
+        self.days = pd.date_range(start_date, end_date, freq="D", normalize=True)
+        origin = self.days[0].to_datetime64() if len(self.days) else None
+        n_vehicles, n_days = len(self.vehicles), len(self.days)
+
+        codes = pd.Index(self.vehicles).get_indexer(vehicles)
+        valid = (codes >= 0) & ~np.isnat(starts) & ~np.isnat(ends) & (ends > starts)
+        hour = np.timedelta64(1, "h")
+
+        self.concurrent = np.zeros(len(vehicles), dtype=int)
+        if n_days:
+            # Hours since the start of the range, clipped to the range
+            start_hours = (starts - origin) / hour
+            end_hours = (ends - origin) / hour
+            valid &= (end_hours > 0) & (start_hours < n_days * 24)
+            start_hours = np.clip(start_hours[valid], 0, n_days * 24)
+            end_hours = np.clip(end_hours[valid], 0, n_days * 24)
+        else:
+            valid[:] = False
+            start_hours = end_hours = np.zeros(0)
+        codes = codes[valid]
+
+        self.mission_hours = np.bincount(
+            codes, weights=end_hours - start_hours, minlength=n_vehicles
+        )
+        self.concurrent[valid] = concurrent_counts(codes, start_hours, end_hours)
+        self.max_concurrent = np.zeros(n_vehicles, dtype=int)
+        np.maximum.at(self.max_concurrent, codes, self.concurrent[valid])
+
+        start_days = np.floor(start_hours / 24).astype(int)
+        self.missions = np.zeros((n_vehicles, n_days), dtype=int)
+        np.add.at(self.missions, (codes, np.minimum(start_days, n_days - 1)), 1)
+
+        block_keys, block_starts, block_ends = merge_intervals(
+            codes, start_hours, end_hours
+        )
+        edges = np.arange(n_days * 24 + 1, dtype="float64")
+        self.busy = binned_coverage(
+            block_keys, block_starts, block_ends, n_vehicles, edges
+        ).reshape(n_vehicles, n_days, 24)
+
+        self.available = None
+        self.busy_on_shift = self.busy
+        if shifts is not None:
+            self.available = shifts.available
+            on_shift = intersect_intervals(
+                block_keys,
+                block_starts,
+                block_ends,
+                shifts.keys,
+                shifts.starts,
+                shifts.ends,
+            )
+            self.busy_on_shift = binned_coverage(*on_shift, n_vehicles, edges).reshape(
+                n_vehicles, n_days, 24
+            )
+
+        same_vehicle = block_keys[1:] == block_keys[:-1]
+        self.gap_vehicle = block_keys[1:][same_vehicle]
+        if n_days:
+            self.gap_start = _hours_after(origin, block_ends[:-1][same_vehicle])
+            self.gap_end = _hours_after(origin, block_starts[1:][same_vehicle])
+        else:
+            self.gap_start = self.gap_end = np.zeros(0, dtype="datetime64[s]")
+
+    def busy_by_day(self):
+        """(vehicles, days) busy hours per calendar day"""
+        return self.busy.sum(axis=2)
+
+    def busy_by_hour_of_day(self):
+        """(vehicles, 24) busy hours per hour of the day over the whole range"""
+        return self.busy.sum(axis=1)
+
+    def weekday_groups(self):
+        """Weekday group of every day of the range"""
+        return self.days.dayofweek.map(WEEKDAY_GROUPS)
+
+    def days_per_weekday_group(self):
+        """Number of days of the range in each weekday group"""
+        groups = pd.Series(self.weekday_groups()).value_counts()
+        return groups.reindex(WEEKDAY_GROUP_ORDER, fill_value=0)
+
+    def by_weekday_group(self, per_day):
+        """Sum a (vehicles, days) array into a vehicles x weekday group frame"""
+        frame = pd.DataFrame(per_day.T, columns=self.vehicles)
+        grouped = frame.groupby(np.asarray(self.weekday_groups())).sum()
+        return grouped.reindex(WEEKDAY_GROUP_ORDER, fill_value=0).T
+
+    def summary(self):
+        """
+        Busy hours, summed mission hours, overlap and concurrency per vehicle;
+        with shifts also the busy hours on duty, available hours and utilization
+        """
+        busy_hours = self.busy.sum(axis=(1, 2))
+        summary = pd.DataFrame(
+            {
+                "busy_hours": busy_hours,
+                "mission_hours": self.mission_hours,
+                "overlap_hours": _difference(self.mission_hours, busy_hours),
+                "missions": self.missions.sum(axis=1),
+                "max_concurrent": self.max_concurrent,
+            },
+            index=pd.Index(self.vehicles, name="vehicle"),
+        )
+        if self.available is not None:
+            summary["on_shift_hours"] = self.busy_on_shift.sum(axis=(1, 2))
+            summary["available_hours"] = self.available.sum(axis=(1, 2))
+            summary["utilization_pct"] = _percentage(
+                summary["on_shift_hours"], summary["available_hours"]
+            )
+        return summary
+
+    def utilization_by_weekday_group(self):
+        """
+        Available and busy hours on duty per vehicle and weekday group
+
+        Returns one row per vehicle and group with available_hours,
+        actual_hours (busy within the shifts), off_shift_hours and percentage.
+        Without shifts available_hours is missing.
+        """
+        actual = self.by_weekday_group(self.busy_on_shift.sum(axis=2))
+        busy = self.by_weekday_group(self.busy_by_day())
+        result = pd.DataFrame(
+            {
+                "available_hours": (
+                    self.by_weekday_group(self.available.sum(axis=2)).stack()
+                    if self.available is not None
+                    else np.nan
+                ),
+                "actual_hours": actual.stack(),
+                "off_shift_hours": _difference(busy, actual).stack(),
+            }
+        )
+        result["percentage"] = _percentage(
+            result["actual_hours"], result["available_hours"]
+        )
+        return result.rename_axis(["vehicle", "group"]).reset_index()
+
+    def gaps(self):
+        """Idle gaps between the busy blocks of each vehicle"""
+        gaps = pd.DataFrame(
+            {
+                "vehicle": np.asarray(self.vehicles, dtype=object)[self.gap_vehicle],
+                "gap_start": self.gap_start,
+                "gap_end": self.gap_end,
+            }
+        )
+        gaps["gap_hours"] = (
+            gaps["gap_end"] - gaps["gap_start"]
+        ).dt.total_seconds() / 3600
+        return gaps
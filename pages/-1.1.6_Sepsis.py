@@ -2,9 +2,9 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-import numpy as np
 from data_loading import data_loading
-import datetime
+from interval_engine import add_intervals, TRACER_INTERVALS
+from interval_statistics import cached_interval_statistics, INTERVAL_LABELS
 from auth import check_authentication, logout
 
 # Authentication check
@@ -142,41 +142,8 @@ if selected_years and "Jahr" in filtered_df.columns:
 st.write(f"Anzahl gefilterte Einsätze: {len(filtered_df)}")
 
 
-# Funktion zum sicheren Berechnen von Zeitintervallen
-def calculate_time_diff_minutes(row, start_col, end_col):
-    try:
-        if pd.notnull(row[start_col]) and pd.notnull(row[end_col]):
-            delta = row[end_col] - row[start_col]
-            if isinstance(delta, datetime.timedelta):
-                return delta.total_seconds() / 60
-            return None
-        return None
-    except:
-        return None
-
-
-# Berechne Zeitintervalle auf sichere Weise
-filtered_df["ReaktionsIntervall"] = filtered_df.apply(
-    lambda row: calculate_time_diff_minutes(row, "StatusAlarm", "Status4"), axis=1
-)
-filtered_df["VersorgungsIntervall"] = filtered_df.apply(
-    lambda row: calculate_time_diff_minutes(row, "Status4", "Status7"), axis=1
-)
-filtered_df["TransportIntervall"] = filtered_df.apply(
-    lambda row: calculate_time_diff_minutes(row, "Status7", "Status8"), axis=1
-)
-filtered_df["PraehospitalIntervall"] = filtered_df.apply(
-    lambda row: calculate_time_diff_minutes(row, "StatusAlarm", "Status8"), axis=1
-)
-
-# Entferne negative Werte und Ausreißer
-for col in [
-    "ReaktionsIntervall",
-    "VersorgungsIntervall",
-    "TransportIntervall",
-    "PraehospitalIntervall",
-]:
-    filtered_df = filtered_df[(filtered_df[col].isna()) | (filtered_df[col] >= 0)]
+# Berechne Zeitintervalle vektorisiert und entferne negative Werte
+filtered_df = add_intervals(filtered_df, TRACER_INTERVALS)
 
 # Qualitätsziel und Rationale mit Markdown
 st.markdown(
@@ -241,44 +208,14 @@ else:
     # Ausführliche Statistiken
     st.markdown("### Detaillierte Statistiken")
 
-    # Funktion zur Berechnung der Perzentile (mit Fehlerbehandlung)
-    def calculate_percentiles(series):
-        series = series.dropna()
-        if len(series) == 0:
-            return {
-                "10%": None,
-                "25%": None,
-                "50% (Median)": None,
-                "75%": None,
-                "90%": None,
-            }
-        return {
-            "10%": np.percentile(series, 10),
-            "25%": np.percentile(series, 25),
-            "50% (Median)": np.percentile(series, 50),
-            "75%": np.percentile(series, 75),
-            "90%": np.percentile(series, 90),
-        }
-
-    # Perzentile berechnen
-    stats_praehospital = calculate_percentiles(valid_data["PraehospitalIntervall"])
-    stats_reaktion = calculate_percentiles(valid_data["ReaktionsIntervall"])
-    stats_versorgung = calculate_percentiles(valid_data["VersorgungsIntervall"])
-    stats_transport = calculate_percentiles(valid_data["TransportIntervall"])
-
-    # Daten für Tabelle
-    stats_df = pd.DataFrame(
-        {
-            "Prähospitalintervall": stats_praehospital,
-            "Reaktionsintervall": stats_reaktion,
-            "Versorgungsintervall": stats_versorgung,
-            "Transportintervall": stats_transport,
-        }
-    )
+    # Perzentile aller Intervalle in einem Durchlauf berechnen (gecacht)
+    interval_columns = list(INTERVAL_LABELS.keys())
+    stats_df = cached_interval_statistics(
+        valid_data[interval_columns], interval_columns
+    ).rename(columns=INTERVAL_LABELS)
 
-    # Konvertiere zu Floats und runde (mit Fehlerbehandlung)
-    for col in stats_df.columns:
-        stats_df[col] = pd.to_numeric(stats_df[col], errors="coerce").round(1)
+    # Auf eine Nachkommastelle runden
+    stats_df = stats_df.round(1)
 
     # Statistik-Tabelle anzeigen
     st.dataframe(stats_df, use_container_width=True)
@@ -356,14 +293,13 @@ else:
 
                 if len(monthly_data) > 0:
                     monthly_stats = (
-                        monthly_data.groupby("Month")["PraehospitalIntervall"]
-                        .agg(
-                            [
-                                ("Median", "median"),
-                                ("25%", lambda x: np.percentile(x, 25)),
-                                ("75%", lambda x: np.percentile(x, 75)),
-                            ]
-                        )
+                        cached_interval_statistics(
+                            monthly_data[["Month", "PraehospitalIntervall"]],
+                            ["PraehospitalIntervall"],
+                            by="Month",
+                        )["PraehospitalIntervall"]
+                        .unstack()
+                        .rename(columns={"50% (Median)": "Median"})
                         .reset_index()
                     )
 
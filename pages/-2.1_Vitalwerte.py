@@ -3,7 +3,8 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
-from data_loading import data_loading
+from data_loading import data_loading, vital_counts_loading
+from loaders import build_count_table
 import datetime
 from auth import check_authentication, logout
 
@@ -22,11 +23,6 @@ st.sidebar.write(f'Willkommen *{st.session_state["name"]}*')
 
 # Now load data after authentication
 df_index = data_loading("Index")
-gcs_df = data_loading("GCS")
-bd_df = data_loading("bd")
-hf_df = data_loading("hf")
-spo2_df = data_loading("spo2")
-af_df = data_loading("af")
 # auch noch geburtsdatum des patienten laden
 
 st.write("was sind genau die Tracer-Diagnosen? Eckpunktepapier?")
@@ -90,27 +86,12 @@ st.write(f"Gesamtzahl der Protokolle: {len(protokoll_ids)}")
 
 
 # 1. Für jedes Vitalzeichen zählen, wie viele Messungen pro Protokoll existieren
-def count_measurements_per_protocol(df, name):
-    counts = df.groupby("protocolId").size().reset_index(name=f"{name}_count")
-    return counts
-
-
-gcs_counts = count_measurements_per_protocol(gcs_df, "gcs")
-bd_counts = count_measurements_per_protocol(bd_df, "bd")
-hf_counts = count_measurements_per_protocol(hf_df, "hf")
-spo2_counts = count_measurements_per_protocol(spo2_df, "spo2")
-af_counts = count_measurements_per_protocol(af_df, "af")
-
-# 2. Merge alle Zählungen
-all_counts = pd.DataFrame({"protocolId": protokoll_ids})
-all_counts = pd.merge(all_counts, gcs_counts, on="protocolId", how="left")
-all_counts = pd.merge(all_counts, bd_counts, on="protocolId", how="left")
-all_counts = pd.merge(all_counts, hf_counts, on="protocolId", how="left")
-all_counts = pd.merge(all_counts, spo2_counts, on="protocolId", how="left")
-all_counts = pd.merge(all_counts, af_counts, on="protocolId", how="left")
-
-# Fehlende Werte durch 0 ersetzen
-all_counts = all_counts.fillna(0)
+# (Zählung erfolgt in MongoDB, übertragen werden nur die Zählwerte)
+vitalzeichen = ["GCS", "bd", "hf", "spo2", "af"]
+vital_counts = vital_counts_loading(vitalzeichen, protokoll_ids.tolist())
+
+# 2. Zählungen den Protokollen zuordnen, fehlende Werte werden zu 0
+all_counts = build_count_table(vital_counts, protokoll_ids, vitalzeichen)
 
 # 3. Kriterien für die Erfüllung der Vitalwerte-Überwachung: mindestens 2 Messungen pro Vitalzeichen
 all_counts["gcs_erfuellt"] = all_counts["gcs_count"] >= 2
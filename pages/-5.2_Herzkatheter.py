@@ -1,7 +1,6 @@
-import pandas as pd
 import streamlit as st
-import ast
 from data_loading import data_loading
+from hospital_registry import check_hospital_eligibility, load_hospital_table
 from auth import check_authentication, logout
 
 # Authentication check
@@ -21,7 +20,7 @@ st.sidebar.write(f'Willkommen *{st.session_state["name"]}*')
 # Now load data after authentication
 
 # Load data
-df_krankenhaus = pd.read_csv("data/krankenhausDigagnosen.csv", sep=";")
+df_krankenhaus = load_hospital_table()
 st.write(df_krankenhaus)
 
 df_index = data_loading("Index")
@@ -61,81 +60,16 @@ Behandlungsverweigerung und Palliativsituationen
 )
 
 
-def check_hospital_eligibility(df_krankenhaus, df_index):
-    """
-    Check and display hospital eligibility for patient transports
-    """
-    # Create a dictionary for faster lookups
-    hospital_capabilities = {}
-
-    # Process hospital data
-    for _, row in df_krankenhaus.iterrows():
-        hospital_names = ast.literal_eval(row["Name"])
-        capabilities = {
-            "TIA / Schlaganfall": row["TIA / Schlaganfall"],
-            "ACS / STEMI /NSTEMI": row["ACS / STEMI /NSTEMI"],
-            "Reanimation": row["Reanimation"],
-            "Polytrauma": row["Polytrauma"],
-        }
-
-        # Add each name variant to the dictionary
-        for name in hospital_names:
-            hospital_capabilities[name.lower()] = capabilities
-
-    # Diagnosis mapping
-    diagnosis_map = {
-        "schlaganfall": "TIA / Schlaganfall",
-        "tia": "TIA / Schlaganfall",
-        "stemi": "ACS / STEMI /NSTEMI",
-        "nstemi": "ACS / STEMI /NSTEMI",
-        "acs": "ACS / STEMI /NSTEMI",
-        "herzinfarkt": "ACS / STEMI /NSTEMI",
-        "st-hebung": "ACS / STEMI /NSTEMI",
-        "sthebung": "ACS / STEMI /NSTEMI",
-        "reanimation": "Reanimation",
-        "Herz-Kreislauf-Stillstand": "Reanimation",
-        "polytrauma": "Polytrauma",
-        "schwerverletzt": "Polytrauma",
-    }
-
-    # Function to check individual transport
-    def check_transport(target, diagnosis):
-        if pd.isna(target) or pd.isna(diagnosis):
-            return False
-
-        target = target.strip().lower()
-        diagnosis_lower = diagnosis.lower()
-
-        # Find matching diagnosis category
-        matched_category = None
-        for key, category in diagnosis_map.items():
-            if key in diagnosis_lower:
-                matched_category = category
-                break
-
-        if not matched_category:
-            return False
-
-        # Check if any hospital name matches
-        for hospital_name, capabilities in hospital_capabilities.items():
-            if hospital_name in target or target in hospital_name:
-                return capabilities.get(matched_category, False)
-
-        return False
-
-    # Add eligibility column
-    df_index["hospital_eligible"] = df_index.apply(
-        lambda row: check_transport(
-            row.get("targetDestination", ""), row.get("leadingDiagnosis", "")
-        ),
-        axis=1,
-    )
-
-    return df_index
+# Page-specific diagnosis synonyms, checked with the shared keywords of their
+# category
+CARDIAC_KEYWORDS = (
+    ("st-hebung", "ACS / STEMI /NSTEMI"),
+    ("sthebung", "ACS / STEMI /NSTEMI"),
+)
 
 
 # Perform eligibility check
-df_checked = check_hospital_eligibility(df_krankenhaus, df_index)
+df_checked = check_hospital_eligibility(df_index, CARDIAC_KEYWORDS)
 
 # Analyze cardiac cases
 st.header("Analyse der STEMI/NSTEMI/ACS Fälle")
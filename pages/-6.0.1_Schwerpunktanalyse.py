@@ -4,7 +4,7 @@ from data_loading import data_loading
 import plotly.express as px
 import plotly.graph_objects as go
 from auth import check_authentication
-from data_helpers import analyze_freetext_requirements
+from data_helpers import classify_freetext_requirements
 
 # Authentication check
 if not check_authentication():
@@ -586,24 +586,9 @@ if not ktw_anamnesis_df.empty:
         st.error("❌ Neither 'content' nor 'text' column found in KTW anamnesis data.")
         st.stop()
 
-    # Use data helper to analyze freetext requirements
-    enhanced_requirements = analyze_freetext_requirements(ktw_anamnesis_df)
-
-    # Extract all categories
-    ktw_anamnesis_df["medical_care"] = enhanced_requirements.apply(
-        lambda x: x["medical_care"]
-    )
-    ktw_anamnesis_df["ktw_equipment"] = enhanced_requirements.apply(
-        lambda x: x["ktw_equipment"]
-    )
-    ktw_anamnesis_df["infectious_disease"] = enhanced_requirements.apply(
-        lambda x: x["infectious_disease"]
-    )
-    ktw_anamnesis_df["crew_assessment"] = enhanced_requirements.apply(
-        lambda x: x["crew_assessment"]
-    )
-    ktw_anamnesis_df["krankenfahrt_mentioned"] = enhanced_requirements.apply(
-        lambda x: x["krankenfahrt_mentioned"]
+    # Classify all texts at once; one categorical column per category
+    ktw_anamnesis_df = ktw_anamnesis_df.join(
+        classify_freetext_requirements(ktw_anamnesis_df)
     )
 
     # ===== DATA OVERVIEW STATISTICS =====
@@ -640,6 +625,7 @@ if not ktw_anamnesis_df.empty:
     # Create all pie charts first
     # Medical Care Pie Chart
     medical_counts = ktw_anamnesis_df["medical_care"].value_counts(dropna=False)
+    medical_counts = medical_counts[medical_counts > 0]
     medical_labels = []
     for x, v in medical_counts.items():
         if pd.isna(x):
@@ -664,6 +650,7 @@ if not ktw_anamnesis_df.empty:
 
     # KTW Equipment Pie Chart
     equipment_counts = ktw_anamnesis_df["ktw_equipment"].value_counts(dropna=False)
+    equipment_counts = equipment_counts[equipment_counts > 0]
     equipment_labels = []
     for x, v in equipment_counts.items():
         if pd.isna(x):
@@ -688,6 +675,7 @@ if not ktw_anamnesis_df.empty:
 
     # Infectious Disease Pie Chart
     infection_counts = ktw_anamnesis_df["infectious_disease"].value_counts(dropna=False)
+    infection_counts = infection_counts[infection_counts > 0]
     infection_labels = []
     for x, v in infection_counts.items():
         if pd.isna(x):
@@ -712,6 +700,7 @@ if not ktw_anamnesis_df.empty:
 
     # Crew Assessment Pie Chart
     crew_counts = ktw_anamnesis_df["crew_assessment"].value_counts(dropna=False)
+    crew_counts = crew_counts[crew_counts > 0]
     if crew_counts.sum() > 0:
         crew_labels = []
         for x, v in crew_counts.items():
@@ -794,19 +783,10 @@ if not ktw_anamnesis_df.empty:
     st.plotly_chart(fig_doc)
 
     # Categories needed per transport
-    def count_needed_categories(row):
-        count = 0
-        if row["medical_care"] == "indiziert":
-            count += 1
-        if row["ktw_equipment"] == "indiziert":
-            count += 1
-        if row["infectious_disease"] == "indiziert":
-            count += 1
-        return count
-
-    ktw_anamnesis_df["categories_needed"] = ktw_anamnesis_df.apply(
-        count_needed_categories, axis=1
-    )
+    ktw_anamnesis_df["categories_needed"] = (
+        ktw_anamnesis_df[["medical_care", "ktw_equipment", "infectious_disease"]]
+        == "indiziert"
+    ).sum(axis=1)
     categories_needed_dist = (
         ktw_anamnesis_df["categories_needed"].value_counts().sort_index()
     )
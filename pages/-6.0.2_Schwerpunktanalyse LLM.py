@@ -1,8 +1,14 @@
 import streamlit as st
 import pandas as pd
-import requests
-import json
 from data_loading import data_loading
+from llm_analysis import LLM_BATCH_SIZE, LLM_CONCURRENCY
+from llm_jobs import ACTIVE_STATES, get_job_runner
+from llm_prefilter import PREFILTER_SOURCE
+from text_clustering import (
+    NEAR_DUPLICATE_THRESHOLD,
+    cluster_near_duplicates,
+    cluster_statistics,
+)
 
 from auth import check_authentication
 
@@ -10,161 +16,261 @@ if not check_authentication():
     st.warning("Bitte melden Sie sich an, um auf diese Seite zuzugreifen.")
     st.stop()
 
-import os
+# Background runner of the LLM analysis jobs (shared by all sessions)
+job_runner = get_job_runner()
+
+JOB_STATUS_LABELS = {
+    "queued": "wartet",
+    "running": "läuft",
+    "stopped": "angehalten",
+    "failed": "unvollständig",
+    "done": "abgeschlossen",
+}
+
+
+def show_prefilter_stats(stats):
+    """Show the LLM calls saved by the rule-based pre-check of a job"""
+    if stats:
+        st.info(f"⚡ Regelbasierte Vorprüfung: {stats['skipped']} von "
+                f"{stats['total']} Texten ohne Hinweise, "
+                f"{stats['skipped']} LLM-Aufrufe gespart "
+                f"({stats['seconds']:.2f} s).")
+
+
+def render_results(results_df, prefilter_stats=None):
+    """Show the structured analysis results with summary and distribution charts"""
+    # Display results in a dataframe
+    st.subheader("📊 Strukturierte Analyse-Ergebnisse")
+    show_prefilter_stats(prefilter_stats)
+    st.dataframe(results_df)
+    if "repraesentant_id" in results_df.columns:
+        copied_count = results_df["repraesentant_id"].notna().sum()
+        if copied_count:
+            st.caption(f"{copied_count} Ergebnisse wurden von einem Beinahe-Duplikat "
+                       "übernommen: repraesentant_id und repraesentant_text nennen den "
+                       "analysierten Einsatz, aehnlichkeit_repraesentant die geschätzte "
+                       "Ähnlichkeit. Bitte stichprobenartig prüfen.")
+
+    # The rule-based pre-check only decides the yes/no findings; Hilfebedarf
+    # and medical problems are only known for texts the LLM has read
+    if "analyse_quelle" in results_df.columns:
+        llm_df = results_df[results_df["analyse_quelle"] != PREFILTER_SOURCE]
+    else:
+        llm_df = results_df
+    prechecked_count = len(results_df) - len(llm_df)
 
-# LLM Configuration
-LLM_BASE_URL = os.getenv("LLM_BASE_URL")
+    # Summary statistics
+    st.subheader("📈 Zusammenfassung")
 
-def analyze_medical_text(text_content, protocol_id=None):
-    """Send medical text to local LLM for structured analysis"""
-    try:
-        prompt = f"""
-        Analysiere diesen Anamnesetext und gib eine strukturierte Analyse zurück.
-
-        TEXT: {text_content}
-
-        Gib deine Antwort als einfache Textzeilen mit diesem Format:
-
-        Erklärung: Wurde in dem Anamnesetext ein Übergriff auf Einsatzkräfte beschrieben?
-        UEBERGRIF_VORHANDEN: [ja/nein]
-        UEBERGRIF_ART: [verbal/koerperlich/sexuell/keine]
-        UEBERGRIF_TEXTBELEG: [konkreter Text aus dem Anamnesetext oder "kein"]
-
-        Erklärung: Wurden Maßnahmen, Untersuchungen oder Transport verweigert?
-        VERWEIGERUNG_VORHANDEN: [ja/nein]
-        VERWEIGERUNG_MASSNAHME: [konkrete abgelehnte Maßnahme oder "keine"]
-        VERWEIGERUNG_BEGRUENDUNG: [konkreter Grund oder "kein"]
-
-        Erklärung: Welche maßnahmen wurden durchgeführt?
-        HILFEBEDARF_TYP: [medizinisch/pflegerisch/aufstehhilfe/unbekannt]
-        HILFEBEDARF_BESCHREIBUNG: [kurze Beschreibung oder "keine"]
-
-        Erklärung: Liegt ein akutes Rettungsdienstliches Problem vor? (keine chronischen Krankheiten)
-        MEDIZINISCHES_PROBLEM_BESCHREIBUNG: [konkrete Beschreibung oder "kein Problem"]
-        MEDIZINISCHES_PROBLEM_KATEGORIE: [kardiovaskulär/respiratorisch/neurologisch/traumatologisch/intoxikation/psychisch/sonstiges/keine]
-
-        Erklärung: Wurden sonstige Einsatzbesonderheiten beschrieben?
-        AUFFAELLIGKEITEN_VORHANDEN: [ja/nein]
-        AUFFAELLIGKEITEN_BESCHREIBUNG: [konkrete Beschreibung oder "keine"]
-
-        WICHTIG: Verwende nur die erlaubten Werte in Klammern. Gib keine zusätzlichen Erklärungen.
-        """
-
-        payload = {
-            "messages": [
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            "max_tokens": 800,
-            "temperature": 0.1
-        }
+    col1, col2, col3, col4 = st.columns(4)
 
-        response = requests.post(
-            LLM_BASE_URL,
-            headers={"Content-Type": "application/json"},
-            json=payload,
-            timeout=120
-        )
+    with col1:
+        st.metric("Analysierte Einsätze", len(results_df))
 
-        if response.status_code == 200:
-            result = response.json()
-            return result["choices"][0]["message"]["content"]
-        else:
-            return f"Fehler: HTTP {response.status_code} - {response.text}"
-
-    except Exception as e:
-        return f"Fehler beim LLM-Aufruf: {str(e)}"
-
-
-def parse_llm_response(llm_text):
-    """Parse the structured LLM response into individual fields"""
-    result = {
-        'übergriff_vorhanden': '',
-        'übergriff_art': '',
-        'übergriff_textbeleg': '',
-        'verweigerung_vorhanden': '',
-        'verweigerung_massnahme': '',
-        'verweigerung_begruendung': '',
-        'hilfebedarf_typ': '',
-        'hilfebedarf_beschreibung': '',
-        'medizinisches_problem_beschreibung': '',
-        'medizinisches_problem_kategorie': '',
-        'auffaelligkeiten_vorhanden': '',
-        'auffaelligkeiten_beschreibung': ''
-    }
+    with col2:
+        # Count cases with assaults
+        assaults = results_df['übergriff_vorhanden']\
+            .str.contains('ja', case=False, na=False).sum()
+        st.metric("Übergriffe", assaults)
+
+    with col3:
+        # Count medical vs nursing cases
+        medical = llm_df['hilfebedarf_typ'].str.contains('medizinisch', case=False, na=False).sum()
+        st.metric("Medizinische Hilfe", medical,
+                  help=f"Nur von der KI analysierte Einsätze ({len(llm_df)})")
+
+    with col4:
+        # Count refusals
+        refusals = results_df['verweigerung_vorhanden'].str.contains('ja', case=False, na=False).sum()
+        st.metric("Verweigerungen", refusals)
 
+    # Distribution charts
+    st.subheader("📊 Verteilungsdiagramme")
+
+    # Check if plotly is available, if not use streamlit charts
     try:
-        # Clean the text first
-        cleaned_text = llm_text.strip()
-
-        # Remove markdown code blocks if present
-        if cleaned_text.startswith('```'):
-            lines = cleaned_text.split('\n')
-            # Find the first line that doesn't start with ```
-            content_lines = []
-            for line in lines:
-                if not line.strip().startswith('```'):
-                    content_lines.append(line)
-                elif content_lines:  # If we already have content, stop at next ```
-                    break
-            cleaned_text = '\n'.join(content_lines)
-
-        # Parse line by line
-        lines = cleaned_text.split('\n')
-
-        for line in lines:
-            line = line.strip()
-            if not line or ':' not in line:
-                continue
-
-            # Split on first colon only
-            key, value = line.split(':', 1)
-            key = key.strip().upper()
-            value = value.strip()
-
-            # Remove brackets if present
-            if value.startswith('[') and value.endswith(']'):
-                value = value[1:-1]
-
-            # Map keys to result fields
-            if key == 'UEBERGRIF_VORHANDEN':
-                result['übergriff_vorhanden'] = value
-            elif key == 'UEBERGRIF_ART':
-                result['übergriff_art'] = value
-            elif key == 'UEBERGRIF_TEXTBELEG':
-                result['übergriff_textbeleg'] = value
-            elif key == 'VERWEIGERUNG_VORHANDEN':
-                result['verweigerung_vorhanden'] = value
-            elif key == 'VERWEIGERUNG_MASSNAHME':
-                result['verweigerung_massnahme'] = value
-            elif key == 'VERWEIGERUNG_BEGRUENDUNG':
-                result['verweigerung_begruendung'] = value
-            elif key == 'HILFEBEDARF_TYP':
-                result['hilfebedarf_typ'] = value
-            elif key == 'HILFEBEDARF_BESCHREIBUNG':
-                result['hilfebedarf_beschreibung'] = value
-            elif key == 'MEDIZINISCHES_PROBLEM_BESCHREIBUNG':
-                result['medizinisches_problem_beschreibung'] = value
-            elif key == 'MEDIZINISCHES_PROBLEM_KATEGORIE':
-                result['medizinisches_problem_kategorie'] = value
-            elif key == 'AUFFAELLIGKEITEN_VORHANDEN':
-                result['auffaelligkeiten_vorhanden'] = value
-            elif key == 'AUFFAELLIGKEITEN_BESCHREIBUNG':
-                result['auffaelligkeiten_beschreibung'] = value
-
-    except Exception as e:
-        # If parsing fails, return the raw text in one field
-        result['auffaelligkeiten_beschreibung'] = f"Parse error: {str(e)} - Raw text: {llm_text[:200]}"
-
-    # Clean up results - remove any leading/trailing whitespace and empty entries
-    for key in result:
-        result[key] = result[key].strip() if isinstance(result[key], str) else result[key]
-        if not result[key] or result[key].startswith('- ') or result[key].startswith('**'):
-            result[key] = ''
-
-    return result
+        import plotly.express as px
+        import plotly.graph_objects as go
+        use_plotly = True
+    except ImportError:
+        use_plotly = False
+        st.info("💡 Für schönere Diagramme installiere plotly: `pip install plotly`")
+
+    # Create charts for different categories
+    tab1, tab2, tab3, tab4 = st.tabs(["🏥 Hilfebedarf", "🩺 Medizinische Probleme", "⚠️ Übergriffe", "📈 Übersicht"])
+
+    if prechecked_count:
+        st.caption(f"Hilfebedarf und medizinische Probleme ohne die {prechecked_count} "
+                   "Einsätze der regelbasierten Vorprüfung, die nicht von der KI "
+                   "analysiert wurden.")
+
+    with tab1:
+        # Hilfebedarf distribution
+        hilfebedarf_counts = llm_df['hilfebedarf_typ'].value_counts()
+        if not hilfebedarf_counts.empty:
+            if use_plotly:
+                fig = px.pie(hilfebedarf_counts,
+                           values=hilfebedarf_counts.values,
+                           names=hilfebedarf_counts.index,
+                           title="Verteilung des Hilfebedarfs",
+                           color_discrete_sequence=px.colors.qualitative.Set3)
+                fig.update_traces(textposition='inside', textinfo='percent+label')
+                st.plotly_chart(fig, use_container_width=True)
+            else:
+                st.bar_chart(hilfebedarf_counts)
+
+            # Show raw numbers
+            st.write("**Rohdaten:**")
+            st.dataframe(hilfebedarf_counts.to_frame(name="Anzahl"))
+
+    with tab2:
+        # Medizinische Problem-Kategorien
+        problem_counts = llm_df['medizinisches_problem_kategorie'].value_counts()
+        if not problem_counts.empty:
+            if use_plotly:
+                fig = px.bar(problem_counts,
+                           x=problem_counts.index,
+                           y=problem_counts.values,
+                           title="Medizinische Problem-Kategorien",
+                           color=problem_counts.values,
+                           color_continuous_scale='Blues')
+                fig.update_layout(xaxis_title="Kategorie", yaxis_title="Anzahl")
+                st.plotly_chart(fig, use_container_width=True)
+            else:
+                st.bar_chart(problem_counts)
+
+            # Show raw numbers
+            st.write("**Rohdaten:**")
+            st.dataframe(problem_counts.to_frame(name="Anzahl"))
+
+    with tab3:
+        # Übergriff-Arten distribution
+        uebergriff_art_counts = results_df['übergriff_art'].value_counts()
+        if not uebergriff_art_counts.empty:
+            if use_plotly:
+                fig = px.bar(uebergriff_art_counts,
+                           x=uebergriff_art_counts.index,
+                           y=uebergriff_art_counts.values,
+                           title="Arten von Übergriffen",
+                           color=uebergriff_art_counts.values,
+                           color_continuous_scale='Reds')
+                fig.update_layout(xaxis_title="Art des Übergriffs", yaxis_title="Anzahl")
+                st.plotly_chart(fig, use_container_width=True)
+            else:
+                st.bar_chart(uebergriff_art_counts)
+
+            # Show raw numbers
+            st.write("**Rohdaten:**")
+            st.dataframe(uebergriff_art_counts.to_frame(name="Anzahl"))
+
+        # Additional: Übergriffe ja/nein
+        uebergriff_ja_nein = results_df['übergriff_vorhanden'].value_counts()
+        if not uebergriff_ja_nein.empty:
+            st.subheader("Übergriffe: Ja/Nein")
+            if use_plotly:
+                fig = px.pie(uebergriff_ja_nein,
+                           values=uebergriff_ja_nein.values,
+                           names=uebergriff_ja_nein.index,
+                           title="Vorhandensein von Übergriffen",
+                           color_discrete_sequence=['#FF6B6B', '#4ECDC4'])
+                st.plotly_chart(fig, use_container_width=True)
+            else:
+                st.bar_chart(uebergriff_ja_nein)
+
+    with tab4:
+        # Overview dashboard with multiple metrics
+        col1, col2 = st.columns(2)
+
+        with col1:
+            # Verweigerungen ja/nein
+            verweigerung_counts = results_df['verweigerung_vorhanden'].value_counts()
+            if not verweigerung_counts.empty:
+                st.subheader("Verweigerungen")
+                if use_plotly:
+                    fig = go.Figure(data=[go.Pie(labels=verweigerung_counts.index,
+                                               values=verweigerung_counts.values,
+                                               marker_colors=['#45B7D1', '#96CEB4'])])
+                    fig.update_layout(title="Verweigerungen: Ja/Nein")
+                    st.plotly_chart(fig, use_container_width=True)
+                else:
+                    st.bar_chart(verweigerung_counts)
+
+        with col2:
+            # Auffälligkeiten ja/nein
+            auffaelligkeiten_counts = results_df['auffaelligkeiten_vorhanden'].value_counts()
+            if not auffaelligkeiten_counts.empty:
+                st.subheader("Auffälligkeiten")
+                if use_plotly:
+                    fig = go.Figure(data=[go.Pie(labels=auffaelligkeiten_counts.index,
+                                               values=auffaelligkeiten_counts.values,
+                                               marker_colors=['#FECA57', '#FF9FF3'])])
+                    fig.update_layout(title="Auffälligkeiten: Ja/Nein")
+                    st.plotly_chart(fig, use_container_width=True)
+                else:
+                    st.bar_chart(auffaelligkeiten_counts)
+
+        # Summary table
+        st.subheader("� Zusammenfassung aller Kategorien")
+        summary_data = {
+            'Kategorie': [],
+            'Ja': [],
+            'Nein': [],
+            'Total': []
+        }
+
+        categories = {
+            'Übergriffe': 'übergriff_vorhanden',
+            'Verweigerungen': 'verweigerung_vorhanden',
+            'Auffälligkeiten': 'auffaelligkeiten_vorhanden'
+        }
+
+        for cat_name, col_name in categories.items():
+            counts = results_df[col_name].value_counts()
+            ja_count = counts.get('ja', 0)
+            nein_count = counts.get('nein', 0)
+            summary_data['Kategorie'].append(cat_name)
+            summary_data['Ja'].append(ja_count)
+            summary_data['Nein'].append(nein_count)
+            summary_data['Total'].append(ja_count + nein_count)
+
+        summary_df = pd.DataFrame(summary_data)
+        st.dataframe(summary_df)
+
+        # Overall statistics
+        st.subheader("📊 Gesamtstatistik")
+        total_cases = len(results_df)
+        uebergriffe_pct = (results_df['übergriff_vorhanden'] == 'ja').sum() / total_cases * 100
+        verweigerungen_pct = (results_df['verweigerung_vorhanden'] == 'ja').sum() / total_cases * 100
+        auffaelligkeiten_pct = (results_df['auffaelligkeiten_vorhanden'] == 'ja').sum() / total_cases * 100
+
+        stat_col1, stat_col2, stat_col3 = st.columns(3)
+        with stat_col1:
+            st.metric("Übergriffe", f"{uebergriffe_pct:.1f}%")
+        with stat_col2:
+            st.metric("Verweigerungen", f"{verweigerungen_pct:.1f}%")
+        with stat_col3:
+            st.metric("Auffälligkeiten", f"{auffaelligkeiten_pct:.1f}%")
+
+
+@st.fragment(run_every=5)
+def show_job_progress(job_id):
+    """Poll a running job and show its partial results"""
+    progress = job_runner.progress(job_id)
+    total = max(progress["total"], 1)
+    st.progress(
+        progress["done"] / total,
+        text=f"{progress['done']} von {progress['total']} Texten analysiert "
+             f"({LLM_CONCURRENCY} parallele Anfragen)",
+    )
+    show_prefilter_stats(progress["prefilter_stats"])
+    partial_df = job_runner.results(job_id)
+    if not partial_df.empty:
+        st.dataframe(partial_df)
+    if st.button("⏸️ Analyse anhalten"):
+        job_runner.stop(job_id)
+    if not progress["running"] and progress["status"] not in ACTIVE_STATES:
+        # Job finished: rerun the page to show the final results
+        st.rerun()
 
 
 st.title("Schwerpunkt LLM Anamnese Analyse")
@@ -305,7 +411,7 @@ Aufgrund der geringen Modellgröße kann es besonders schnell (relativ zur Serve
 > Je Protokoll hat das Sprachmodell 120 Sekunden zum Antworten. Sollte das Modell nicht schnell genug antworten, wird die Anfrage abgebrochen.
 
 ⚠️ **Wichtig:** Die KI-Ergebnisse sind lediglich ein Hinweis und müssen immer manuell geprüft werden. 
-⚠️ Jedes neustarten der Auswertung liefert andere Ergebnisse, da das Modell probabilistisch arbeitet.
+⚠️ Das Modell arbeitet probabilistisch. Bereits analysierte Texte werden aus dem Ergebnisspeicher geladen, nur neue Texte werden erneut ausgewertet.
 LLM Prompt: https://i.imgur.com/WEFTbsl.png
 """)
 
@@ -343,9 +449,37 @@ if anamnese_data and not merged_df.empty:
     if filtered_anamnese_data:
         st.write(f"**Gefilterte Anamnese-Einträge für Analyse:** {len(filtered_anamnese_data)}")
 
+        batch_size = st.number_input(
+            "Texte pro LLM-Anfrage (Batch-Modus)",
+            min_value=1,
+            max_value=20,
+            value=max(1, LLM_BATCH_SIZE),
+            help="Mehrere Texte je Anfrage senden die Anweisungen nur einmal. "
+                 "Nicht auswertbare Antworten werden automatisch einzeln wiederholt.",
+        )
+
+        use_prefilter = st.checkbox(
+            "Regelbasierte Vorprüfung",
+            value=True,
+            help="Texte ohne Hinweise auf Übergriffe, Verweigerungen oder Auffälligkeiten "
+                 "werden ohne KI-Aufruf als unauffällig klassifiziert. Hilfebedarf und "
+                 "medizinisches Problem bleiben für diese Texte offen.",
+        )
+
+        similarity_threshold = st.slider(
+            "Ähnlichkeitsschwelle für Beinahe-Duplikate",
+            min_value=0.5,
+            max_value=1.0,
+            value=NEAR_DUPLICATE_THRESHOLD,
+            step=0.05,
+            help="Texte, die sich nur in Namen, Daten oder einzelnen Formulierungen "
+                 "unterscheiden, werden gruppiert; nur ein Text je Gruppe wird analysiert "
+                 "und das Ergebnis auf die Gruppe übertragen. 1.0 = nur exakte Duplikate.",
+        )
+
         # Add button to trigger structured LLM analysis
         if st.button("� Strukturierte KI-Analyse (Übergriffe, Verweigerungen, etc.)", type="primary"):
-            with st.spinner("Führe strukturierte KI-Analyse durch... Dies kann einige Minuten dauern."):
+            with st.spinner("Bereite die KI-Analyse vor..."):
 
                 # Check for duplicates in anamnesis texts before analysis
                 st.write("🔍 Überprüfe Anamnese-Texte auf Duplikate...")
@@ -400,260 +534,54 @@ if anamnese_data and not merged_df.empty:
                     st.info(f"💡 {duplicate_count} Duplikate entfernt, "
                             "API-Aufrufe gespart und Analyse beschleunigt.")
 
-                analysis_results = []
-
-                # Process unique anamnese entries
-                st.write(f"🤖 Starte LLM-Analyse für {len(unique_texts)} eindeutige Texte...")
-
-                for i, entry in enumerate(unique_texts):
-                    protocol_id = entry['protocol_id']
-                    text_content = entry['text_content']
-                    st.write(f"Warte auf LLM Antwort für Protokoll {protocol_id}...")
-
-                    # Use the structured analysis function
-                    llm_result = analyze_medical_text(text_content, protocol_id)
-                    parsed_result = parse_llm_response(llm_result)
-
-                    # Create result entry for this unique text
-                    base_result = {
-                        'einsatz_id': protocol_id,
-                        'übergriff_vorhanden': parsed_result['übergriff_vorhanden'],
-                        'übergriff_art': parsed_result['übergriff_art'],
-                        'übergriff_textbeleg': parsed_result['übergriff_textbeleg'],
-                        'verweigerung_vorhanden': parsed_result['verweigerung_vorhanden'],
-                        'verweigerung_massnahme': parsed_result['verweigerung_massnahme'],
-                        'verweigerung_begruendung': parsed_result['verweigerung_begruendung'],
-                        'hilfebedarf_typ': parsed_result['hilfebedarf_typ'],
-                        'hilfebedarf_beschreibung': parsed_result['hilfebedarf_beschreibung'],
-                        'medizinisches_problem_beschreibung':
-                            parsed_result['medizinisches_problem_beschreibung'],
-                        'medizinisches_problem_kategorie':
-                            parsed_result['medizinisches_problem_kategorie'],
-                        'auffaelligkeiten_vorhanden': parsed_result['auffaelligkeiten_vorhanden'],
-                        'auffaelligkeiten_beschreibung': parsed_result['auffaelligkeiten_beschreibung'],
-                        'anamnesis_text': text_content[:100] + "..."
-                            if len(text_content) > 100 else text_content
+                # Group near-duplicate texts, only one representative per group is analyzed
+                representative_of = {}
+                similarity_of = {}
+                if similarity_threshold < 1.0 and unique_texts:
+                    unique_text_list = [entry['text_content'] for entry in unique_texts]
+                    clusters = cluster_near_duplicates(unique_text_list, similarity_threshold)
+                    representative_of = {
+                        text: unique_text_list[cluster]
+                        for text, cluster in zip(unique_text_list, clusters["cluster"])
                     }
-
-                    analysis_results.append(base_result)
-
-                # Expand results to include all original entries (including duplicates)
-                if duplicate_count > 0:
-                    # Create mapping from text content to analysis result
-                    text_to_result = {}
-                    for result in analysis_results:
-                        text_to_result[result['anamnesis_text']] = result
-
-                    # Create final results list with all original entries
-                    final_results = []
-                    for entry in text_entries:
-                        text_key = entry['text_content'][:100] + "..." \
-                            if len(entry['text_content']) > 100 else entry['text_content']
-                        if text_key in text_to_result:
-                            # Copy result and update protocol ID
-                            result_copy = text_to_result[text_key].copy()
-                            result_copy['einsatz_id'] = entry['protocol_id']
-                            final_results.append(result_copy)
-
-                    analysis_results = final_results
-                    st.write(f"✅ Ergebnisse erweitert: {len(analysis_results)} Gesamteinträge")
-
-                if analysis_results:
-                    st.success(f"✅ Analyse für {len(analysis_results)} Protokolle abgeschlossen!")
-
-                    # Display results in a dataframe
-                    results_df = pd.DataFrame(analysis_results)
-                    st.subheader("📊 Strukturierte Analyse-Ergebnisse")
-                    st.dataframe(results_df)
-
-                    # Summary statistics
-                    st.subheader("📈 Zusammenfassung")
-
-                    col1, col2, col3, col4 = st.columns(4)
-
-                    with col1:
-                        st.metric("Analysierte Einsätze", len(results_df))
-
-                    with col2:
-                        # Count cases with assaults
-                        assaults = results_df['übergriff_vorhanden']\
-                            .str.contains('ja', case=False, na=False).sum()
-                        st.metric("Übergriffe", assaults)
-
-                    with col3:
-                        # Count medical vs nursing cases
-                        medical = results_df['hilfebedarf_typ'].str.contains('medizinisch', case=False, na=False).sum()
-                        st.metric("Medizinische Hilfe", medical)
-
-                    with col4:
-                        # Count refusals
-                        refusals = results_df['verweigerung_vorhanden'].str.contains('ja', case=False, na=False).sum()
-                        st.metric("Verweigerungen", refusals)
-
-                    # Distribution charts
-                    st.subheader("📊 Verteilungsdiagramme")
-
-                    # Check if plotly is available, if not use streamlit charts
-                    try:
-                        import plotly.express as px
-                        import plotly.graph_objects as go
-                        use_plotly = True
-                    except ImportError:
-                        use_plotly = False
-                        st.info("💡 Für schönere Diagramme installiere plotly: `pip install plotly`")
-
-                    # Create charts for different categories
-                    tab1, tab2, tab3, tab4 = st.tabs(["🏥 Hilfebedarf", "🩺 Medizinische Probleme", "⚠️ Übergriffe", "📈 Übersicht"])
-
-                    with tab1:
-                        # Hilfebedarf distribution
-                        hilfebedarf_counts = results_df['hilfebedarf_typ'].value_counts()
-                        if not hilfebedarf_counts.empty:
-                            if use_plotly:
-                                fig = px.pie(hilfebedarf_counts,
-                                           values=hilfebedarf_counts.values,
-                                           names=hilfebedarf_counts.index,
-                                           title="Verteilung des Hilfebedarfs",
-                                           color_discrete_sequence=px.colors.qualitative.Set3)
-                                fig.update_traces(textposition='inside', textinfo='percent+label')
-                                st.plotly_chart(fig, use_container_width=True)
-                            else:
-                                st.bar_chart(hilfebedarf_counts)
-
-                            # Show raw numbers
-                            st.write("**Rohdaten:**")
-                            st.dataframe(hilfebedarf_counts.to_frame(name="Anzahl"))
-
-                    with tab2:
-                        # Medizinische Problem-Kategorien
-                        problem_counts = results_df['medizinisches_problem_kategorie'].value_counts()
-                        if not problem_counts.empty:
-                            if use_plotly:
-                                fig = px.bar(problem_counts,
-                                           x=problem_counts.index,
-                                           y=problem_counts.values,
-                                           title="Medizinische Problem-Kategorien",
-                                           color=problem_counts.values,
-                                           color_continuous_scale='Blues')
-                                fig.update_layout(xaxis_title="Kategorie", yaxis_title="Anzahl")
-                                st.plotly_chart(fig, use_container_width=True)
-                            else:
-                                st.bar_chart(problem_counts)
-
-                            # Show raw numbers
-                            st.write("**Rohdaten:**")
-                            st.dataframe(problem_counts.to_frame(name="Anzahl"))
-
-                    with tab3:
-                        # Übergriff-Arten distribution
-                        uebergriff_art_counts = results_df['übergriff_art'].value_counts()
-                        if not uebergriff_art_counts.empty:
-                            if use_plotly:
-                                fig = px.bar(uebergriff_art_counts,
-                                           x=uebergriff_art_counts.index,
-                                           y=uebergriff_art_counts.values,
-                                           title="Arten von Übergriffen",
-                                           color=uebergriff_art_counts.values,
-                                           color_continuous_scale='Reds')
-                                fig.update_layout(xaxis_title="Art des Übergriffs", yaxis_title="Anzahl")
-                                st.plotly_chart(fig, use_container_width=True)
-                            else:
-                                st.bar_chart(uebergriff_art_counts)
-
-                            # Show raw numbers
-                            st.write("**Rohdaten:**")
-                            st.dataframe(uebergriff_art_counts.to_frame(name="Anzahl"))
-
-                        # Additional: Übergriffe ja/nein
-                        uebergriff_ja_nein = results_df['übergriff_vorhanden'].value_counts()
-                        if not uebergriff_ja_nein.empty:
-                            st.subheader("Übergriffe: Ja/Nein")
-                            if use_plotly:
-                                fig = px.pie(uebergriff_ja_nein,
-                                           values=uebergriff_ja_nein.values,
-                                           names=uebergriff_ja_nein.index,
-                                           title="Vorhandensein von Übergriffen",
-                                           color_discrete_sequence=['#FF6B6B', '#4ECDC4'])
-                                st.plotly_chart(fig, use_container_width=True)
-                            else:
-                                st.bar_chart(uebergriff_ja_nein)
-
-                    with tab4:
-                        # Overview dashboard with multiple metrics
-                        col1, col2 = st.columns(2)
-
-                        with col1:
-                            # Verweigerungen ja/nein
-                            verweigerung_counts = results_df['verweigerung_vorhanden'].value_counts()
-                            if not verweigerung_counts.empty:
-                                st.subheader("Verweigerungen")
-                                if use_plotly:
-                                    fig = go.Figure(data=[go.Pie(labels=verweigerung_counts.index,
-                                                               values=verweigerung_counts.values,
-                                                               marker_colors=['#45B7D1', '#96CEB4'])])
-                                    fig.update_layout(title="Verweigerungen: Ja/Nein")
-                                    st.plotly_chart(fig, use_container_width=True)
-                                else:
-                                    st.bar_chart(verweigerung_counts)
-
-                        with col2:
-                            # Auffälligkeiten ja/nein
-                            auffaelligkeiten_counts = results_df['auffaelligkeiten_vorhanden'].value_counts()
-                            if not auffaelligkeiten_counts.empty:
-                                st.subheader("Auffälligkeiten")
-                                if use_plotly:
-                                    fig = go.Figure(data=[go.Pie(labels=auffaelligkeiten_counts.index,
-                                                               values=auffaelligkeiten_counts.values,
-                                                               marker_colors=['#FECA57', '#FF9FF3'])])
-                                    fig.update_layout(title="Auffälligkeiten: Ja/Nein")
-                                    st.plotly_chart(fig, use_container_width=True)
-                                else:
-                                    st.bar_chart(auffaelligkeiten_counts)
-
-                        # Summary table
-                        st.subheader("� Zusammenfassung aller Kategorien")
-                        summary_data = {
-                            'Kategorie': [],
-                            'Ja': [],
-                            'Nein': [],
-                            'Total': []
-                        }
-
-                        categories = {
-                            'Übergriffe': 'übergriff_vorhanden',
-                            'Verweigerungen': 'verweigerung_vorhanden',
-                            'Auffälligkeiten': 'auffaelligkeiten_vorhanden'
-                        }
-
-                        for cat_name, col_name in categories.items():
-                            counts = results_df[col_name].value_counts()
-                            ja_count = counts.get('ja', 0)
-                            nein_count = counts.get('nein', 0)
-                            summary_data['Kategorie'].append(cat_name)
-                            summary_data['Ja'].append(ja_count)
-                            summary_data['Nein'].append(nein_count)
-                            summary_data['Total'].append(ja_count + nein_count)
-
-                        summary_df = pd.DataFrame(summary_data)
-                        st.dataframe(summary_df)
-
-                        # Overall statistics
-                        st.subheader("📊 Gesamtstatistik")
-                        total_cases = len(results_df)
-                        uebergriffe_pct = (results_df['übergriff_vorhanden'] == 'ja').sum() / total_cases * 100
-                        verweigerungen_pct = (results_df['verweigerung_vorhanden'] == 'ja').sum() / total_cases * 100
-                        auffaelligkeiten_pct = (results_df['auffaelligkeiten_vorhanden'] == 'ja').sum() / total_cases * 100
-
-                        stat_col1, stat_col2, stat_col3 = st.columns(3)
-                        with stat_col1:
-                            st.metric("Übergriffe", f"{uebergriffe_pct:.1f}%")
-                        with stat_col2:
-                            st.metric("Verweigerungen", f"{verweigerungen_pct:.1f}%")
-                        with stat_col3:
-                            st.metric("Auffälligkeiten", f"{auffaelligkeiten_pct:.1f}%")
-
-                else:
-                    st.warning("Keine geeigneten Anamnese-Texte in den gefilterten Daten gefunden")
+                    similarity_of = dict(zip(unique_text_list, clusters["similarity"]))
+                    cluster_stats = cluster_statistics(clusters)
+                    st.write("🧩 Beinahe-Duplikate gruppiert")
+                    st.write(f"- Gruppen: {cluster_stats['clusters']} "
+                             f"(größte Gruppe: {cluster_stats['largest_cluster']} Texte, "
+                             f"Einzeltexte: {cluster_stats['singletons']})")
+                    st.write(f"- Eingesparte Analysen: {cluster_stats['saved']} "
+                             f"({cluster_stats['reduction'] * 100:.1f}%), "
+                             f"mittlere Ähnlichkeit zum Repräsentanten: "
+                             f"{cluster_stats['mean_similarity']:.2f}")
+
+                # Protocols of a near-duplicate group get the result of the group's
+                # representative; they keep their own text and name the protocol
+                # the result was taken from, so it can be checked by hand
+                first_protocol = {}
+                for entry in text_entries:
+                    first_protocol.setdefault(entry['text_content'], entry['protocol_id'])
+                job_entries = []
+                origins = []
+                for entry in text_entries:
+                    text = entry['text_content']
+                    representative = representative_of.get(text, text)
+                    job_entries.append((entry['protocol_id'], representative))
+                    origins.append(
+                        (text, str(first_protocol[representative]), float(similarity_of[text]))
+                        if representative != text else None
+                    )
+
+                # Hand the texts to a background job: it keeps running across reruns
+                # and page reloads and checkpoints every result
+                # The prefilter stats are stored with the job and shown below
+                job_id, _ = job_runner.submit(
+                    job_entries,
+                    batch_size=batch_size,
+                    use_prefilter=use_prefilter,
+                    origins=origins,
+                )
+                st.query_params["llm_job"] = job_id
 
     else:
         st.warning("Keine Anamnese-Daten für die aktuellen Filterkriterien gefunden")
@@ -661,4 +589,33 @@ if anamnese_data and not merged_df.empty:
 elif not merged_df.empty:
     st.info("Keine Anamnese-Daten verfügbar für LLM-Analyse")
 else:
-    st.warning("Keine gefilterten ETÜ-Daten verfügbar - wähle Filterkriterien aus")
\ No newline at end of file
+    st.warning("Keine gefilterten ETÜ-Daten verfügbar - wähle Filterkriterien aus")
+
+# Results of the current analysis job (kept in the URL, survives page reloads)
+job_id = st.query_params.get("llm_job")
+if job_id:
+    progress = job_runner.progress(job_id)
+    if progress is None:
+        st.warning("Der Analyse-Job wurde nicht gefunden.")
+    elif progress["status"] in ACTIVE_STATES:
+        st.info("🔄 Die KI-Analyse läuft im Hintergrund und wird auch nach einem Neuladen "
+                "der Seite fortgesetzt. Zwischenergebnisse werden laufend gespeichert.")
+        show_job_progress(job_id)
+    else:
+        status_label = JOB_STATUS_LABELS.get(progress["status"], progress["status"])
+        st.write(f"**Analyse-Job {job_id}:** {status_label} "
+                 f"({progress['done']} von {progress['total']} Texten)")
+        if progress["error"]:
+            st.warning(progress["error"])
+        if progress["status"] in ("stopped", "failed"):
+            if st.button("▶️ Analyse fortsetzen"):
+                job_runner.start(job_id)
+                st.rerun()
+
+        results_df = job_runner.results(job_id)
+        if not results_df.empty:
+            if progress["status"] == "done":
+                st.success(f"✅ Analyse für {len(results_df)} Protokolle abgeschlossen!")
+            render_results(results_df, progress["prefilter_stats"])
+        else:
+            st.warning("Keine geeigneten Anamnese-Texte in den gefilterten Daten gefunden")
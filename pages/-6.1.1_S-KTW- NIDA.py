@@ -4,6 +4,7 @@ import plotly.express as px
 import os
 from data_loading import data_loading
 from auth import check_authentication
+from shift_calendar import cached_shift_occupancy
 
 # Authentication check
 if not check_authentication():
@@ -14,13 +15,8 @@ if not check_authentication():
 # Load configuration from environment variables
 DEFAULT_NIDA_VEHICLES = os.getenv("DEFAULT_NIDA_SKTW_VEHICLES").split(",")
 
-# Load vehicle schedules from environment variables (format: vehicle1:hours,vehicle2:hours,...)
-VEHICLE_CONFIG = os.getenv("VEHICLE_CONFIG")
-VEHICLE_SCHEDULES = {}
-for config in VEHICLE_CONFIG.split(","):
-    if ":" in config:
-        vehicle, hours = config.split(":", 1)
-        VEHICLE_SCHEDULES[vehicle.strip()] = int(hours.strip())
+# Vehicle availability comes from the shift patterns in VEHICLE_SHIFTS
+# (see shift_calendar), with VEHICLE_CONFIG weekly hours as fallback
 
 st.markdown(
     """
@@ -30,7 +26,7 @@ Dieses Dashboard analysiert die Auslastung von S-KTWs (Sofort-Krankentransportwa
 
 ## Berechnung der Auslastung
 Für die Analyse der Auslastung wird die Zeit zwischen **StatusAlarm** und **StatusEnd** der NIDA-Protokolle verwendet.
-Um die Auslastung korrekt zu berechnen, wird die Verfügbarkeit in Stunden durch den folgenden Datums-Filter berechnet.
+Die Verfügbarkeit ergibt sich aus den Schichtplänen der Fahrzeuge (inkl. Feiertagsregeln) im folgenden Datums-Filter; gezählt wird nur die Einsatzzeit innerhalb der Schichten.
 """
 )
 
@@ -193,90 +189,24 @@ if "StatusAlarm" in filtered_df.columns and "StatusEnd" in filtered_df.columns:
     # Filter out invalid durations (negative or NaN)
     filtered_df = filtered_df[filtered_df["duration_hours"] > 0]
 
-    # Define schedules (hours per week)
-    schedules = VEHICLE_SCHEDULES
-
-    # Calculate available hours for the selected date range
-    date_range = pd.date_range(start=start_date, end=end_date)
-    total_days = len(date_range)
-
-    # Calculate daily utilization
-    if "StatusAlarm" in filtered_df.columns:
-        filtered_df["weekday"] = filtered_df["StatusAlarm"].dt.day_name()
-
-        # Group by callsign and weekday, sum durations
-        daily_util = (
-            filtered_df.groupby(["callSign", "weekday"])["duration_hours"]
-            .sum()
-            .reset_index()
+    if selected_callsigns:
+        # Busy hours per vehicle and day from one sweep over all mission
+        # intervals, intersected with the vehicles' shifts; overlapping
+        # missions of a vehicle are counted once
+        occupancy = cached_shift_occupancy(
+            filtered_df[["callSign", "StatusAlarm", "StatusEnd"]],
+            "callSign",
+            "StatusAlarm",
+            "StatusEnd",
+            start_date,
+            end_date,
+            tuple(selected_callsigns),
         )
 
-        # Define weekday groups: Mon-Thu, Fri, Sat, Sun
-        weekday_groups = {
-            "Monday": "Mon-Thu",
-            "Tuesday": "Mon-Thu",
-            "Wednesday": "Mon-Thu",
-            "Thursday": "Mon-Thu",
-            "Friday": "Fri",
-            "Saturday": "Sat",
-            "Sunday": "Sun",
-        }
-
-        daily_util["group"] = daily_util["weekday"].map(weekday_groups)
-        grouped_daily = (
-            daily_util.groupby(["callSign", "group"])["duration_hours"]
-            .sum()
-            .reset_index()
+        daily_df = occupancy.utilization_by_weekday_group().rename(
+            columns={"vehicle": "callSign"}
         )
 
-        # Calculate available hours per group
-        date_range = pd.date_range(start=start_date, end=end_date)
-        weekday_counts = pd.Series(date_range).dt.day_name().value_counts()
-
-        def get_available_hours(group, callsign):
-            if callsign not in schedules:
-                return 24 * 7  # default
-            daily_hours = schedules[callsign] / 7
-            if group == "Mon-Thu":
-                return daily_hours * (
-                    weekday_counts.get("Monday", 0)
-                    + weekday_counts.get("Tuesday", 0)
-                    + weekday_counts.get("Wednesday", 0)
-                    + weekday_counts.get("Thursday", 0)
-                )
-            elif group == "Fri":
-                return daily_hours * weekday_counts.get("Friday", 0)
-            elif group == "Sat":
-                return daily_hours * weekday_counts.get("Saturday", 0)
-            elif group == "Sun":
-                return daily_hours * weekday_counts.get("Sunday", 0)
-            return 0
-
-        # Create daily dataframe with available and actual hours
-        daily_available = []
-        for callsign in selected_callsigns:
-            for group in ["Mon-Thu", "Fri", "Sat", "Sun"]:
-                available = get_available_hours(group, callsign)
-                actual_row = grouped_daily[
-                    (grouped_daily["callSign"] == callsign)
-                    & (grouped_daily["group"] == group)
-                ]
-                actual = (
-                    actual_row["duration_hours"].sum() if not actual_row.empty else 0
-                )
-                percentage = (actual / available * 100) if available > 0 else 0
-                daily_available.append(
-                    {
-                        "callSign": callsign,
-                        "group": group,
-                        "available_hours": available,
-                        "actual_hours": actual,
-                        "percentage": percentage,
-                    }
-                )
-
-        daily_df = pd.DataFrame(daily_available)
-
         st.subheader("Tägliche Auslastung")
         st.dataframe(daily_df)
 
@@ -295,6 +225,22 @@ if "StatusAlarm" in filtered_df.columns and "StatusEnd" in filtered_df.columns:
             except Exception as e:
                 st.error(f"Fehler beim Erstellen des Diagramms: {e}")
                 st.write("Daten für tägliche Auslastung:", daily_df)
+
+        st.write("**Auslastung je Fahrzeug:**")
+        st.dataframe(
+            occupancy.summary().rename(
+                columns={
+                    "busy_hours": "Belegte Stunden",
+                    "mission_hours": "Summe Einsatzdauern",
+                    "overlap_hours": "Überlappung (Stunden)",
+                    "missions": "Einsätze",
+                    "max_concurrent": "Max. gleichzeitig",
+                    "on_shift_hours": "Belegt in Schicht",
+                    "available_hours": "Verfügbare Stunden",
+                    "utilization_pct": "Auslastung %",
+                }
+            )
+        )
 else:
     st.warning("StatusAlarm or StatusEnd columns not found")
 
@@ -4,6 +4,15 @@ import plotly.express as px
 import os
 from data_loading import data_loading
 from auth import check_authentication
+from holiday_calendar import holiday_calendar, is_holiday
+from hotspot_grid import cached_hotspot_grid
+from map_layers import (
+    MISSION_CLUSTER_OPTIONS,
+    MISSION_MARKER_CALLBACK,
+    POPUP_FIELDS,
+    cached_mission_marker_data,
+)
+from shift_calendar import cached_shift_occupancy
 
 
 # Authentication check
@@ -15,13 +24,10 @@ if not check_authentication():
 # Load configuration from environment variables
 DEFAULT_VEHICLES = os.getenv("DEFAULT_SKTW_VEHICLES").split(",")
 
-VEHICLE_CONFIG = os.getenv("VEHICLE_CONFIG")
-VEHICLE_SCHEDULES = {}
-
-for config in VEHICLE_CONFIG.split(","):
-    if ":" in config:
-        vehicle, hours = config.split(":", 1)
-        VEHICLE_SCHEDULES[f"Ret SL {vehicle.strip()}"] = int(hours.strip())
+# Vehicle availability comes from the shift patterns in VEHICLE_SHIFTS
+# (see shift_calendar), with VEHICLE_CONFIG weekly hours as fallback; the
+# ETÜ data names the vehicles with this prefix
+VEHICLE_PREFIX = "Ret SL "
 
 st.markdown(
     """
@@ -89,20 +95,6 @@ st.write(f"Gefilterte ETÜ-Daten: {len(filtered_df)} Einträge")
 
 st.subheader("Auslastung der S-KTW Fahrzeuge")
 
-# Define schedules (hours per week)
-schedules = VEHICLE_SCHEDULES
-
-# please display the auslastung like in the following Mon-Thu, Fri, Sat, Sun
-weekday_groups = {
-    "Monday": "Mon-Thu",
-    "Tuesday": "Mon-Thu",
-    "Wednesday": "Mon-Thu",
-    "Thursday": "Mon-Thu",
-    "Friday": "Fri",
-    "Saturday": "Sat",
-    "Sunday": "Sun",
-}
-
 # Calculate utilization for selected vehicles
 if selected_vehicles and not filtered_df.empty:
     # Ensure we have the required columns
@@ -134,58 +126,58 @@ if selected_vehicles and not filtered_df.empty:
                 valid_missions["mission_duration_hours"] > 0
             ]
 
-            # Add weekday information
-            valid_missions["weekday"] = valid_missions["EINSATZBEGINN"].dt.day_name()
-            valid_missions["weekday_group"] = valid_missions["weekday"].map(
-                weekday_groups
+            # Busy hours of all selected vehicles from one sweep over the
+            # mission intervals, intersected with the vehicles' shifts;
+            # overlapping missions of a vehicle count once
+            occupancy = cached_shift_occupancy(
+                valid_missions[["EINSATZMITTEL", "EINSATZBEGINN", "EINSATZENDE"]],
+                "EINSATZMITTEL",
+                "EINSATZBEGINN",
+                "EINSATZENDE",
+                start_date,
+                end_date,
+                tuple(selected_vehicles),
+                prefix=VEHICLE_PREFIX,
             )
-
-            # Calculate total available hours for the selected period
-            date_range_days = (end_date - start_date).days + 1
+            occupancy_summary = occupancy.summary()
+            utilization_by_group = occupancy.utilization_by_weekday_group()
+            missions_by_group = occupancy.by_weekday_group(occupancy.missions)
 
             # Calculate utilization by vehicle and weekday group
             utilization_data = []
 
             for vehicle in selected_vehicles:
-                vehicle_data = valid_missions[
-                    valid_missions["EINSATZMITTEL"] == vehicle
-                ]
-
-                if not vehicle_data.empty:
-                    # Get vehicle schedule (hours per week)
-                    vehicle_short = vehicle
-                    weekly_hours = schedules.get(
-                        vehicle_short, 168
-                    )  # Default to 24/7 if not found
-
-                    # Calculate total available hours for the period
-                    total_available_hours = (weekly_hours / 7) * date_range_days
-
-                    # Calculate total mission hours
-                    total_mission_hours = vehicle_data["mission_duration_hours"].sum()
-
-                    # Calculate utilization percentage
-                    utilization_pct = (
-                        (total_mission_hours / total_available_hours * 100)
-                        if total_available_hours > 0
-                        else 0
-                    )
-
-                    # Group by weekday for detailed analysis
+                vehicle_summary = occupancy_summary.loc[vehicle]
+                if vehicle_summary["missions"] > 0:
+                    # Busy and available hours per weekday group
                     weekday_stats = (
-                        vehicle_data.groupby("weekday_group")
-                        .agg({"mission_duration_hours": "sum", "AUFTRAGS_NR": "count"})
-                        .round(2)
+                        utilization_by_group[utilization_by_group["vehicle"] == vehicle]
+                        .set_index("group")
+                        .rename(
+                            columns={
+                                "actual_hours": "mission_duration_hours",
+                                "percentage": "utilization_pct",
+                            }
+                        )
                     )
+                    weekday_stats["AUFTRAGS_NR"] = missions_by_group.loc[vehicle]
 
                     utilization_data.append(
                         {
                             "vehicle": vehicle,
-                            "total_available_hours": round(total_available_hours, 1),
-                            "total_mission_hours": round(total_mission_hours, 1),
-                            "utilization_pct": round(utilization_pct, 1),
-                            "total_missions": len(vehicle_data),
-                            "weekday_stats": weekday_stats,
+                            "total_available_hours": round(
+                                vehicle_summary["available_hours"], 1
+                            ),
+                            "total_mission_hours": round(
+                                vehicle_summary["on_shift_hours"], 1
+                            ),
+                            "utilization_pct": round(
+                                vehicle_summary["utilization_pct"], 1
+                            ),
+                            "total_missions": int(vehicle_summary["missions"]),
+                            "overlap_hours": vehicle_summary["overlap_hours"],
+                            "off_shift_hours": weekday_stats["off_shift_hours"].sum(),
+                            "weekday_stats": weekday_stats.round(2),
                         }
                     )
 
@@ -211,45 +203,7 @@ if selected_vehicles and not filtered_df.empty:
 
                         with col1:
                             st.write("**Stunden nach Wochentag:**")
-                            # Calculate available hours per weekday group
-                            vehicle_short = data["vehicle"]
-                            weekly_hours = schedules.get(vehicle_short, 168)
-
-                            # Estimate hours per weekday group (rough approximation)
-                            weekday_available = {
-                                "Mon-Thu": (weekly_hours / 7)
-                                * 4
-                                * (date_range_days / 7),  # 4 weekdays
-                                "Fri": (weekly_hours / 7) * (date_range_days / 7),
-                                "Sat": (weekly_hours / 7) * (date_range_days / 7),
-                                "Sun": (weekly_hours / 7) * (date_range_days / 7),
-                            }
-
                             weekday_df = data["weekday_stats"].copy()
-                            for weekday in ["Mon-Thu", "Fri", "Sat", "Sun"]:
-                                if weekday in weekday_df.index:
-                                    available = weekday_available.get(weekday, 0)
-                                    used = weekday_df.loc[
-                                        weekday, "mission_duration_hours"
-                                    ]
-                                    pct = (
-                                        (used / available * 100) if available > 0 else 0
-                                    )
-                                    weekday_df.loc[weekday, "available_hours"] = round(
-                                        available, 1
-                                    )
-                                    weekday_df.loc[weekday, "utilization_pct"] = round(
-                                        pct, 1
-                                    )
-                                else:
-                                    weekday_df.loc[weekday, "available_hours"] = round(
-                                        weekday_available.get(weekday, 0), 1
-                                    )
-                                    weekday_df.loc[weekday, "utilization_pct"] = 0
-                                    weekday_df.loc[
-                                        weekday, "mission_duration_hours"
-                                    ] = 0
-                                    weekday_df.loc[weekday, "AUFTRAGS_NR"] = 0
 
                             # Reorder columns
                             weekday_df = weekday_df[
@@ -277,6 +231,16 @@ if selected_vehicles and not filtered_df.empty:
                                     }
                                 )
                             )
+                            if data["overlap_hours"] > 0:
+                                st.caption(
+                                    f"{data['overlap_hours']:.1f}h überlappende "
+                                    "Einsätze sind nur einfach gezählt."
+                                )
+                            if data["off_shift_hours"] > 0:
+                                st.caption(
+                                    f"{data['off_shift_hours']:.1f}h Einsatzzeit "
+                                    "außerhalb der Schichten sind nicht gezählt."
+                                )
 
                         with col2:
                             st.write("**Einsätze nach Stunde:**")
@@ -317,9 +281,18 @@ if selected_vehicles and not filtered_df.empty:
 else:
     st.info("Wählen Sie Fahrzeuge aus, um die Auslastungsanalyse zu sehen.")
 
-wochenfeiertage = data_loading("Feiertage", limit=3)
-
-st.dataframe(wochenfeiertage)
+# Holidays are computed locally, no API call needed
+st.subheader("Feiertage im Zeitraum")
+feiertage = holiday_calendar(start_date.year, end_date.year)
+feiertage = feiertage[feiertage["date"].between(str(start_date), str(end_date))]
+st.dataframe(feiertage)
+
+if "EINSATZDATUM" in filtered_df.columns and not filtered_df.empty:
+    holiday_missions = int(is_holiday(filtered_df["EINSATZDATUM"]).sum())
+    st.write(
+        f"Einsätze an Feiertagen: {holiday_missions} von {len(filtered_df)} "
+        f"({holiday_missions / len(filtered_df) * 100:.1f}%)"
+    )
 
 st.subheader("Einsatzstichworte")
 
@@ -496,202 +469,112 @@ else:
 
 # Geo-Mapping section using filtered data (only selected vehicles)
 if not filtered_df.empty and selected_vehicles:
-    # Check for coordinate columns
-    if "EO_X_KOORD" in filtered_df.columns and "EO_Y_KOORD" in filtered_df.columns:
+    # Coordinates are projected to WGS84 when the ETÜ data is loaded
+    if "latitude" in filtered_df.columns and "longitude" in filtered_df.columns:
         # Remove rows with missing coordinates
-        geo_valid_df = filtered_df.dropna(subset=["EO_X_KOORD", "EO_Y_KOORD"]).copy()
+        geo_valid_df = filtered_df.dropna(subset=["latitude", "longitude"])
 
         if not geo_valid_df.empty:
-            # Try to convert coordinates to lat/lon for mapping
-            # Assuming UTM Zone 32N (common for Germany) - adjust zone if needed
-            import pyproj
+            # Use folium for colored map based on vehicle type
+            st.subheader("🗺️ Karte der Einsatzorte")
+            st.write("Konvertierte Koordinaten aus UTM Zone 32N nach WGS84")
 
             try:
-                # Define UTM to WGS84 transformer (Zone 32N)
-                utm_to_wgs84 = pyproj.Transformer.from_crs(
-                    "EPSG:32632", "EPSG:4326", always_xy=True
-                )
-
-                # Convert coordinates
-                lon_coords, lat_coords = utm_to_wgs84.transform(
-                    geo_valid_df["EO_X_KOORD"].values, geo_valid_df["EO_Y_KOORD"].values
+                import folium
+                from streamlit_folium import st_folium
+                from folium.plugins import FastMarkerCluster
+
+                # Calculate center of all points
+                center_lat = geo_valid_df["latitude"].mean()
+                center_lon = geo_valid_df["longitude"].mean()
+
+                # Create folium map
+                m = folium.Map(location=[center_lat, center_lon], zoom_start=10)
+
+                # All missions as one clustered layer; the markers are
+                # styled in the browser from compact, cached data rows
+                marker_columns = [
+                    col
+                    for col in [
+                        "latitude",
+                        "longitude",
+                        "EINSATZMITTEL",
+                        "STATUS_BEI_ALARMIERUNG",
+                        *POPUP_FIELDS.values(),
+                    ]
+                    if col in geo_valid_df.columns
+                ]
+                marker_data = cached_mission_marker_data(
+                    geo_valid_df[marker_columns], tuple(color_map.items())
                 )
-
-                geo_valid_df = geo_valid_df.copy()
-                geo_valid_df["latitude"] = lat_coords
-                geo_valid_df["longitude"] = lon_coords
-
-                # Use folium for colored map based on vehicle type
-                st.subheader("🗺️ Karte der Einsatzorte")
-                st.write("Konvertierte Koordinaten aus UTM Zone 32N nach WGS84")
-
-                try:
-                    import folium
-                    from streamlit_folium import st_folium
-                    from folium.features import DivIcon
-
-                    # Debug: Show unique vehicle names
-                    unique_vehicles = geo_valid_df["EINSATZMITTEL"].unique()
-
-                    # Calculate center of all points
-                    center_lat = geo_valid_df["latitude"].mean()
-                    center_lon = geo_valid_df["longitude"].mean()
-
-                    # Create folium map
-                    m = folium.Map(location=[center_lat, center_lon], zoom_start=10)
-
-                    # Add markers for each mission location
-                    for idx, row in geo_valid_df.iterrows():
-                        vehicle = str(row["EINSATZMITTEL"])
-                        color = color_map.get(
-                            vehicle, "red"
-                        )  # Use user-defined colors, default to red
-
-                        # Get status for marker shape differentiation
-                        status = str(row.get("STATUS_BEI_ALARMIERUNG", "Unknown"))
-                        
-                        # Create popup with protocol ID and other details
-                        popup_text = f"""
-                        <b>Fahrzeug:</b> {vehicle}<br>
-                        <b>AUFTRAGS_NR:</b> {row.get('AUFTRAGS_NR')}<br>
-                        <b>Datum</b> {row.get('EINSATZDATUM', 'N/A')}<br>
-                        <b>Stichwort</b> {row.get('SZENARIO_BEGINN', 'N/A')}<br>
-                        <b>CDUS_CODE:</b> {row.get('CEDUS_CODE', 'N/A')}<br>
-                        <b>Lat:</b> {row['latitude']:.4f}<br>
-                        <b>Lon:</b> {row['longitude']:.4f}
-                        """
-                        
-                        # Define marker shapes based on status
-                        if status == "1 Einsatzbereit Funk":  # triangle marker
-                            # Create a triangle div icon using CSS borders
-                            icon_html = (
-                                f'<div style="width: 0; height: 0; '
-                                f'border-left: 8px solid transparent; '
-                                f'border-right: 8px solid transparent; '
-                                f'border-bottom: 16px solid {color};"></div>'
-                            )
-                            icon = DivIcon(html=icon_html)
-                            marker = folium.Marker(
-                                location=[row["latitude"], row["longitude"]],
-                                icon=icon,
-                                popup=popup_text,
-                                tooltip=f"{vehicle} - {status}",
-                            )
-                        elif status == "2 Einsatzbereit Wache":  # circle marker
-                            marker = folium.CircleMarker(
-                                location=[row["latitude"], row["longitude"]],
-                                radius=6,
-                                color=color,
-                                fill=True,
-                                fill_color=color,
-                                fill_opacity=0.9,
-                                popup=popup_text,
-                                tooltip=f"{vehicle} - {status}",
-                            )
-                        else:  # Default to smaller circle for other statuses
-                            marker = folium.CircleMarker(
-                                location=[row["latitude"], row["longitude"]],
-                                radius=4,
-                                color=color,
-                                fill=True,
-                                fill_color=color,
-                                fill_opacity=0.9,
-                                popup=popup_text,
-                                tooltip=f"{vehicle} - {status}",
-                            )
-                        
-                        marker.add_to(m)
-
-                    # Create dynamic legend based on user color selections
-                    legend_html = """
-                    <div style="position: fixed; 
-                                bottom: 5px; left: 5px; width: 200px; height: auto; 
-                                background-color: white; border: 2px solid grey; z-index: 9999; 
-                                font-size: 12px; padding: 10px; border-radius: 5px; color: black;">
-                        <div style="font-weight: bold; margin-bottom: 8px; color: black;">Fahrzeug-Farben:</div>
-                    """
-
-                    for vehicle, color in color_map.items():
-                        # Display vehicle name in legend
-                        vehicle_short = vehicle
-                        legend_html += f"""
-                        <div style="display: flex; align-items: center; margin-bottom: 4px;">
-                            <div style="width: 12px; height: 12px; background-color: {color}; border-radius: 50%; margin-right: 8px;"></div>
-                            <span style="color: black;">{vehicle_short}</span>
-                        </div>
-                        """
-
-                    # Add status/shape legend
-                    legend_html += """
-                        <div style="font-weight: bold; margin-top: 12px; margin-bottom: 8px; color: black;">Status bei Alarmierung:</div>
-                        <div style="display: flex; align-items: center; margin-bottom: 4px;">
-                            <div style="width: 12px; height: 12px; background-color: gray; border-radius: 50%; margin-right: 8px;"></div>
-                            <span style="color: black;">2 Einsatzbereit Wache</span>
-                        </div>
-                        <div style="display: flex; align-items: center; margin-bottom: 4px;">
-                            <div style="width: 0; height: 0; border-left: 8px solid transparent; border-right: 8px solid transparent; border-bottom: 16px solid gray; margin-right: 8px;"></div>
-                            <span style="color: black;">1 Einsatzbereit Funk</span>
-                        </div>
-                        <div style="display: flex; align-items: center; margin-bottom: 4px;">
-                            <div style="width: 8px; height: 8px; background-color: gray; border-radius: 50%; margin-right: 8px;"></div>
-                            <span style="color: black;">Andere Status</span>
-                        </div>
+                FastMarkerCluster(
+                    marker_data,
+                    callback=MISSION_MARKER_CALLBACK,
+                    options=MISSION_CLUSTER_OPTIONS,
+                ).add_to(m)
+
+                # Create dynamic legend based on user color selections
+                legend_html = """
+                <div style="position: fixed; 
+                            bottom: 5px; left: 5px; width: 200px; height: auto; 
+                            background-color: white; border: 2px solid grey; z-index: 9999; 
+                            font-size: 12px; padding: 10px; border-radius: 5px; color: black;">
+                    <div style="font-weight: bold; margin-bottom: 8px; color: black;">Fahrzeug-Farben:</div>
+                """
+
+                for vehicle, color in color_map.items():
+                    # Display vehicle name in legend
+                    vehicle_short = vehicle
+                    legend_html += f"""
+                    <div style="display: flex; align-items: center; margin-bottom: 4px;">
+                        <div style="width: 12px; height: 12px; background-color: {color}; border-radius: 50%; margin-right: 8px;"></div>
+                        <span style="color: black;">{vehicle_short}</span>
+                    </div>
                     """
 
-                    legend_html += "</div>"
-                    m.get_root().html.add_child(folium.Element(legend_html))
-
-                    # Display the map - PREVENT RERUNS when zooming/panning
-                    st_folium(m, height=800, returned_objects=[], use_container_width=True)
-                    st.write(
-                        f"**Einsatzorte auf Karte:** {len(geo_valid_df)} Punkte angezeigt"
-                    )
-
-                except ImportError:
-                    st.warning(
-                        "folium oder streamlit-folium nicht verfügbar - verwende Streamlit-Karte ohne Farbcodierung"
-                    )
-                    # Fallback to st.map without colors
-                    map_data = (
-                        geo_valid_df[["latitude", "longitude"]]
-                        .rename(columns={"latitude": "lat", "longitude": "lon"})
-                        .dropna()
-                    )
-                    if not map_data.empty:
-                        st.map(map_data)
-                        st.write(
-                            f"**Einsatzorte auf Karte:** {len(map_data)} Punkte angezeigt"
-                        )
-                    else:
-                        st.warning("Keine gültigen Koordinaten für Kartenanzeige")
+                # Add status/shape legend
+                legend_html += """
+                    <div style="font-weight: bold; margin-top: 12px; margin-bottom: 8px; color: black;">Status bei Alarmierung:</div>
+                    <div style="display: flex; align-items: center; margin-bottom: 4px;">
+                        <div style="width: 12px; height: 12px; background-color: gray; border-radius: 50%; margin-right: 8px;"></div>
+                        <span style="color: black;">2 Einsatzbereit Wache</span>
+                    </div>
+                    <div style="display: flex; align-items: center; margin-bottom: 4px;">
+                        <div style="width: 0; height: 0; border-left: 8px solid transparent; border-right: 8px solid transparent; border-bottom: 16px solid gray; margin-right: 8px;"></div>
+                        <span style="color: black;">1 Einsatzbereit Funk</span>
+                    </div>
+                    <div style="display: flex; align-items: center; margin-bottom: 4px;">
+                        <div style="width: 8px; height: 8px; background-color: gray; border-radius: 50%; margin-right: 8px;"></div>
+                        <span style="color: black;">Andere Status</span>
+                    </div>
+                """
+
+                legend_html += "</div>"
+                m.get_root().html.add_child(folium.Element(legend_html))
+
+                # Display the map - PREVENT RERUNS when zooming/panning
+                st_folium(m, height=800, returned_objects=[], use_container_width=True)
+                st.write(
+                    f"**Einsatzorte auf Karte:** {len(geo_valid_df)} Punkte angezeigt"
+                )
 
             except ImportError:
                 st.warning(
-                    "pyproj nicht verfügbar - verwende Scatter-Plot anstelle von Karte"
-                )
-            except Exception as e:
-                st.warning(
-                    f"Koordinatenkonvertierung fehlgeschlagen: {e} - verwende Scatter-Plot"
+                    "folium oder streamlit-folium nicht verfügbar - verwende Streamlit-Karte ohne Farbcodierung"
                 )
-                st.write(
-                    "Falls die Koordinaten bereits in WGS84 sind, können wir sie direkt verwenden."
+                # Fallback to st.map without colors
+                map_data = (
+                    geo_valid_df[["latitude", "longitude"]]
+                    .rename(columns={"latitude": "lat", "longitude": "lon"})
+                    .dropna()
                 )
-
-                # Fallback: check if coordinates might already be lat/lon
-                # German lat/lon ranges: lat 47-55, lon 5-16
-                if (
-                    geo_valid_df["EO_Y_KOORD"].between(47, 55).any()
-                    and geo_valid_df["EO_X_KOORD"].between(5, 16).any()
-                ):
+                if not map_data.empty:
+                    st.map(map_data)
                     st.write(
-                        "Koordinaten scheinen bereits in WGS84 zu sein - verwende st.map"
+                        f"**Einsatzorte auf Karte:** {len(map_data)} Punkte angezeigt"
                     )
-                    map_data = (
-                        geo_valid_df[["EO_Y_KOORD", "EO_X_KOORD"]]
-                        .rename(columns={"EO_Y_KOORD": "lat", "EO_X_KOORD": "lon"})
-                        .dropna()
-                    )
-                    st.map(map_data)
+                else:
+                    st.warning("Keine gültigen Koordinaten für Kartenanzeige")
 
         else:
             st.warning("Keine gültigen Koordinaten in den gefilterten Daten gefunden")
@@ -702,3 +585,94 @@ else:
         st.warning("Bitte wählen Sie mindestens ein Fahrzeug aus")
     else:
         st.warning("Keine Daten für die Kartendarstellung verfügbar")
+
+
+# Hotspot grid of the mission locations (only selected vehicles)
+if (
+    not filtered_df.empty
+    and selected_vehicles
+    and "latitude" in filtered_df.columns
+    and "longitude" in filtered_df.columns
+):
+    st.subheader("🔥 Einsatzschwerpunkte")
+    st.write(
+        "Einsatzorte zusammengefasst in Rasterzellen; je Zelle die Anzahl der Einsätze "
+        "und das häufigste Einsatzstichwort."
+    )
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        cell_size = st.selectbox(
+            "Zellgröße",
+            options=[500, 1000, 2000, 5000],
+            index=1,
+            format_func=lambda size: f"{size} m",
+        )
+    with col2:
+        grid_shape = st.selectbox(
+            "Rasterform",
+            options=["hex", "square"],
+            format_func={"hex": "Sechseck", "square": "Quadrat"}.get,
+        )
+    with col3:
+        window_label = st.selectbox("Zeitfenster", options=["Gesamt", "Monat", "Woche"])
+
+    window_freq = {"Gesamt": None, "Monat": "M", "Woche": "W"}[window_label]
+    if "EINSATZBEGINN" not in filtered_df.columns:
+        window_freq = None
+    type_col = (
+        "SZENARIO_BEGINN" if "SZENARIO_BEGINN" in filtered_df.columns else "EINSATZMITTEL"
+    )
+    grid_columns = ["latitude", "longitude", type_col]
+    if window_freq:
+        grid_columns.append("EINSATZBEGINN")
+
+    hotspots = cached_hotspot_grid(
+        filtered_df[grid_columns],
+        cell_size=cell_size,
+        shape=grid_shape,
+        time_col="EINSATZBEGINN" if window_freq else None,
+        freq=window_freq,
+        type_col=type_col,
+    )
+
+    selected_window = None
+    if hotspots.windows is not None and len(hotspots.windows):
+        selected_window = st.selectbox(
+            "Zeitraum",
+            options=list(hotspots.windows[::-1]),
+            format_func=lambda start: (
+                start.strftime("%m/%Y")
+                if window_freq == "M"
+                else f"KW {start.isocalendar().week}/{start.isocalendar().year}"
+            ),
+        )
+
+    top_n = st.slider("Anzahl Schwerpunkte", min_value=5, max_value=50, value=10)
+    top_cells = hotspots.top(top_n, window=selected_window)
+
+    if top_cells.empty:
+        st.warning("Keine Einsatzorte für die Schwerpunktanalyse verfügbar")
+    else:
+        hotspot_table = top_cells[
+            ["latitude", "longitude", "count", "share", "dominant_type", "dominant_share"]
+        ].rename(
+            columns={
+                "latitude": "Breitengrad",
+                "longitude": "Längengrad",
+                "count": "Einsätze",
+                "share": "Anteil an allen Einsätzen (%)",
+                "dominant_type": "Häufigstes Stichwort"
+                if type_col == "SZENARIO_BEGINN"
+                else "Häufigstes Fahrzeug",
+                "dominant_share": "Anteil in der Zelle (%)",
+            }
+        )
+        for column in ["Anteil an allen Einsätzen (%)", "Anteil in der Zelle (%)"]:
+            hotspot_table[column] = (hotspot_table[column] * 100).round(1)
+        hotspot_table.index = range(1, len(hotspot_table) + 1)
+        st.dataframe(hotspot_table, use_container_width=True)
+        st.caption(
+            f"{len(hotspots.cell_i)} belegte Zellen à {cell_size} m; "
+            "Koordinaten sind die Zellmittelpunkte."
+        )
@@ -0,0 +1,246 @@
+import os
+import re
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from holiday_calendar import is_holiday
+from occupancy_engine import Occupancy, binned_coverage, merge_intervals
+
+# Shift patterns per vehicle (format: vehicle=rule;rule,vehicle=rule;...), e.g.
+# "85-1=Mo-Fr 07:00-19:00;Sa 08:00-14:00;Ft frei,85-2=Mo-So 00:00-24:00".
+# A rule names days (Mo..So, ranges like Mo-Fr, Ft for holidays) and either
+# time windows or "frei". Later rules replace earlier ones for their days;
+# a window ending at or before its start runs into the next day.
+VEHICLE_SHIFTS = os.getenv("VEHICLE_SHIFTS", "")
+
+# Weekly duty hours of vehicles without a shift pattern (vehicle:hours,...)
+VEHICLE_CONFIG = os.getenv("VEHICLE_CONFIG", "")
+
+WEEKDAY_CODES = {"Mo": 0, "Di": 1, "Mi": 2, "Do": 3, "Fr": 4, "Sa": 5, "So": 6}
+HOLIDAY_CODE = "Ft"
+
+_TIME_WINDOW = re.compile(r"^(\d{1,2}):(\d{2})-(\d{1,2}):(\d{2})$")
+
+
+class ShiftPattern:
+    """
+    Weekly shift times of one vehicle
+
+    - windows: Seven lists (Monday first) of (start hour, end hour) per day;
+      end hours above 24 run into the next day
+    - holiday_windows: Windows used on holidays instead of the weekday's,
+      None if holidays follow the weekly pattern
+    - duty_share: Share of the on-duty time that counts as available; below 1
+      for vehicles that only have a weekly-hours quota
+    """
+
+    def __init__(self, windows, holiday_windows=None, duty_share=1.0):
+        self.windows = [list(day) for day in windows]
+        self.holiday_windows = holiday_windows
+        self.duty_share = duty_share
+
+    @classmethod
+    def around_the_clock(cls, weekly_hours=168):
+        """24/7 duty of which weekly_hours per week are available"""
+        return cls([[(0.0, 24.0)]] * 7, duty_share=min(weekly_hours / 168, 1.0))
+
+    @classmethod
+    def parse(cls, spec):
+        """Parse rules like "Mo-Fr 07:00-19:00;Sa 08:00-14:00;Ft frei" """
+        windows = [[] for _ in range(7)]
+        holiday_windows = None
+        for rule in filter(None, (r.strip() for r in spec.split(";"))):
+            days, _, times = rule.partition(" ")
+            day_windows = _parse_windows(times.split(), rule)
+            if days == HOLIDAY_CODE:
+                holiday_windows = day_windows
+                continue
+            for day in _parse_days(days, rule):
+                windows[day] = list(day_windows)
+        return cls(windows, holiday_windows)
+
+    @property
+    def weekly_hours(self):
+        """Hours on duty in a week without holidays"""
+        hours = sum(end - start for day in self.windows for start, end in day)
+        return hours * self.duty_share
+
+
+def _parse_days(days, rule):
+    first, _, last = days.partition("-")
+    if first not in WEEKDAY_CODES or (last and last not in WEEKDAY_CODES):
+        raise ValueError(f"Unknown days in shift rule: {rule}")
+    start = WEEKDAY_CODES[first]
+    count = (WEEKDAY_CODES[last] - start) % 7 + 1 if last else 1
+    return [(start + i) % 7 for i in range(count)]
+
+
+def _parse_windows(tokens, rule):
+    if tokens == ["frei"]:
+        return []
+    windows = []
+    for token in tokens:
+        match = _TIME_WINDOW.match(token)
+        if not match:
+            raise ValueError(f"Invalid time window in shift rule: {rule}")
+        start_h, start_m, end_h, end_m = map(int, match.groups())
+        start = start_h + start_m / 60
+        end = end_h + end_m / 60
+        windows.append((start, end if end > start else end + 24))
+    if not windows:
+        raise ValueError(f"Shift rule without time windows: {rule}")
+    return windows
+
+
+def _parse_list(config, separator):
+    """Split "vehicle<sep>value,vehicle<sep>value" into a dict"""
+    entries = {}
+    for entry in config.split(","):
+        if separator in entry:
+            vehicle, value = entry.split(separator, 1)
+            entries[vehicle.strip()] = value.strip()
+    return entries
+
+
+def vehicle_shift_patterns(vehicles, prefix="", shifts=None, weekly_hours=None):
+    """
+    Shift pattern of each vehicle
+
+    Parameters:
+    - vehicles: Vehicle names as they appear in the mission data
+    - prefix: Prefix of the data names in front of the configured names
+      (e.g. "Ret SL ")
+    - shifts, weekly_hours: Configuration strings, default VEHICLE_SHIFTS and
+      VEHICLE_CONFIG
+
+    Vehicles without a shift pattern fall back to their weekly hours spread
+    over round-the-clock duty, or to 24/7 availability.
+    """
+    patterns = _parse_list(VEHICLE_SHIFTS if shifts is None else shifts, "=")
+    hours = _parse_list(VEHICLE_CONFIG if weekly_hours is None else weekly_hours, ":")
+    result = {}
+    for vehicle in vehicles:
+        name = vehicle[len(prefix) :] if vehicle.startswith(prefix) else vehicle
+        if name in patterns:
+            result[vehicle] = ShiftPattern.parse(patterns[name])
+        elif name in hours:
+            result[vehicle] = ShiftPattern.around_the_clock(int(hours[name]))
+        else:
+            result[vehicle] = ShiftPattern.around_the_clock()
+    return result
+
+
+class ShiftCalendar:
+    """
+    Shift patterns of several vehicles expanded to intervals over a date range
+
+    Attributes:
+    - vehicles, days: As in occupancy_engine.Occupancy
+    - holidays: Boolean per day
+    - keys, starts, ends: Disjoint on-duty intervals as vehicle positions and
+      hours since the start of the range, sorted by vehicle and start
+    - duty_share: (vehicles,) available share of the on-duty time
+    - available: (vehicles, days, 24) available hours in every hour
+    """
+
+    def __init__(self, patterns, start_date, end_date):
+        """
+        Parameters:
+        - patterns: Dict vehicle -> ShiftPattern, in report order
+        - start_date, end_date: Inclusive date range
+        """
+        self.vehicles = list(patterns)
+        self.days = pd.date_range(start_date, end_date, freq="D", normalize=True)
+        self.holidays = is_holiday(self.days)
+        n_vehicles, n_days = len(self.vehicles), len(self.days)
+
+        # The day before the range is expanded too: its overnight shifts
+        # reach into the first day
+        expanded = pd.date_range(
+            pd.Timestamp(start_date) - pd.Timedelta(days=1), end_date, normalize=True
+        )
+        weekdays = expanded.dayofweek.to_numpy()
+        holidays = is_holiday(expanded)
+        day_hours = (np.arange(len(expanded)) - 1) * 24.0
+
+        keys, starts, ends = [], [], []
+        for code, pattern in enumerate(patterns.values()):
+            # Days each list of windows applies to, every window over all of
+            # its days at once
+            applies = [
+                (day_windows, weekdays == weekday)
+                for weekday, day_windows in enumerate(pattern.windows)
+            ]
+            if pattern.holiday_windows is not None:
+                applies = [(w, days & ~holidays) for w, days in applies]
+                applies.append((pattern.holiday_windows, holidays))
+            for day_windows, days in applies:
+                for start, end in day_windows:
+                    offsets = day_hours[days]
+                    keys.append(np.full(len(offsets), code))
+                    starts.append(offsets + start)
+                    ends.append(offsets + end)
+
+        keys = np.concatenate(keys) if keys else np.zeros(0, dtype=int)
+        starts = np.clip(np.concatenate(starts) if starts else [], 0, n_days * 24)
+        ends = np.clip(np.concatenate(ends) if ends else [], 0, n_days * 24)
+        inside = ends > starts
+        self.keys, self.starts, self.ends = merge_intervals(
+            keys[inside], starts[inside], ends[inside]
+        )
+
+        self.duty_share = np.array([p.duty_share for p in patterns.values()])
+        edges = np.arange(n_days * 24 + 1, dtype="float64")
+        on_duty = binned_coverage(self.keys, self.starts, self.ends, n_vehicles, edges)
+        self.available = (
+            on_duty.reshape(n_vehicles, n_days, 24) * self.duty_share[:, None, None]
+        )
+
+    def intervals(self):
+        """On-duty intervals as a frame with vehicle, start and end timestamps"""
+        origin = self.days[0] if len(self.days) else pd.Timestamp(0)
+        return pd.DataFrame(
+            {
+                "vehicle": np.asarray(self.vehicles, dtype=object)[self.keys],
+                "start": origin + pd.to_timedelta(self.starts, unit="h"),
+                "end": origin + pd.to_timedelta(self.ends, unit="h"),
+            }
+        )
+
+
+@st.cache_data(ttl=604800, show_spinner=False)
+def get_shift_calendar(vehicles, start_date, end_date, prefix=""):
+    """ShiftCalendar of the configured patterns, cached per vehicles and range"""
+    return ShiftCalendar(
+        vehicle_shift_patterns(vehicles, prefix=prefix), start_date, end_date
+    )
+
+
+@st.cache_data(ttl=604800, show_spinner=False)
+def cached_shift_occupancy(
+    missions_df,
+    vehicle_col,
+    start_col,
+    end_col,
+    start_date,
+    end_date,
+    vehicles,
+    prefix="",
+):
+    """
+    Cached Occupancy of a mission frame measured against the vehicles' shifts
+
+    Pass only the vehicle, start and end columns of the filtered frame: they
+    are what the filter selection determines and keep the cache key small.
+    """
+    return Occupancy(
+        missions_df[vehicle_col],
+        missions_df[start_col],
+        missions_df[end_col],
+        start_date,
+        end_date,
+        names=list(vehicles),
+        shifts=get_shift_calendar(tuple(vehicles), start_date, end_date, prefix),
+    )
@@ -0,0 +1,153 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# Universal hashing modulo a Mersenne prime; a * h stays below 2**62
+_PRIME = np.uint64((1 << 31) - 1)
+
+# Default similarity (estimated Jaccard of the word shingles) for near-duplicates
+NEAR_DUPLICATE_THRESHOLD = 0.8
+
+# Shingles are rebuilt in chunks of this many texts to bound memory
+_CHUNK_TEXTS = 20000
+
+
+def _normalize(text):
+    """Lowercase, mask digits (dates, times, numbers) and collapse whitespace"""
+    text = re.sub(r"\d", "0", str(text).lower())
+    return re.findall(r"\w+", text)
+
+
+def _shingles(words, size):
+    """Word n-grams of a text; short texts give a single shingle"""
+    if len(words) <= size:
+        return [" ".join(words)]
+    return [" ".join(words[i : i + size]) for i in range(len(words) - size + 1)]
+
+
+def minhash_signatures(texts, num_perm=64, shingle_size=3, seed=1):
+    """
+    MinHash signatures of the word shingle sets of texts
+
+    Returns a (len(texts), num_perm) uint64 array. The share of equal positions
+    of two signatures estimates the Jaccard similarity of their shingle sets.
+    """
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, int(_PRIME), size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, int(_PRIME), size=num_perm, dtype=np.uint64)
+
+    texts = list(texts)
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint64)
+    for start in range(0, len(texts), _CHUNK_TEXTS):
+        chunk = texts[start : start + _CHUNK_TEXTS]
+        shingle_lists = [_shingles(_normalize(t), shingle_size) for t in chunk]
+        lengths = np.array([len(s) for s in shingle_lists])
+        flat = np.array(
+            [s for shingles in shingle_lists for s in shingles], dtype=object
+        )
+
+        # Vectorized, deterministic 64-bit hashes of all shingles of the chunk
+        hashes = pd.util.hash_array(flat) % _PRIME
+        permuted = (hashes[:, None] * a[None, :] + b[None, :]) % _PRIME
+        offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        signatures[start : start + len(chunk)] = np.minimum.reduceat(
+            permuted, offsets, axis=0
+        )
+    return signatures
+
+
+def lsh_parameters(num_perm, threshold):
+    """Bands and rows per band whose S-curve turns at about the threshold"""
+    best = None
+    for bands in range(1, num_perm + 1):
+        if num_perm % bands:
+            continue
+        rows = num_perm // bands
+        error = abs((1 / bands) ** (1 / rows) - threshold)
+        if best is None or error < best[0]:
+            best = (error, bands, rows)
+    return best[1], best[2]
+
+
+def cluster_near_duplicates(
+    texts, threshold=NEAR_DUPLICATE_THRESHOLD, num_perm=64, shingle_size=3
+):
+    """
+    Group near-duplicate texts with MinHash and locality-sensitive hashing
+
+    Texts sharing one LSH band become candidates; a candidate is joined with
+    the bucket's first text only if their estimated similarity reaches the
+    threshold. The joins of all bands are merged with union-find, so a chain
+    of such matches can still put texts into one cluster that are less
+    similar to its representative than the threshold; check the similarity
+    column for that.
+
+    Returns a DataFrame indexed like texts with
+    - cluster: position of the cluster representative (its first text)
+    - representative: whether the text represents its cluster
+    - similarity: estimated similarity to the representative
+    """
+    texts = pd.Series(texts, dtype="object").fillna("")
+    n = len(texts)
+    parent = np.arange(n)
+
+    if n:
+        signatures = minhash_signatures(texts, num_perm, shingle_size)
+        bands, rows = lsh_parameters(num_perm, threshold)
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for band in range(bands):
+            keys = signatures[:, band * rows : (band + 1) * rows]
+            _, bucket = np.unique(keys, axis=0, return_inverse=True)
+            bucket = bucket.ravel()
+            order = np.argsort(bucket, kind="stable")
+            bounds = np.flatnonzero(np.diff(bucket[order])) + 1
+            for members in np.split(order, bounds):
+                if len(members) < 2:
+                    continue
+                head = members[0]
+                agreement = (signatures[members[1:]] == signatures[head]).mean(axis=1)
+                for member in members[1:][agreement >= threshold]:
+                    root_a, root_b = find(head), find(member)
+                    if root_a != root_b:
+                        parent[max(root_a, root_b)] = min(root_a, root_b)
+
+        clusters = np.array([find(i) for i in range(n)])
+        similarity = (signatures == signatures[clusters]).mean(axis=1)
+    else:
+        clusters = parent
+        similarity = np.ones(0)
+
+    return pd.DataFrame(
+        {
+            "cluster": clusters,
+            "representative": clusters == np.arange(n),
+            "similarity": similarity,
+        },
+        index=texts.index,
+    )
+
+
+def cluster_statistics(clusters):
+    """Summary of a cluster_near_duplicates result"""
+    sizes = clusters["cluster"].value_counts()
+    total = len(clusters)
+    return {
+        "texts": total,
+        "clusters": len(sizes),
+        "saved": total - len(sizes),
+        "reduction": (1 - len(sizes) / total) if total else 0.0,
+        "largest_cluster": int(sizes.max()) if total else 0,
+        "singletons": int((sizes == 1).sum()),
+        "mean_similarity": (
+            float(clusters.loc[~clusters["representative"], "similarity"].mean())
+            if (~clusters["representative"]).any()
+            else 1.0
+        ),
+    }